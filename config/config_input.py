@@ -1,23 +1,106 @@
-import gspread,random
-from google.oauth2.service_account import Credentials
+import json, os, sys, time, tempfile, threading, logging
+
+# Logger
+logger = logging.getLogger("spider")
+
+CONFIG_SHEET_KEY = "1Fbq9XRtBApCJHvjcrUI2JCIEGZC-Mri7-pt8hfHrSWI"
+CONFIG_SHEETS = ["Settings", "JobUrls", "ConfirmationCompanies", "IgnoreCompanies"]
+CREDENTIALS_PATH = "config/indeed_spider_gs_credentails.json"
+
+# Local copy of the config sheets, so startup never waits on the Sheets API
+SNAPSHOT_PATH = "config/config_snapshot.json"
+SNAPSHOT_SCHEMA = 1
+SHEETS_TIMEOUT = 15
+
+# background: load the snapshot and refresh it for the next run in a daemon thread
+# sync: fetch the sheets now and fall back to the snapshot if that fails
+# never: snapshot only (offline runs and tests)
+CONFIG_REFRESH = os.getenv("CONFIG_REFRESH", "background")
+
+
+def fetch_config_sheets(timeout=SHEETS_TIMEOUT):
+    """Download the raw values of all config sheets in two round trips."""
+    import gspread
+    from google.oauth2.service_account import Credentials
 
-def load_scraper_config_from_sheet():
-    creds_path = "config/indeed_spider_gs_credentails.json"
     scopes = ["https://www.googleapis.com/auth/spreadsheets"]
 
     # Auth
-    creds = Credentials.from_service_account_file(creds_path, scopes=scopes)
+    creds = Credentials.from_service_account_file(CREDENTIALS_PATH, scopes=scopes)
     client = gspread.authorize(creds)
+    client.set_timeout(timeout)
 
     # Open sheet by fixed key (this is your config sheet)
-    spreadsheet = client.open_by_key("1Fbq9XRtBApCJHvjcrUI2JCIEGZC-Mri7-pt8hfHrSWI")
+    spreadsheet = client.open_by_key(CONFIG_SHEET_KEY)
 
-    # Load Settings
-    try:
-        settings_data = spreadsheet.worksheet("Settings").get_all_values()
-    except gspread.exceptions.WorksheetNotFound:
+    existing = {worksheet.title for worksheet in spreadsheet.worksheets()}
+    if "Settings" not in existing:
         raise ValueError("❌ 'Settings' sheet not found in the workbook.")
 
+    titles = [title for title in CONFIG_SHEETS if title in existing]
+    response = spreadsheet.values_batch_get([f"'{title}'" for title in titles])
+
+    sheets = {title: [] for title in CONFIG_SHEETS}
+    for title, value_range in zip(titles, response.get("valueRanges", [])):
+        sheets[title] = value_range.get("values", [])
+    return sheets
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """Return the saved snapshot, or None when it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("schema") != SNAPSHOT_SCHEMA:
+            logger.warning(f"Ignoring config snapshot with schema {snapshot.get('schema')}")
+            return None
+        return snapshot
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.warning(f"Config snapshot {path} is unreadable", exc_info=True)
+        return None
+
+
+def save_snapshot(sheets, path=SNAPSHOT_PATH):
+    """Write a new snapshot version atomically; the version only changes with the content."""
+    previous = load_snapshot(path)
+    version = 1
+    if previous:
+        version = previous["version"] + (previous["sheets"] != sheets)
+
+    snapshot = {
+        "schema": SNAPSHOT_SCHEMA,
+        "version": version,
+        "fetched_at": time.time(),
+        "sheets": sheets,
+    }
+    # A temp file of its own, so a background refresh and an explicit one never write the same file
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(path) or ".",
+                                     prefix=os.path.basename(path), suffix=".tmp", delete=False) as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(f.name, path)
+    return snapshot
+
+
+def refresh_snapshot(path=SNAPSHOT_PATH, timeout=SHEETS_TIMEOUT):
+    """Fetch the config sheets and save them as the current snapshot."""
+    snapshot = save_snapshot(fetch_config_sheets(timeout), path)
+    logger.info(f"Config snapshot v{snapshot['version']} saved to {path}")
+    return snapshot
+
+
+def _refresh_snapshot_quietly(path=SNAPSHOT_PATH):
+    try:
+        refresh_snapshot(path)
+    except Exception as e:
+        logger.warning(f"Background config refresh failed, keeping snapshot: {e}")
+
+
+def build_config(sheets):
+    """Parse raw sheet values into the scraper config."""
+    settings_data = sheets.get("Settings", [])
+
     settings_dict = {
         row[0].strip(): row[1].strip().strip('"')  # remove extra quotes if present
         for row in settings_data if len(row) >= 2 and row[0].strip()
@@ -26,15 +109,11 @@ def load_scraper_config_from_sheet():
     # Helper: load specific column (default = 0 → column A, 1 → column B, etc.)
     date_posted = int(settings_dict.get("DATE_POSTED", 0)),
     def load_column(sheet_title, col_index=0):
-        try:
-            sheet = spreadsheet.worksheet(sheet_title)
-            return [
-                row[col_index].strip()
-                for row in sheet.get_all_values()
-                if row and len(row) > col_index and row[col_index].strip()
-            ]
-        except gspread.exceptions.WorksheetNotFound:
-            return []
+        return [
+            row[col_index].strip()
+            for row in sheets.get(sheet_title, [])
+            if row and len(row) > col_index and row[col_index].strip()
+        ]
 
 
     # Parse comma-separated sheet names if present
@@ -52,6 +131,57 @@ def load_scraper_config_from_sheet():
         "RESUME": settings_dict.get("RESUME", ""),
         "PER_COMPANY_JOBS": int(settings_dict.get("PER_COMPANY_JOBS", 2)),
         "PROCESS_BATCH_SIZE": int(settings_dict.get("PROCESS_BATCH_SIZE", 15)),
+        "SEEN_JOBS_TTL_DAYS": int(settings_dict.get("SEEN_JOBS_TTL_DAYS", 60)),
+        "DETAIL_TABS_PER_CONTEXT": int(settings_dict.get("DETAIL_TABS_PER_CONTEXT", 3)),
+        "DETAIL_CONTEXTS": int(settings_dict.get("DETAIL_CONTEXTS", 2)),
+        "WORKER_PROCESSES": int(settings_dict.get("WORKER_PROCESSES", 1)),
+        "CONTEXT_MAX_PAGES": int(settings_dict.get("CONTEXT_MAX_PAGES", 50)),
+        "PROXY_QUARANTINE_SECONDS": float(settings_dict.get("PROXY_QUARANTINE_SECONDS", 120)),
+        "FINGERPRINT_SELECTION": settings_dict.get("FINGERPRINT_SELECTION", "round-robin").strip().lower(),
+        "CONTEXT_MAX_HEAP_MB": int(settings_dict.get("CONTEXT_MAX_HEAP_MB", 512)),
+        "TASK_QUEUE_URL": settings_dict.get("TASK_QUEUE_URL", "").strip(),
+        "TASK_RUN_ID": settings_dict.get("TASK_RUN_ID", "").strip(),
+        "TASK_LEASE_SECONDS": float(settings_dict.get("TASK_LEASE_SECONDS", 300)),
+        "TASK_HEARTBEAT_SECONDS": float(settings_dict.get("TASK_HEARTBEAT_SECONDS", 60)),
+        "TASK_MAX_ATTEMPTS": int(settings_dict.get("TASK_MAX_ATTEMPTS", 3)),
+        "SEEN_JOBS_URL": settings_dict.get("SEEN_JOBS_URL", "").strip(),
+        "SCORING_WORKERS": int(settings_dict.get("SCORING_WORKERS", 4)),
+        "SCORING_QUEUE_SIZE": int(settings_dict.get("SCORING_QUEUE_SIZE", 10)),
+        "DETAIL_QUEUE_SIZE": int(settings_dict.get("DETAIL_QUEUE_SIZE", 50)),
+        "OUTPUT_QUEUE_SIZE": int(settings_dict.get("OUTPUT_QUEUE_SIZE", 100)),
+        "RESOURCE_PROFILE": settings_dict.get("RESOURCE_PROFILE", "stealth-safe").strip().lower(),
+        "DETAIL_FETCH_MODE": settings_dict.get("DETAIL_FETCH_MODE", "browser").strip().lower(),
+        "SCORE_CACHE_TTL_DAYS": int(settings_dict.get("SCORE_CACHE_TTL_DAYS", 30)),
+        "SCORE_CACHE_MAX_ENTRIES": int(settings_dict.get("SCORE_CACHE_MAX_ENTRIES", 50000)),
+        "SCORING_MAX_BATCH": int(settings_dict.get("SCORING_MAX_BATCH", 100)),
+        "SCORING_MAX_WAIT": float(settings_dict.get("SCORING_MAX_WAIT", 5)),
+        "GEMINI_RPM": int(settings_dict.get("GEMINI_RPM", 15)),
+        "GEMINI_TPM": int(settings_dict.get("GEMINI_TPM", 1000000)),
+        "GROQ_RPM": int(settings_dict.get("GROQ_RPM", 30)),
+        "GROQ_TPM": int(settings_dict.get("GROQ_TPM", 12000)),
+        "GEMINI_MODEL": settings_dict.get("GEMINI_MODEL", "gemini-2.0-flash").strip(),
+        "GEMINI_TEMPERATURE": float(settings_dict.get("GEMINI_TEMPERATURE", 0)),
+        "GEMINI_MAX_TOKENS": int(settings_dict.get("GEMINI_MAX_TOKENS", 1024)),
+        "GEMINI_CONCURRENCY": int(settings_dict.get("GEMINI_CONCURRENCY", 4)),
+        "GROQ_MODEL": settings_dict.get("GROQ_MODEL", "llama-3.3-70b-versatile").strip(),
+        "GROQ_TEMPERATURE": float(settings_dict.get("GROQ_TEMPERATURE", 0)),
+        "GROQ_MAX_TOKENS": int(settings_dict.get("GROQ_MAX_TOKENS", 1024)),
+        "GROQ_CONCURRENCY": int(settings_dict.get("GROQ_CONCURRENCY", 4)),
+        "LLM_TIMEOUT": float(settings_dict.get("LLM_TIMEOUT", 60)),
+        "CIRCUIT_FAILURE_THRESHOLD": int(settings_dict.get("CIRCUIT_FAILURE_THRESHOLD", 3)),
+        "CIRCUIT_OPEN_SECONDS": float(settings_dict.get("CIRCUIT_OPEN_SECONDS", 60)),
+        "LLM_HEDGE_PERCENTILE": float(settings_dict.get("LLM_HEDGE_PERCENTILE", 90)),
+        "CONNECTIVITY_PROBE_INTERVAL": float(settings_dict.get("CONNECTIVITY_PROBE_INTERVAL", 30)),
+        "PREFILTER_ENABLED": settings_dict.get("PREFILTER_ENABLED", "FALSE").strip().upper() == "TRUE",
+        "PREFILTER_CUTOFF": float(settings_dict.get("PREFILTER_CUTOFF", 0)),
+        "PACING_MIN_SECONDS": float(settings_dict.get("PACING_MIN_SECONDS", 0.5)),
+        "PACING_MAX_SECONDS": float(settings_dict.get("PACING_MAX_SECONDS", 20)),
+        "PAGINATION_MODE": settings_dict.get("PAGINATION_MODE", "url").strip().lower(),
+        "PAGES_PER_SEARCH": int(settings_dict.get("PAGES_PER_SEARCH", 3)),
+        "INCREMENTAL_CRAWL": settings_dict.get("INCREMENTAL_CRAWL", "TRUE").strip().upper() == "TRUE",
+        "INCREMENTAL_STALE_PAGES": int(settings_dict.get("INCREMENTAL_STALE_PAGES", 3)),
+        "PREFILTER_ALLOW_TERMS": settings_dict.get("PREFILTER_ALLOW_TERMS", ""),
+        "PREFILTER_DENY_TERMS": settings_dict.get("PREFILTER_DENY_TERMS", ""),
         "CSV_FILES": csv_files,
         "WORKBOOK_ID": settings_dict.get("WORKBOOK_ID", ""),
 
@@ -64,8 +194,30 @@ def load_scraper_config_from_sheet():
     return config
 
 
+def load_scraper_config_from_sheet(refresh=CONFIG_REFRESH, path=SNAPSHOT_PATH):
+    """Load the config from the local snapshot, fetching the sheets only when needed."""
+    snapshot = load_snapshot(path)
+
+    if refresh == "sync" or (snapshot is None and refresh != "never"):
+        try:
+            snapshot = refresh_snapshot(path)
+        except Exception as e:
+            if snapshot is None:
+                logger.error(f"❌ Config sheets unreachable and no snapshot found, using defaults: {e}")
+            else:
+                logger.warning(f"Config sheets unreachable, using snapshot v{snapshot['version']}: {e}")
+    elif refresh == "background":
+        # The running scraper keeps the snapshot it started with, the next run gets the refreshed one.
+        threading.Thread(target=_refresh_snapshot_quietly, args=(path,), daemon=True).start()
+
+    return build_config(snapshot["sheets"] if snapshot else {})
+
+
+# Explicit refresh (see the end of this file) fetches the sheets itself, without a background refresh next to it
+REFRESH_ONLY = __name__ == "__main__" and "--refresh" in sys.argv
+
 # === Usage ===
-config = load_scraper_config_from_sheet()
+config = load_scraper_config_from_sheet("never" if REFRESH_ONLY else CONFIG_REFRESH)
 
 # JOBS SEARCH LINKS
 jobs_listed_pages_urls = [
@@ -77,6 +229,8 @@ jobs_listed_pages_urls = [
 # Scraper setting vars
 MATCHING_PERCENTAGE = config["MATCHING_PERCENTAGE"]
 CSV_FILES = [file + ".csv" for file in config["CSV_FILES"]]
+# Where the CSV files are written; each worker process of a sharded run gets its own subfolder
+OUTPUT_DIR = "output"
 LEAVE_BLANK_COLLS = config["LEAVE_BLANK_COLLS"]
 PER_COMPANY_JOBS = config["PER_COMPANY_JOBS"]
 PROCESS_BATCH_SIZE = config["PROCESS_BATCH_SIZE"]
@@ -91,16 +245,83 @@ ignore_companies = config["IGNORE_COMPANIES"]
 confirmation_companies = config["CONFIRMATION_COMPANIES"]
 
 
-PROCESSED_JOBS_FILE_PATH = r'input\\processed_jobs.txt'
+PROCESSED_JOBS_FILE_PATH = "config/processed_jobs.txt"
+SEEN_JOBS_DB_PATH = "config/seen_jobs.db"
+# Jobs not seen in any search for this many days are evicted and may be listed again
+SEEN_JOBS_TTL_DAYS = config["SEEN_JOBS_TTL_DAYS"]
 DEBUGGING_SCREENSHOTS_PATH = "debugging_screenshots"
 
 # on/off headless mode
 headless = True
 
+# Listing pages wait for their result cards (at most PACING_READY_TIMEOUT seconds), then a random
+# jitter of up to the pacing budget (utils/pacing.py). The budget starts at PACING_START_SECONDS,
+# doubles on every challenge and shrinks while pages come back clean, within PACING_MIN/MAX_SECONDS.
+PACING_MIN_SECONDS = config["PACING_MIN_SECONDS"]
+PACING_MAX_SECONDS = config["PACING_MAX_SECONDS"]
+PACING_START_SECONDS = 3
+PACING_READY_TIMEOUT = 15
+
+gemini_model_version = config["GEMINI_MODEL"]
+groq_model_version = config["GROQ_MODEL"]
+
+# Long-lived LLM clients (utils/llm_clients.py): sampling settings, requests in flight
+# per provider, and seconds before a request is abandoned
+GEMINI_TEMPERATURE = config["GEMINI_TEMPERATURE"]
+GEMINI_MAX_TOKENS = config["GEMINI_MAX_TOKENS"]
+GEMINI_CONCURRENCY = config["GEMINI_CONCURRENCY"]
+GROQ_TEMPERATURE = config["GROQ_TEMPERATURE"]
+GROQ_MAX_TOKENS = config["GROQ_MAX_TOKENS"]
+GROQ_CONCURRENCY = config["GROQ_CONCURRENCY"]
+LLM_TIMEOUT = config["LLM_TIMEOUT"]
+
+# Provider router (utils/provider_router.py): consecutive failures before a provider is
+# skipped and for how long (seconds); a request slower than the provider's
+# LLM_HEDGE_PERCENTILE latency is also sent to the next provider (0 = never hedge)
+CIRCUIT_FAILURE_THRESHOLD = config["CIRCUIT_FAILURE_THRESHOLD"]
+CIRCUIT_OPEN_SECONDS = config["CIRCUIT_OPEN_SECONDS"]
+LLM_HEDGE_PERCENTILE = config["LLM_HEDGE_PERCENTILE"]
+
+# Cached AI match scores, keyed by this model id + AI_PROMPT + RESUME + normalized title
+SCORE_CACHE_DB_PATH = "config/score_cache.db"
+SCORING_MODEL_KEY = f"{gemini_model_version}|{groq_model_version}"
+SCORE_CACHE_TTL_DAYS = config["SCORE_CACHE_TTL_DAYS"]
+SCORE_CACHE_MAX_ENTRIES = config["SCORE_CACHE_MAX_ENTRIES"]
 
-RANDOM_SLEEP = random.randint(1,3)
+# Titles from all workers are sent together: up to SCORING_MAX_BATCH per request,
+# or whatever arrived SCORING_MAX_WAIT seconds after the first one
+SCORING_MAX_BATCH = config["SCORING_MAX_BATCH"]
+SCORING_MAX_WAIT = config["SCORING_MAX_WAIT"]
+# Follow-up requests for jobs the model left out of its JSON answer
+SCORING_RETRIES = 2
 
-gemini_model_version = "gemini-2.0-flash"
+# Per-provider request/token limits per minute (0 = no limit), and the pause after a quota error (seconds)
+GEMINI_RPM = config["GEMINI_RPM"]
+GEMINI_TPM = config["GEMINI_TPM"]
+GROQ_RPM = config["GROQ_RPM"]
+GROQ_TPM = config["GROQ_TPM"]
+QUOTA_COOLDOWN = 60
+
+# Lexical pre-filter before AI scoring (utils/prefilter.py): titles scoring at or below
+# PREFILTER_CUTOFF are dropped (0 = only titles sharing no terms with AI_PROMPT/RESUME).
+# Comma-separated allow terms always keep a title, deny terms always drop it.
+# Off unless PREFILTER_ENABLED is TRUE: titles are already in the seen-jobs store when they are
+# filtered, so a wrongly dropped job is never listed or scored again.
+PREFILTER_ENABLED = config["PREFILTER_ENABLED"]
+PREFILTER_CUTOFF = config["PREFILTER_CUTOFF"]
+PREFILTER_ALLOW_TERMS = config["PREFILTER_ALLOW_TERMS"]
+PREFILTER_DENY_TERMS = config["PREFILTER_DENY_TERMS"]
+
+# Pagination of a search: "url" opens the start= page URLs, PAGES_PER_SEARCH at a time in
+# parallel tabs of the search's context, until a page shows no new results; "click" follows
+# the numbered pagination buttons in a single tab.
+PAGINATION_MODE = config["PAGINATION_MODE"]
+PAGES_PER_SEARCH = config["PAGES_PER_SEARCH"]
+
+# Incremental crawl: a search stops paginating after INCREMENTAL_STALE_PAGES pages in a row
+# without unseen jobs, or at a page whose jobs were all posted before the last finished run started.
+INCREMENTAL_CRAWL = config["INCREMENTAL_CRAWL"]
+INCREMENTAL_STALE_PAGES = config["INCREMENTAL_STALE_PAGES"]
 
 
 AVIOD_JOBS = ["clearance", "government", "cyber"]
@@ -108,7 +329,66 @@ AVIOD_JOBS = ["clearance", "government", "cyber"]
 
 MAX_CONTEXTS = config["CONCURRENT__SIZE"]
 
-keep_processed_jobs_links = 8000
+# Listing contexts are kept warm and reused across search URLs (utils/context_pool.py),
+# rebuilt after CONTEXT_MAX_PAGES pages or above CONTEXT_MAX_HEAP_MB of page heap.
+# Their cookies/localStorage are saved per identity in STORAGE_STATE_DIR between runs.
+CONTEXT_MAX_PAGES = config["CONTEXT_MAX_PAGES"]
+CONTEXT_MAX_HEAP_MB = config["CONTEXT_MAX_HEAP_MB"]
+STORAGE_STATE_DIR = "config/storage_states"
+
+# Per search URL: last listing page done, plus jobs not yet scored or extracted (utils/checkpoints.py).
+# A run that did not finish is resumed by the next start.
+CHECKPOINT_DB_PATH = "config/checkpoints.db"
+
+# Proxy health stats kept between runs (utils/proxy_manager.py); a failing proxy is quarantined
+# for PROXY_QUARANTINE_SECONDS, doubling per further failure up to PROXY_MAX_QUARANTINE_SECONDS
+PROXY_STATS_DB_PATH = "config/proxy_stats.db"
+PROXY_QUARANTINE_SECONDS = config["PROXY_QUARANTINE_SECONDS"]
+PROXY_MAX_QUARANTINE_SECONDS = 3600
+
+# How identities get a fingerprint (utils/fingerprint_loader.py): round-robin, or weighted by
+# an optional "weight" field in the fingerprint file
+FINGERPRINT_SELECTION = config["FINGERPRINT_SELECTION"]
+
+# Processes (each with its own browser) the search URLs are split across (scrapers/sharding.py)
+WORKER_PROCESSES = config["WORKER_PROCESSES"]
+
+# Distributed mode (scrapers/distributed.py): with a TASK_QUEUE_URL (redis://host:6379/0, or
+# sqlite:///path/to/tasks.db for launches on one machine only) every launch leases search URLs of one run from the queue:
+# run TASK_RUN_ID when set, else the run that still has URLs left, else a new run for this launch.
+# Leases expire TASK_LEASE_SECONDS after the last heartbeat, and a URL is tried at most TASK_MAX_ATTEMPTS times.
+TASK_QUEUE_URL = config["TASK_QUEUE_URL"]
+TASK_RUN_ID = config["TASK_RUN_ID"]
+TASK_LEASE_SECONDS = config["TASK_LEASE_SECONDS"]
+TASK_HEARTBEAT_SECONDS = config["TASK_HEARTBEAT_SECONDS"]
+TASK_MAX_ATTEMPTS = config["TASK_MAX_ATTEMPTS"]
+# redis://... to share seen jobs and company counts between machines (default: the TASK_QUEUE_URL when it is Redis, else SEEN_JOBS_DB_PATH)
+SEEN_JOBS_URL = config["SEEN_JOBS_URL"]
+
+# Stages of the scraping pipeline (scrapers/pipeline.py): MAX_CONTEXTS listing contexts,
+# SCORING_WORKERS batches in scoring at once, DETAIL_CONTEXTS contexts with
+# DETAIL_TABS_PER_CONTEXT tabs each for job detail pages, and one CSV writer.
+# The *_QUEUE_SIZE values bound the queues in front of each stage.
+DETAIL_TABS_PER_CONTEXT = config["DETAIL_TABS_PER_CONTEXT"]
+DETAIL_CONTEXTS = config["DETAIL_CONTEXTS"]
+SCORING_WORKERS = config["SCORING_WORKERS"]
+SCORING_QUEUE_SIZE = config["SCORING_QUEUE_SIZE"]
+DETAIL_QUEUE_SIZE = config["DETAIL_QUEUE_SIZE"]
+OUTPUT_QUEUE_SIZE = config["OUTPUT_QUEUE_SIZE"]
+
+# browser: open every job detail page in a tab
+# http: download and parse detail HTML, open a tab only on challenges or missing fields
+DETAIL_FETCH_MODE = config["DETAIL_FETCH_MODE"]
+HTTP_FETCH_TIMEOUT = 20
+
+# Which requests browser contexts block: minimal, stealth-safe or full (utils/resource_policy.py)
+RESOURCE_PROFILE = config["RESOURCE_PROFILE"]
 
+# Seconds between background internet probes (utils/connectivity.py)
+CONNECTIVITY_PROBE_INTERVAL = config["CONNECTIVITY_PROBE_INTERVAL"]
 
 
+# Explicit refresh: python -m config.config_input --refresh
+if REFRESH_ONLY:
+    logging.basicConfig(level=logging.INFO)
+    refresh_snapshot()
@@ -1,63 +1,82 @@
-import time
-import requests
+from utils.startup_timer import StartupTimer
+startup = StartupTimer()
 
-def check_internet():
-    test_sites = [
-        "https://1.1.1.1",
-        "https://www.cloudflare.com",
-        "https://example.com",
-        "https://www.bing.com"
-    ]
-    
-    for site in test_sites:
-        try:
-            response = requests.get(site, timeout=10)
-            if response.status_code == 200:
-                return True
-        except requests.RequestException:
-            pass    
-    return False
-
-# Wait until internet is available
-while not check_internet():
-    print("Check your internet connection...")
-    time.sleep(5)
-
-from scrapers.job_listings_scraper import jobs_lister
-import asyncio, time
-from utils import helper, sheet_uploader
-from config import config_input
+import asyncio
+with startup.step("import config"):
+    from config import config_input
+with startup.step("import helper, uploader"):
+    from utils import helper, sheet_uploader, run_report, task_queue, checkpoints
+with startup.step("import scrapers"):
+    from scrapers.job_listings_scraper import jobs_lister
+    from scrapers.sharding import run_sharded
+    from scrapers import distributed
 from utils.logger_setup import setup_logger
 
+
 if __name__ == "__main__":
                 
     logger = setup_logger()
 
+    # Prevent screen to sleep
+    sb = helper.SleepBlocker()
+
     try:
         logger.info("🚀 Project Acquirer AI started")
 
-        # Prevent screen to sleep
-        sb = helper.SleepBlocker()
         sb.prevent_sleep()
         
-        # Create first new workbook with three sheets for saving scraper result
-        helper.create_csv_files(config_input.CSV_FILES)
-        logger.info("✅ Fresh CSV files created")
+        # Distributed mode: join the queue's run that still has URLs left, or start a new one
+        queue = None
+        if config_input.TASK_QUEUE_URL:
+            with startup.step("join task queue"):
+                queue = task_queue.open_queue()
+                distributed.start_run(queue, config_input.jobs_listed_pages_urls)
+            run_report.register("Task queue", queue.summary)
 
-        # Clean the processed saved jobs file
-        helper.clean_processed_jobs_file()
-        logger.info("🧹 Processed jobs file cleaned")
+        # Resume the last run if it did not finish (worker processes pick it up too), else start a new one
+        with startup.step("open checkpoints"):
+            checkpoint_store = checkpoints.get_store(queue.run if queue else None)
+        logger.info(f"🔖 Checkpoint run {checkpoint_store.run}")
+
+        # Create first new workbook with three sheets for saving scraper result, a resumed run keeps its rows
+        if checkpoint_store.resumed:
+            logger.info("✅ Keeping CSV files of the resumed run")
+        else:
+            with startup.step("create csv files"):
+                helper.create_csv_files(config_input.CSV_FILES)
+            logger.info("✅ Fresh CSV files created")
+
+        # Evict stale jobs from the seen-jobs store
+        with startup.step("clean seen-jobs store"):
+            helper.clean_processed_jobs_store(reset_company_counts=not config_input.TASK_QUEUE_URL)
+        logger.info("🧹 Processed jobs store cleaned")
 
         # Create a debugging folder
         folder_path = "debugging_screenshots"
-        helper.create_debugging_screenshots_folder(folder_path)
+        with startup.step("debugging folder"):
+            helper.create_debugging_screenshots_folder(folder_path)
         logger.info("📁 Debugging folder ready")
 
-        # Jobs lister main function
-        asyncio.run(jobs_lister(config_input.jobs_listed_pages_urls))
+        startup.report(logger)
+
+        failed_shards = []
+        # Jobs lister main function: leased from a shared task queue, split across worker processes, or in one process
+        if queue:
+            asyncio.run(jobs_lister(config_input.jobs_listed_pages_urls, queue=queue))
+        elif config_input.WORKER_PROCESSES > 1:
+            failed_shards = run_sharded(config_input.jobs_listed_pages_urls, config_input.WORKER_PROCESSES)
+        else:
+            asyncio.run(jobs_lister(config_input.jobs_listed_pages_urls))
+        # A crashed shard leaves the run unfinished, so the next start resumes its URLs; in distributed mode
+        # the run is finished once the queue has no URLs left, so the next run's date cutoff starts from it
+        if failed_shards:
+            logger.warning(f"Keeping checkpoints of run {checkpoint_store.run}, failed: {', '.join(failed_shards)}")
+        elif not queue or not queue.pending():
+            checkpoint_store.finish_run()
         
         
         logger.info("🧭 jobs_lister() finished")
+        run_report.log_report()
 
         # After saving all scraper results, upload to Google Sheets
         helper.sort_csv_files_by_column(
@@ -0,0 +1,54 @@
+import os, socket, asyncio
+import logging
+from config import config_input
+from utils import seen_jobs
+
+# get the logger file for saving logs.
+logger = logging.getLogger("spider")
+
+
+def worker_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def start_run(queue, all_urls):
+    """Queue the run's search URLs; the machine that creates the run also resets the company counts."""
+    if queue.enqueue(all_urls):
+        seen_jobs.get_store().reset_company_counts()
+        logger.info(f"Created run {queue.run} with {len(all_urls)} search URLs")
+    else:
+        logger.info(f"Joined run {queue.run}, {queue.pending()} search URLs pending")
+
+
+async def _heartbeat(queue, task, worker, interval):
+    while True:
+        await asyncio.sleep(interval)
+        if not queue.heartbeat(task, worker):
+            logger.warning(f"Lease lost on {task.url}, another worker may take it over")
+            return
+
+
+""" This function lease search URLs from the shared queue and run them one by one, until the run has none left."""
+async def lease_loop(queue, worker, run_task, interval=config_input.TASK_HEARTBEAT_SECONDS):
+    while True:
+        task = queue.lease(worker)
+        if task is None:
+            # URLs leased by other workers may still come back if their lease expires
+            if not queue.pending():
+                return
+            await asyncio.sleep(interval)
+            continue
+
+        logger.info(f"{worker} leased {task.url}")
+        heartbeat = asyncio.create_task(_heartbeat(queue, task, worker, interval))
+        try:
+            await run_task(task.url, task.index)
+            queue.complete(task, worker)
+        except asyncio.CancelledError:
+            queue.release(task, worker)
+            raise
+        except Exception:
+            logger.exception(f"Task failed, returning it to the queue: {task.url}")
+            queue.release(task, worker)
+        finally:
+            heartbeat.cancel()
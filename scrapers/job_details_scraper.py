@@ -1,139 +1,158 @@
+import time
 from config import config_input
-from utils import sheet_uploader
 from utils.bypass.cloudflare import CloudflareBypasser
-from utils import helper
+from utils import helper, connectivity, extraction, http_fetcher, proxy_manager
 import logging
 
 # get logger file for saving spider logs.
 logger = logging.getLogger("spider")  # use shared logger
 
 
-""" This function are extracing all info about jobs and classifing and push for sumbiting processing."""
-async def extract_full_details(context, urls, percentages):
+FIXED_KEYS = [  "company_name", "url",    "matching_per",
+                "job_title",    "salary", "job_other_details",
+                "benefits",      "full_description"
+                ]
 
-    fixed_keys = [  "company_name", "url",    "matching_per",
-                    "job_title",    "salary", "job_other_details",
-                    "benefits",      "full_description"
-                    ]
 
-
-    easy_applies = []
-    cs_applies = []
-    c_applies = []
-    unclassified_jobs = []
-
-    tab2_page = await context.new_page()
+""" This function is one detail-stage worker: it takes (key, url, percentage) items until None and puts (key, (category, row) or None) for the output writer, calling on_done(url) once an item is handled."""
+async def detail_worker(context, jobs, results, on_done=None):
+    # The worker's own tab, opened on the first job that needs a browser.
+    tab = None
+    try:
+        while (item := await jobs.get()) is not None:
+            key, url, percentage = item
+            try:
+                full_url = f"https://indeed.com{url}"
+                fields = None
+                # HTTP first, the browser only when a challenge or missing field is detected
+                if config_input.DETAIL_FETCH_MODE == "http":
+                    fields = await http_fetcher.fetch_detail_fields(context, full_url)
+                if fields:
+                    result = classify_job(_new_job_data(full_url, percentage), fields)
+                else:
+                    if tab is None:
+                        tab = await context.new_page()
+                    result = await _extract_job(tab, url, percentage)
+            except Exception:
+                logger.exception(f"Detail extraction failed for {url}")
+                result = None
+
+            # Skipped jobs are reported too, the writer keeps rows in order by their keys
+            await results.put((key, result))
+            if on_done:
+                on_done(url)
+    finally:
+        if tab:
+            await tab.close()
+
+
+""" This function extract one job detail page in the given tab and return its (category, row) or None when skipped."""
+async def _extract_job(tab2_page, url, percentage):
+    # Before performing critical actions, wait (and reload) while internet is down
+    await connectivity.monitor.wait_online(tab2_page)
     
-        
-    for p_index, url in enumerate(urls):
-        # Before performing critical actions, check internet
-        if not await helper.check_internet():
-            await helper.wait_until_internet_is_back(tab2_page)
-        
-        full_url = f"https://indeed.com{url}"
-
-        # Navigating to page to extract complete info
+    full_url = f"https://indeed.com{url}"
+
+    # Navigating to page to extract complete info
+    context = tab2_page.context
+    try:
+        started = time.monotonic()
+        await tab2_page.goto(full_url, wait_until="load")
+        proxy_manager.manager.record(context, ok=True, latency=time.monotonic() - started)
+    except Exception as e:
+        proxy_manager.manager.record(context, ok=False)
         try:
+            await tab2_page.reload()
             await tab2_page.goto(full_url, wait_until="load")
         except Exception as e:
-            try:
-                await tab2_page.reload()
-                await tab2_page.goto(full_url, wait_until="load")
-            except Exception as e:
-                logger.info(f"Page not loaded after two tries: {e}")
-                continue
-        
-        # Simulate human behavior
-        await helper.simulate_human_behavior(tab2_page)
-
-        # Bypass if cloudflare appear
-        try:
-            cf_bypasser = CloudflareBypasser(tab2_page)
-            await cf_bypasser.detect_and_bypass()
-        except Exception as e:
-            logger.error(f"Captcha bypass failed: {e}")
-
+            proxy_manager.manager.record(context, ok=False)
+            logger.info(f"Page not loaded after two tries: {e}")
+            return None
     
-        job_data = {key: "" for key in fixed_keys}
-        job_data.update({
-            "url": full_url,
-            "matching_per": percentages[p_index]
-        })
-
-        try:
-            content = await tab2_page.content()
-            if any(keyword in content for keyword in config_input.AVIOD_JOBS):
-                logger.info(f"Clearance-related job skipped: {full_url}")
-                continue
-        except Exception as e:
-            logger.error(f"Error checking clearance: {e}")
-
-        try:
-            company_el = (await tab2_page.query_selector('[data-testid="company-name"]') or 
-                          await tab2_page.query_selector('[data-testid="inlineHeader-companyName"]'))
-            if company_el:
-                job_data["company_name"] = (await company_el.inner_text()).strip()
-            else:
-                logger.error(f"Failed to extract company name")
-                continue
-
-            title_el = await tab2_page.query_selector('[data-testid="jobsearch-JobInfoHeader-title"] span')
-            if title_el:
-                job_data["job_title"] = (await title_el.inner_text()).strip()
-            else:
-                logger.error(f"Failed to extract job title")
-                continue
-
-            salary_el = await tab2_page.query_selector('#salaryInfoAndJobType')
-            if salary_el:
-                job_data["salary"] = (await salary_el.inner_text()).strip()
-            else:
-                logger.info(f"Salary missing")
-
-            try:
-                el = await tab2_page.query_selector('[data-testid="jobsearch-CompanyInfoContainer"]')
-                if el:
-                    job_data["job_other_details"] = (await el.inner_text()).strip()
-            except:
-                logger.info(f"Job other details missing")
-
-            benefits_el = await tab2_page.query_selector('[data-testid="benefits-test"]')
-            if benefits_el:
-                job_data["benefits"] = (await benefits_el.inner_text()).strip()
-            else:
-                logger.info(f"Benefits missing")
-
-            desc_el = await tab2_page.query_selector('#jobDescriptionText')
-            if desc_el:
-                job_data["full_description"] = (await desc_el.inner_text()).strip()
-            else:
-                logger.info(f"[ERROR] Job description missing")
-
-        except Exception as e:
-            logger.error(f"Partial data extraction for {full_url}: {str(e)}")
-
-        row = [job_data[key] for key in fixed_keys]
+    # Simulate human behavior
+    await helper.simulate_human_behavior(tab2_page)
+
+    # Bypass if cloudflare appear
+    try:
+        cf_bypasser = CloudflareBypasser(tab2_page)
+        await cf_bypasser.detect_and_bypass()
+        if cf_bypasser.challenged:
+            proxy_manager.manager.record_challenge(context)
+    except Exception as e:
+        logger.error(f"Captcha bypass failed: {e}")
 
-        try:
-            if await tab2_page.query_selector(':has-text("This job has expired on Indeed")'):
-                logger.info(f"Expired job: {job_data['company_name']}")
-                continue
-
-            is_web_apply = bool(await tab2_page.query_selector(':has-text("Apply on company site")'))
-
-            if job_data["company_name"] in getattr(config_input, 'confirmation_companies', []):
-                c_applies.append(row)
-                logger.info(f"Confirmation job: {job_data['company_name']}")
-            elif is_web_apply:
-                cs_applies.append(row)
-                logger.info(f"Company site apply: {job_data ['company_name']}")
-            else:
-                easy_applies.append(row)
-                logger.info(f"Easy apply: {job_data['company_name']}")
-
-        except Exception as e:
-            unclassified_jobs.append(full_url)
-            logger.error(f"[ERROR] Unclassified job: {full_url} - {str(e)}")
-
-    await tab2_page.close()
-    await sheet_uploader.jobs_append_to_csv(easy_applies, cs_applies, c_applies)
+    
+    # Read every field of the page in one round trip
+    try:
+        fields = await tab2_page.evaluate(extraction.DETAIL_SCRIPT)
+    except Exception as e:
+        logger.error(f"Partial data extraction for {full_url}: {str(e)}")
+        return None
+
+    return classify_job(_new_job_data(full_url, percentage), fields)
+
+
+def _new_job_data(full_url, percentage):
+    job_data = {key: "" for key in FIXED_KEYS}
+    job_data.update({
+        "url": full_url,
+        "matching_per": percentage
+    })
+    return job_data
+
+
+""" This function fill job_data from the extracted fields and return its (category, row) or None when skipped."""
+def classify_job(job_data, fields):
+    full_url = job_data["url"]
+
+    if fields.get("avoid"):
+        logger.info(f"Clearance-related job skipped: {full_url}")
+        return None
+
+    if fields.get("company_name"):
+        job_data["company_name"] = fields["company_name"]
+    else:
+        logger.error(f"Failed to extract company name")
+        return None
+
+    if fields.get("job_title"):
+        job_data["job_title"] = fields["job_title"]
+    else:
+        logger.error(f"Failed to extract job title")
+        return None
+
+    if fields.get("salary"):
+        job_data["salary"] = fields["salary"]
+    else:
+        logger.info(f"Salary missing")
+
+    if fields.get("job_other_details"):
+        job_data["job_other_details"] = fields["job_other_details"]
+    else:
+        logger.info(f"Job other details missing")
+
+    if fields.get("benefits"):
+        job_data["benefits"] = fields["benefits"]
+    else:
+        logger.info(f"Benefits missing")
+
+    if fields.get("full_description"):
+        job_data["full_description"] = fields["full_description"]
+    else:
+        logger.info(f"[ERROR] Job description missing")
+
+    row = [job_data[key] for key in FIXED_KEYS]
+
+    if fields.get("expired"):
+        logger.info(f"Expired job: {job_data['company_name']}")
+        return None
+
+    if job_data["company_name"] in getattr(config_input, 'confirmation_companies', []):
+        logger.info(f"Confirmation job: {job_data['company_name']}")
+        return "confirmation", row
+    elif fields.get("company_site_apply"):
+        logger.info(f"Company site apply: {job_data ['company_name']}")
+        return "company_site", row
+    else:
+        logger.info(f"Easy apply: {job_data['company_name']}")
+        return "easy", row
@@ -1,249 +1,389 @@
-import asyncio, random, re, os
+import asyncio, random, os, time
+from collections import Counter
 from playwright_stealth import Stealth
 from playwright.async_api import async_playwright
 from datetime import datetime
 from config import config_input
 from utils.bypass.cloudflare import CloudflareBypasser
-from utils import accounts_loader, fingerprint_loader, proxies_loader, helper
-from .job_details_scraper import extract_full_details
+from utils import accounts_loader, fingerprint_loader, proxies_loader, helper, connectivity, extraction, resource_policy, scoring_service, llm_clients, run_report, seen_jobs, proxy_manager, checkpoints, pacing
+from utils.context_pool import ContextPool
+from .pipeline import Pipeline
+from . import distributed
 import logging
 
 
 # get the logger file for saving logs.
 logger = logging.getLogger("spider") 
 
-# Load all jobsd ids from previews processd jobs for avoid duplicate and create a new list for saving comapnies for avoid listing many jobs of one companies.
-processed_jobs_id = helper.load_processed_jobs_id()
-processed_new_company_jobs = []
+# Seen jobs and the jobs listed per company live in a shared store (utils/seen_jobs.py), so worker processes see each other's jobs.
 
-
-
-""" This function listing and push jobs for furthers processing."""
-async def _listing(context, job_page_url):
-    page = None
-    try:
-        # Create new page
-        page = await context.new_page()
-
-        # Before performing critical actions, check internet
-        if not await helper.check_internet():
-            await helper.wait_until_internet_is_back(page)
-        
-        # Navigate to jobs page
-        for attempt in range(3):
-            try:
-                await page.goto(job_page_url, wait_until="load")
-                await helper.handle_terms_cond_btn(page)
-                break  # Success: exit loop
-            except TimeoutError:
-                print(f"Attempt {attempt + 1} failed, retrying...")
-
-                # Format datetime to make it filename-safe
-                timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-                filename = f"screenshot_{timestamp}.png"
-                file_path = os.path.join(config_input.DEBUGGING_SCREENSHOTS_PATH, filename)
-
-                # Take a full-page screenshot
-                await page.screenshot(path=file_path, full_page=True)
-
-                # Wait before retrying
-                await asyncio.sleep(2)
-        
-        # Bypass cloudflare if appears
+# A results page is ready for extraction once any job card is on it, or Indeed's no-results message past the last page
+RESULT_CARDS = ", ".join(extraction.LISTING_CARD_SPEC["root"])
+NO_RESULTS = ".jobsearch-NoResult-messageContainer, [data-testid='jobsearch-NoResult']"
+
+# Why each search URL stopped paginating, for the run report
+cutoffs = Counter()
+
+
+""" This function decide whether an incremental crawl stops after this page, and return the reason or None."""
+def cutoff_reason(jobs, stale_pages, since):
+    if stale_pages >= config_input.INCREMENTAL_STALE_PAGES:
+        return "no unseen jobs"
+    # Results are not sorted by date, so only a page where every dated job is older counts
+    dates = [job["pub_date"] for job in jobs if job.get("pub_date")]
+    if since and dates and max(dates) < since * 1000:
+        return "jobs older than the last run"
+    return None
+
+
+def cutoff_summary():
+    return dict(cutoffs)
+
+
+
+class _SearchProgress:
+    """One search URL page by page: picks its new jobs, checkpoints them, queues scoring batches and decides the incremental cutoff."""
+
+    def __init__(self, url, pipeline):
+        self.url = url
+        self.pipeline = pipeline
+        self.store = pipeline.checkpoints
+        self.since = self.store.last_run_started if self.store else None
+        self.list_of_jobs = []
+        self.stale_pages = 0
+        self.pages = 0
+
+    async def add_page(self, pagination_number, jobs):
+        """Take the jobs of page `pagination_number`; returns why pagination stops after it, or None."""
+        self.pages += 1
+
+        # Record all links of this page in the seen-jobs store in one batch.
+        new_jobs_id = await helper.update_processed_jobs_links([job["link"] for job in jobs])
+
+        # Main loop that check jobs and push for futher process if they meet with criterias
+        page_jobs = []
+        for job in jobs:
+            company_name = job["company"] or ""
+
+            # Skip jobs if they meet with below critera
+            if (
+                job["jk"] not in new_jobs_id
+                or company_name in config_input.ignore_companies
+            ):
+                continue
+
+            # Count the job for its company (across every worker) and skip it when the company has enough jobs.
+            if not seen_jobs.get_store().count_company_job(company_name, config_input.PER_COMPANY_JOBS):
+                continue
+
+            # Append jobs for further processing.
+            page_jobs.append(job)
+
+        # The page and its jobs are checkpointed before any of them reaches the scoring stage
+        if self.store:
+            self.store.save_page(self.url, pagination_number, page_jobs)
+        self.list_of_jobs.extend(page_jobs)
+        logger.info(f"Collected {len(self.list_of_jobs)} jobs...")
+
+        # while list of jobs => batch size then hand a batch to the scoring stage and keep paginating
+        while len(self.list_of_jobs) >= config_input.PROCESS_BATCH_SIZE:
+            logger.info("Queueing batch for scoring...")
+            await self.pipeline.submit_batch(self.list_of_jobs[:config_input.PROCESS_BATCH_SIZE])
+            del self.list_of_jobs[:config_input.PROCESS_BATCH_SIZE]
+
+        # Incremental crawl: stop once the search only shows jobs seen before
+        self.stale_pages = 0 if new_jobs_id else self.stale_pages + 1
+        reason = config_input.INCREMENTAL_CRAWL and cutoff_reason(jobs, self.stale_pages, self.since)
+        if reason:
+            logger.info(f"Stopping {self.url} after page {pagination_number}: {reason}")
+            self.finish(reason)
+        return reason or None
+
+    def finish(self, reason):
+        cutoffs[reason] += 1
+        if self.store:
+            self.store.finish_url(self.url, reason)
+
+    async def flush(self):
+        # if list of jobs contain jobs push that for furthers process.
+        if self.list_of_jobs:
+            await self.pipeline.submit_batch(self.list_of_jobs)
+            self.list_of_jobs = []
+
+
+""" This function open a search results page in the tab (three tries), accept the terms if asked and bypass cloudflare, and return whether it was challenged."""
+async def _open_results(context, page, url, accept_terms=True):
+    # Before performing critical actions, wait while the shared monitor reports no internet
+    await connectivity.monitor.wait_online()
+
+    # Navigate to jobs page
+    for attempt in range(3):
         try:
-            cf_bypasser = CloudflareBypasser(page)
-            await cf_bypasser.detect_and_bypass()
-        except Exception as e:
-            logger.error(f"Captcha error: {e}")
-        
+            started = time.monotonic()
+            await page.goto(url, wait_until="load")
+            proxy_manager.manager.record(context, ok=True, latency=time.monotonic() - started)
+            if accept_terms:
+                await helper.handle_terms_cond_btn(page)
+            break  # Success: exit loop
+        except Exception:
+            # Playwright's TimeoutError is not the builtin one, so any navigation error counts against the proxy
+            proxy_manager.manager.record(context, ok=False)
+            print(f"Attempt {attempt + 1} failed, retrying...")
+
+            # Format datetime to make it filename-safe
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            filename = f"screenshot_{timestamp}.png"
+            file_path = os.path.join(config_input.DEBUGGING_SCREENSHOTS_PATH, filename)
+
+            # Take a full-page screenshot
+            await page.screenshot(path=file_path, full_page=True)
+
+            # Wait before retrying
+            await asyncio.sleep(2)
+    else:
+        raise RuntimeError(f"Could not load {url} after 3 attempts")
+
+    # Bypass cloudflare if appears
+    challenged = False
+    try:
+        cf_bypasser = CloudflareBypasser(page)
+        await cf_bypasser.detect_and_bypass()
+        challenged = cf_bypasser.challenged
+        if challenged:
+            proxy_manager.manager.record_challenge(context)
+    except Exception as e:
+        logger.error(f"Captcha error: {e}")
+    return challenged
 
-        # Temporary save extract data
-        list_of_processed_jobs = []
-        list_of_titles = []
-        list_of_links = []
-        pagination_number = 1
 
-        while True:
-            # Before performing critical actions, check internet
-            if not await helper.check_internet():
-                await helper.wait_until_internet_is_back(page)
+""" This function wait until the results page in the tab is ready and return its jobs."""
+async def _read_jobs(page, challenged=False):
+    # Before performing critical actions, wait (and reload) while internet is down
+    await connectivity.monitor.wait_online(page)
 
+    # Wait until the result cards (or the no-results message) are there, then a jitter that follows the challenge rate
+    ready = await pacing.controller.page_ready(page, f"{RESULT_CARDS}, {NO_RESULTS}", challenged)
+    if challenged and not ready:
+        raise RuntimeError(f"Still blocked after the challenge: {page.url}")
 
-            # wait rondomly to load page.
-            try:
-                await page.wait_for_timeout(random.randint(3000, 10000))
-            except Exception as e:
-                pass
+    # function that simulate human behavior on page like click, scrolling and so on.
+    await helper.simulate_human_behavior(page)
 
-            # wait randomly to make simulate human behavior.
-            await asyncio.sleep(config_input.RANDOM_SLEEP)
-            
-            # function that simulate human behavior on page like click, scrolling and so on.
-            await helper.simulate_human_behavior(page)
+    # Read every job of this page (embedded JSON first, job cards as fallback) in one round trip
+    return await extraction.extract_listing_jobs(page)
 
-            # Selector to select titles, companies, links of jobs
-            try:
-                titles_task = page.query_selector_all(".jobTitle")
-                companies_task = page.query_selector_all("[data-testid='company-name']")
-                links_task = page.query_selector_all("tr td a")
-                titles, companies, links = await asyncio.gather(titles_task, companies_task, links_task)
 
-            except Exception as e:
-                logger.error(f"Selector issue: {e}")
-                break
+""" This function paginate by clicking the numbered pagination buttons in one tab."""
+async def _paginate_by_click(context, page, progress, first_page):
+    challenged = await _open_results(context, page, helper.page_url(progress.url, first_page))
+    pagination_number = first_page
 
-            # Main loop that check jobs and push for futher process if they meet with criterias
-            for title, company, link in zip(titles, companies, links):
-                link = await link.get_attribute("href")
-                
-                if not link:
-                    continue
-
-                # Append processed to txt file and get jobs id.
-                list_of_processed_jobs.append(link)
-                job_id = await helper.get_job_id(link)
-                if not job_id:
-                    logger.warning("Failed to extract job id!")
-                    continue
-                
-                # Extract title and company name in text format.
-                title_text = await title.inner_text()
-                company_name = await company.inner_text()
-
-                # Count the company how many jobs are listed of there.
-                count = processed_new_company_jobs.count(company_name)
-                
-                # Skip jobs if they meet with below critera
-                if (
-                    count > config_input.PER_COMPANY_JOBS
-                    or job_id in processed_jobs_id
-                    or company_name in config_input.ignore_companies
-                ):
-                    continue
-
-                # Append jobs ids and companies name for avoid duplicate.
-                processed_jobs_id.add(job_id)
-                processed_new_company_jobs.append(company_name)
-
-                # Append titles and jobs links for further processing.
-                list_of_titles.append(title_text)
-                list_of_links.append(link)
-
-                # Pring and save logs when collect clear 5 jobs
-                if len(list_of_titles) % 5 == 0:
-                    logger.info(f"Collected {len(list_of_titles)} jobs...")
-
-                # if list of title => batch size then processd and submit application
-                if len(list_of_titles) >= config_input.PROCESS_BATCH_SIZE:
-                    logger.info("Processing batch...")
-                    await process_batch(context, list_of_titles, list_of_links)
-                    list_of_titles.clear()
-                    list_of_links.clear()
-                    # saving the processed jobs links in text file and clear list.
-                    await helper.update_processed_jobs_links(list_of_processed_jobs)
-                    list_of_processed_jobs.clear()
-
-            # Click on pagination
-            try:
-                button_locator = page.locator(f"[data-testid='pagination-page-{pagination_number + 1}']")
-                if await button_locator.is_visible(timeout=10000):
-                    await button_locator.click(timeout=10000)
-                    pagination_number += 1
-                else:
-                    filename = f"screenshot_{pagination_number}.png"
-                    file_path = os.path.join(config_input.DEBUGGING_SCREENSHOTS_PATH, filename)
-                    await page.screenshot(path=file_path, full_page=True)
-                    logger.info(f"No more pages. Screenshot saved: {file_path}")
-                    break
-            except Exception as e:
-                logger.warning(f"Failed to click page {pagination_number + 1}: {e}")
-                break
-        
-        # if list of titles contain titles push that for furthers process.
-        if list_of_titles:
-            await process_batch(context, list_of_titles, list_of_links)
-            # saving the processed jobs links in text file and clear list
-            await helper.update_processed_jobs_links(list_of_processed_jobs)
-            list_of_processed_jobs.clear()
-    
-    except Exception:
-        logger.exception("Error in _listing")
-    finally:
+    while True:
         try:
-            if page:
-                await page.close()
-            await context.close()
-            logger.debug("Context closed")
+            jobs = await _read_jobs(page, challenged)
         except Exception as e:
-            logger.error(f"Context close issue: {e}")
-
-
-""" This function process batch with AI and push the matched jobs for submits application."""
-async def process_batch(context, list_of_titles, list_of_links):
+            logger.error(f"Selector issue: {e}")
+            break
+        challenged = False
 
-# Prompt var contian ai_prompt, resume, and extracted jobs titles for get matching matching percengates.
-    prompt = f"""{config_input.AI_PROMPT}\n
-{config_input.RESUME}\n
-Jobs Titles:
-{list_of_titles}
+        if await progress.add_page(pagination_number, jobs):
+            break
 
-
-    """
+        # Click on pagination
+        try:
+            button_locator = page.locator(f"[data-testid='pagination-page-{pagination_number + 1}']")
+            if await button_locator.is_visible(timeout=10000):
+                await button_locator.click(timeout=10000)
+                pagination_number += 1
+            else:
+                filename = f"screenshot_{pagination_number}.png"
+                file_path = os.path.join(config_input.DEBUGGING_SCREENSHOTS_PATH, filename)
+                await page.screenshot(path=file_path, full_page=True)
+                logger.info(f"No more pages. Screenshot saved: {file_path}")
+                progress.finish("last page")
+                break
+        except Exception as e:
+            logger.warning(f"Failed to click page {pagination_number + 1}: {e}")
+            break
+
+
+""" This function paginate by opening the start= page URLs, a wave of len(tabs) pages at a time, and take their jobs in page order."""
+async def _paginate_by_url(context, tabs, progress, first_page):
+    async def fetch(tab, pagination_number):
+        # The terms banner can only show on the first page a search opens
+        url = helper.page_url(progress.url, pagination_number)
+        challenged = await _open_results(context, tab, url, accept_terms=pagination_number == first_page)
+        return await _read_jobs(tab, challenged)
+
+    pagination_number, previous_keys = first_page, None
+    while True:
+        numbers = range(pagination_number, pagination_number + len(tabs))
+        results = await asyncio.gather(*(fetch(tab, number) for tab, number in zip(tabs, numbers)), return_exceptions=True)
+
+        # Pages are taken in order, so checkpoints and the incremental cutoff see them as in a single tab
+        for number, jobs in zip(numbers, results):
+            if isinstance(jobs, Exception):
+                logger.warning(f"Failed to read page {number} of {progress.url}: {jobs}")
+                return
+            # Past the last page Indeed shows no results or the last page again
+            keys = {job["jk"] for job in jobs}
+            if not keys or keys == previous_keys:
+                logger.info(f"No more pages after page {number - 1} of {progress.url}")
+                progress.finish("last page")
+                return
+            previous_keys = keys
+            if await progress.add_page(number, jobs):
+                return
+        pagination_number += len(tabs)
+
+
+""" This function listing and push jobs for furthers processing (resuming from its checkpoint), and return (pages visited, JS heap bytes) for the context pool."""
+async def _listing(context, job_page_url, pipeline):
+    tabs = []
+    heap_bytes = 0
+    store = pipeline.checkpoints
+    progress = _SearchProgress(job_page_url, pipeline)
     try:
-        # Get the matching percentage of each jobs base with provided resume/
-        model_response = await helper.get_match_percentage(prompt)
-        matching_percentages = re.findall(r'\b\d+\b', model_response)
-        matching_percentages = list(map(int, matching_percentages))
-
-        # Save those jobs links which are matching with our criterias
-        links_list = []
-        percentages = []
-
-        # Extract only those jobs links which matching with required percentage
-        for percentage, link in zip(matching_percentages, list_of_links):
-            if percentage >= config_input.MATCHING_PERCENTAGE:
-                links_list.append(link)
-                percentages.append(percentage)
-
-        # if jobs extract then submit application to that jobs
-        if links_list:
-            await extract_full_details(context, links_list, percentages)
+        # Work a crashed run left behind for this search goes first, then pagination resumes after the last page done
+        last_page = 0
+        if store:
+            last_page, finished, pending_jobs, pending_matches = store.resume(job_page_url)
+            if pending_jobs or pending_matches or last_page:
+                logger.info(f"Resuming {job_page_url} after page {last_page}: {len(pending_jobs)} jobs to score, {len(pending_matches)} to extract")
+            await pipeline.submit_matches(pending_matches)
+            for start in range(0, len(pending_jobs), config_input.PROCESS_BATCH_SIZE):
+                await pipeline.submit_batch(pending_jobs[start:start + config_input.PROCESS_BATCH_SIZE])
+            if finished:
+                return 0, heap_bytes
+
+        # Create new tabs, several per search when pages are opened by URL
+        tab_count = config_input.PAGES_PER_SEARCH if config_input.PAGINATION_MODE == "url" else 1
+        for _ in range(max(tab_count, 1)):
+            tabs.append(await context.new_page())
+
+        if config_input.PAGINATION_MODE == "url":
+            await _paginate_by_url(context, tabs, progress, last_page + 1)
+        else:
+            await _paginate_by_click(context, tabs[0], progress, last_page + 1)
+        await progress.flush()
 
     except Exception:
-        logger.exception("Batch processing failed")
-        await context.close()
+        logger.exception("Error in _listing")
+    finally:
+        # The context stays open for the next search URL, only the tabs are closed
+        for tab in tabs:
+            try:
+                heap = await tab.evaluate("performance.memory ? performance.memory.usedJSHeapSize : 0")
+                heap_bytes = max(heap_bytes, heap)
+                await tab.close()
+            except Exception as e:
+                logger.error(f"Page close issue: {e}")
+    return progress.pages, heap_bytes
 
 
 """ This function are calling listing helper function many time for listing jobs. with seperated things, like: proxies, fingerprint so on."""
-async def jobs_lister(all_urls):
-    proxies = await proxies_loader.load_proxies()
+async def jobs_lister(all_urls, first_index=0, detail_first_index=None, queue=None):
+    # With a task queue (distributed mode) the search URLs are leased from it instead of taken from all_urls
+    # Identity (proxy, fingerprint, account) indexes: MAX_CONTEXTS listing contexts from first_index, detail contexts after them
+    if detail_first_index is None:
+        detail_first_index = first_index + config_input.MAX_CONTEXTS
+    proxy_manager.manager.load(await proxies_loader.load_proxies())
+    run_report.register("Proxies", proxy_manager.manager.summary)
     accounts = await accounts_loader.load_accounts()
 
-    async with Stealth().use_async(async_playwright()) as p:
-        browser = await p.chromium.launch(headless=config_input.headless)
+    # One shared connectivity probe for every context
+    await connectivity.monitor.start()
 
-        semaphore = asyncio.Semaphore(config_input.MAX_CONTEXTS)  # 5 limit concurrent contexts
+    try:
+        async with Stealth().use_async(async_playwright()) as p:
+            browser = await p.chromium.launch(headless=config_input.headless)
+
+            # Each identity keeps its proxy while that proxy stays healthy
+            identity_proxies = {}
 
-        async def worker(job_page_url, index):
-            async with semaphore:
+            async def new_context(index, storage_state=None):
+                proxy = proxy_manager.manager.acquire(preferred=identity_proxies.get(index))
+                try:
+                    context = await browser.new_context(proxy=proxy, storage_state=storage_state)
+                except Exception:
+                    # No context to detach from, so the proxy's load is handed back here
+                    proxy_manager.manager.release(proxy)
+                    raise
+                if proxy:
+                    identity_proxies[index] = proxy_manager.ProxyManager.key(proxy)
+                proxy_manager.manager.attach(context, proxy)
+                context.on("close", lambda _: proxy_manager.manager.detach(context))
+                context.on("response", lambda response: proxy_manager.manager.add_bytes(context, response.headers.get("content-length")))
                 try:
-                    context = await browser.new_context(proxy=proxies[index % len(proxies)])
+                    await resource_policy.apply_resource_policy(context)
                     script = await fingerprint_loader.load_fingerprint(index)
-                    await context.add_init_script(script=script)
-
-                    try:
-                        await context.add_cookies(accounts[index % len(accounts)])
-                    except:
-                        await context.add_cookies(random.choice(accounts))
-
-                    await _listing(context, job_page_url)
+                    if script:
+                        await context.add_init_script(script=script)
+
+                    # A restored storage state already carries the account's cookies
+                    if storage_state is None:
+                        try:
+                            await context.add_cookies(accounts[index % len(accounts)])
+                        except:
+                            await context.add_cookies(random.choice(accounts))
+                except Exception:
+                    # Closing detaches the proxy too
+                    await context.close()
+                    raise
+                return context
+
+            # Warm listing contexts, one per concurrent slot, reused across search URLs
+            pool = ContextPool(new_context, range(first_index, first_index + config_input.MAX_CONTEXTS))
+            run_report.register("Browser contexts", pool.summary)
+
+            pipeline = Pipeline(
+                lambda index: pool.open(detail_first_index + index),
+                close_context=lambda index, context: pool.retire(detail_first_index + index),
+                checkpoints=checkpoints.get_store(),
+            )
+            run_report.register("Pipeline", pipeline.summary)
+            run_report.register("Checkpoints", pipeline.checkpoints.summary)
+            run_report.register("Pagination cutoffs", cutoff_summary)
+            run_report.register("Pacing", pacing.controller.summary)
+
+            # Leased tasks pass their JobUrls index too; identities now belong to the pool slots
+            async def worker(job_page_url, index=None):
+                # A context that cannot be built (proxy, cookies, fingerprint) skips this URL, not the whole run
+                try:
+                    slot, context = await pool.acquire()
+                except Exception as e:
+                    logger.exception(f"Context creation failed for {job_page_url}: {e}")
+                    # A leased URL goes back to the queue for another try
+                    if queue is not None:
+                        raise
+                    return
+                pages, heap_bytes = 0, 0
+                try:
+                    pages, heap_bytes = await _listing(context, job_page_url, pipeline)
+                    # A context whose proxy got quarantined is rebuilt on another proxy
+                    if not proxy_manager.manager.context_healthy(context):
+                        await pool.retire(slot)
                 except Exception as e:
                     logger.exception(f"Context/Listing failed for {job_page_url}: {e}")
+                    await pool.retire(slot)
+                finally:
+                    await pool.release(slot, pages, heap_bytes)
+
+            if queue is None:
+                listings = [worker(url) for url in all_urls]
+            else:
+                listings = [
+                    distributed.lease_loop(queue, f"{distributed.worker_name()}-{slot}", worker)
+                    for slot in range(config_input.MAX_CONTEXTS)
+                ]
+            try:
+                await pipeline.run(listings)
+            finally:
+                await pool.close()
 
-        tasks = []
-        for index, url in enumerate(all_urls):
-            tasks.append(asyncio.create_task(worker(url, index)))
-
-        await asyncio.gather(*tasks)
-
-        await browser.close()
+            await browser.close()
+    finally:
+        await scoring_service.get_service().stop()
+        await llm_clients.close()
+        await connectivity.monitor.stop()
+        proxy_manager.manager.save()
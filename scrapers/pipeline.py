@@ -0,0 +1,204 @@
+import asyncio
+import logging
+from config import config_input
+from utils import sheet_uploader, scoring_service, prefilter
+from .job_details_scraper import detail_worker
+
+# get the logger file for saving logs.
+logger = logging.getLogger("spider")
+
+
+class StageQueue(asyncio.Queue):
+    """Bounded queue between two stages that records its depth on every put.
+
+    `blocked` counts puts that had to wait for room, i.e. how often the next stage held producers back.
+    """
+
+    def __init__(self, name, maxsize):
+        super().__init__(maxsize)
+        self.name = name
+        self.items = 0
+        self.blocked = 0
+        self.max_depth = 0
+        self.depth_total = 0
+
+    async def put(self, item):
+        if self.full():
+            self.blocked += 1
+        await super().put(item)
+        # None is the end-of-stream marker, not work
+        if item is not None:
+            self.items += 1
+            self.max_depth = max(self.max_depth, self.qsize())
+            self.depth_total += self.qsize()
+
+    def summary(self):
+        average = self.depth_total / self.items if self.items else 0
+        return f"{self.items} items, depth avg {average:.1f} / max {self.max_depth} of {self.maxsize}, producers blocked {self.blocked}x"
+
+
+""" This function score one listing batch and return the (link, percentage) pairs that match."""
+async def score_batch(list_of_jobs):
+    # Obvious misses never reach the AI
+    if config_input.PREFILTER_ENABLED:
+        list_of_jobs = prefilter.get_prefilter().filter(list_of_jobs)
+        if not list_of_jobs:
+            return []
+
+    # Titles go to the shared scoring service, which serves cached scores and batches the rest with other workers.
+    scores = await scoring_service.get_service().score_many([(job["jk"], job["title"]) for job in list_of_jobs])
+
+    # Extract only those jobs links which matching with required percentage
+    matches = []
+    for job in list_of_jobs:
+        percentage = scores.get(job["title"])
+        if percentage is not None and percentage >= config_input.MATCHING_PERCENTAGE:
+            matches.append((job["link"], percentage))
+    return matches
+
+
+class Pipeline:
+    """listing → scoring → details → output, connected by bounded queues.
+
+    Listing workers hand batches to `submit_batch` and go on paginating; scoring
+    workers, detail contexts and the single CSV writer run concurrently. A full
+    queue blocks its producers, so no stage runs far ahead of the next one.
+    Every match carries (batch number, position in its batch), and the writer
+    holds rows back until the batches before theirs are written, so the CSV
+    order is the order batches were submitted in, not the order stages finish.
+    """
+
+    def __init__(self, new_context, scoring_workers=config_input.SCORING_WORKERS,
+                 detail_contexts=config_input.DETAIL_CONTEXTS, tabs_per_context=config_input.DETAIL_TABS_PER_CONTEXT,
+                 close_context=None, checkpoints=None):
+        self.new_context = new_context
+        self.close_context = close_context or (lambda index, context: context.close())
+        self.scoring_workers = scoring_workers
+        self.detail_contexts = detail_contexts
+        self.tabs_per_context = tabs_per_context
+        self.batches = StageQueue("scoring", config_input.SCORING_QUEUE_SIZE)
+        self.details = StageQueue("details", config_input.DETAIL_QUEUE_SIZE)
+        self.results = StageQueue("output", config_input.OUTPUT_QUEUE_SIZE)
+        self.rows_written = 0
+        self.live_contexts = detail_contexts
+        # CheckpointStore (utils/checkpoints.py) that tracks jobs until their stage is done with them
+        self.checkpoints = checkpoints
+        # Reorder buffer: matches per scored batch number, results received per batch, next batch to write
+        self._batch_count = 0
+        self._expected = {}
+        self._received = {}
+        self._next_batch = 0
+
+    def _new_batch(self):
+        self._batch_count += 1
+        return self._batch_count - 1
+
+    async def submit_batch(self, list_of_jobs):
+        """Queue a listing batch for scoring; waits while the scoring stage is backed up."""
+        await self.batches.put((self._new_batch(), list(list_of_jobs)))
+
+    async def submit_matches(self, matches):
+        """Queue (link, percentage) matches that were scored before, straight for extraction."""
+        await self._queue_matches(self._new_batch(), matches)
+
+    async def _queue_matches(self, number, matches):
+        self._expected[number] = len(matches)
+        for position, (link, percentage) in enumerate(matches):
+            await self.details.put(((number, position), link, percentage))
+
+    def _extracted(self, link):
+        if self.checkpoints:
+            self.checkpoints.extracted(link)
+
+    async def _score_worker(self):
+        while (item := await self.batches.get()) is not None:
+            number, batch = item
+            matches = []
+            try:
+                matches = await score_batch(batch)
+                if self.checkpoints:
+                    self.checkpoints.scored(batch, matches)
+            except Exception:
+                logger.exception("Batch processing failed")
+            # A failed batch still reports its (zero) matches, so the writer does not wait for it
+            await self._queue_matches(number, matches)
+
+    async def _detail_context(self, index):
+        context = None
+        try:
+            context = await self.new_context(index)
+            await asyncio.gather(*(detail_worker(context, self.details, self.results, self._extracted) for _ in range(self.tabs_per_context)))
+        except Exception:
+            logger.exception("Detail context failed")
+            self.live_contexts -= 1
+            # Without any detail context left, keep draining so the scoring stage never blocks
+            if not self.live_contexts:
+                while await self.details.get() is not None:
+                    pass
+        finally:
+            if context:
+                await self.close_context(index, context)
+
+    def _ready_rows(self, everything=False):
+        """Rows of the batches that are complete, in batch order; `everything` once no more results will come."""
+        rows = []
+        while self._received or self._next_batch in self._expected:
+            number = self._next_batch
+            received = self._received.get(number, {})
+            if not everything and len(received) < self._expected.get(number, len(received) + 1):
+                break
+            rows += [received[position] for position in sorted(received)]
+            self._received.pop(number, None)
+            self._expected.pop(number, None)
+            self._next_batch += 1
+        # Skipped jobs leave None in their place
+        return [row for row in rows if row]
+
+    async def _writer(self):
+        done = False
+        while not done:
+            # Take everything that is already waiting, then write the rows that are next in order in one append
+            batch = [await self.results.get()]
+            while not self.results.empty():
+                batch.append(self.results.get_nowait())
+            done = None in batch
+            for (number, position), result in filter(None, batch):
+                self._received.setdefault(number, {})[position] = result
+            rows = self._ready_rows(everything=done)
+            if not rows:
+                continue
+
+            easy_applies, cs_applies, c_applies = [], [], []
+            for category, row in rows:
+                if category == "confirmation":
+                    c_applies.append(row)
+                elif category == "company_site":
+                    cs_applies.append(row)
+                else:
+                    easy_applies.append(row)
+            await sheet_uploader.jobs_append_to_csv(easy_applies, cs_applies, c_applies)
+            self.rows_written += len(rows)
+
+    async def run(self, listings):
+        """Run the listing coroutines through every stage and return when the last row is written."""
+        writer = asyncio.create_task(self._writer())
+        detail_tasks = [asyncio.create_task(self._detail_context(index)) for index in range(self.detail_contexts)]
+        score_tasks = [asyncio.create_task(self._score_worker()) for _ in range(self.scoring_workers)]
+
+        # Each stage gets one end marker per consumer once its producers are done
+        try:
+            await asyncio.gather(*listings)
+        finally:
+            for _ in score_tasks:
+                await self.batches.put(None)
+            await asyncio.gather(*score_tasks)
+            for _ in range(self.detail_contexts * self.tabs_per_context):
+                await self.details.put(None)
+            await asyncio.gather(*detail_tasks)
+            await self.results.put(None)
+            await writer
+
+    def summary(self):
+        values = {queue.name: queue.summary() for queue in (self.batches, self.details, self.results)}
+        values["rows written"] = self.rows_written
+        return values
@@ -0,0 +1,136 @@
+import os, sys, json, shutil, asyncio
+import logging, logging.handlers
+import multiprocessing
+from config import config_input
+from utils import run_report
+
+# get the logger file for saving logs.
+logger = logging.getLogger("spider")
+
+
+def shard_urls(all_urls, workers):
+    """Split the search URLs into at most `workers` contiguous shards."""
+    size, extra = divmod(len(all_urls), workers)
+    shards, start = [], 0
+    for shard in range(workers):
+        end = start + size + (shard < extra)
+        if end > start:
+            shards.append(all_urls[start:end])
+        start = end
+    return shards
+
+
+def shard_dir(shard):
+    return os.path.join(config_input.OUTPUT_DIR, "shards", f"shard-{shard}")
+
+
+def report_path(shard, output_dir=None):
+    """Run report of a worker process, next to (not in) its output folder so it is not merged as a CSV."""
+    return os.path.join(output_dir or config_input.OUTPUT_DIR, "shards", f"report-{shard}.json")
+
+
+def _worker_main(shard, first_index, urls, detail_first_index, workers, log_queue):
+    """Entry point of one worker process: its own event loop, browser and output folder."""
+    # Every record goes to the parent, which writes the one spider.log
+    root = logging.getLogger()
+    root.handlers = []
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.setFormatter(logging.Formatter(f"[shard {shard}] %(message)s"))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+    from utils import helper, rate_limit, checkpoints
+    from scrapers.job_listings_scraper import jobs_lister
+
+    output_dir = config_input.OUTPUT_DIR
+    config_input.OUTPUT_DIR = shard_dir(shard)
+    # The parent started (or resumed) the run; rows a crashed run left in the shard folder are kept
+    if not (checkpoints.get_store().resumed and os.path.isdir(config_input.OUTPUT_DIR)):
+        helper.create_csv_files(config_input.CSV_FILES)
+
+    # The AI accounts are shared, so each process gets its part of the limits
+    for limiter in rate_limit.limiters.values():
+        limiter.share(workers)
+
+    try:
+        asyncio.run(jobs_lister(urls, first_index, detail_first_index))
+    except Exception:
+        logger.exception("Worker process failed")
+        # A non-zero exit code tells the parent to keep the run's checkpoints
+        exit_code = 1
+    else:
+        exit_code = 0
+    finally:
+        # The counters live in this process, so the parent logs them from this file
+        os.makedirs(os.path.dirname(report_path(shard, output_dir)), exist_ok=True)
+        with open(report_path(shard, output_dir), "w", encoding="utf-8") as f:
+            json.dump(run_report.collect(), f, default=str)
+    sys.exit(exit_code)
+
+
+def merge_reports(shards):
+    """Hand the run reports of the worker processes to this process's report."""
+    reports = []
+    for shard in shards:
+        try:
+            with open(report_path(shard), encoding="utf-8") as f:
+                reports.append(json.load(f))
+        except (OSError, ValueError):
+            logger.warning(f"No run report from shard-{shard}")
+    run_report.merge(reports)
+
+
+def merge_outputs(shards):
+    """Append every shard's CSV rows to the files in OUTPUT_DIR and remove the shard folders."""
+    for shard in shards:
+        folder = shard_dir(shard)
+        if not os.path.isdir(folder):
+            continue
+        for file_name in sorted(os.listdir(folder)):
+            with open(os.path.join(folder, file_name), "rb") as source, \
+                    open(os.path.join(config_input.OUTPUT_DIR, file_name), "ab") as target:
+                shutil.copyfileobj(source, target)
+    shutil.rmtree(os.path.join(config_input.OUTPUT_DIR, "shards"), ignore_errors=True)
+
+
+def run_sharded(all_urls, workers=config_input.WORKER_PROCESSES):
+    """Run jobs_lister in `workers` processes, each on its share of the search URLs, and return the names of the failed ones.
+
+    Seen jobs, company counts and the score cache are shared through their SQLite
+    files; logs are forwarded to this process, run reports and CSV outputs merged at the end.
+    """
+    shards = shard_urls(all_urls, workers)
+    context = multiprocessing.get_context("spawn")
+    log_queue = context.Queue()
+    listener = logging.handlers.QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+    listener.start()
+
+    # Children read the config snapshot only; the parent already refreshed it
+    os.environ["CONFIG_REFRESH"] = "never"
+
+    processes = []
+    for shard, urls in enumerate(shards):
+        # Every shard gets its own listing and detail identities, so no two processes share a storage state
+        first_index = shard * config_input.MAX_CONTEXTS
+        detail_first_index = len(shards) * config_input.MAX_CONTEXTS + shard * config_input.DETAIL_CONTEXTS
+        process = context.Process(
+            target=_worker_main,
+            args=(shard, first_index, urls, detail_first_index, len(shards), log_queue),
+            name=f"shard-{shard}",
+        )
+        process.start()
+        processes.append(process)
+    logger.info(f"Started {len(processes)} worker processes for {len(all_urls)} search URLs")
+
+    failed = []
+    try:
+        for process in processes:
+            process.join()
+            if process.exitcode:
+                logger.error(f"{process.name} exited with code {process.exitcode}")
+                failed.append(process.name)
+    finally:
+        listener.stop()
+        merge_reports(range(len(shards)))
+        merge_outputs(range(len(shards)))
+    return failed
@@ -0,0 +1,16 @@
+import os
+import pytest
+
+# Tests read the config from the local snapshot (or defaults) and never call the Sheets API.
+os.environ.setdefault("CONFIG_REFRESH", "never")
+
+
+@pytest.fixture
+def redis_url(monkeypatch):
+    """A redis:// URL served by fakeredis (with Lua), shared by every client the test opens."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    import redis
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, "from_url", lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs))
+    return "redis://localhost:6379/0"
@@ -0,0 +1,79 @@
+from utils.checkpoints import CheckpointStore, RedisCheckpointStore
+import pytest
+
+URL = "https://www.indeed.com/jobs?q=python"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    store.begin_run()
+    yield store
+    store.close()
+
+def job(jk):
+    return {"jk": jk, "link": f"/rc/clk?jk={jk}", "title": "Python Dev", "company": "Acme"}
+
+# Pages and their jobs are kept until scoring and extraction are done with them
+def test_pending_work_follows_the_stages(store):
+    store.save_page(URL, 1, [job("a"), job("b")])
+    store.save_page(URL, 2, [job("c")])
+    assert store.resume(URL) == (2, False, [job("a"), job("b"), job("c")], [])
+
+    store.scored([job("a"), job("b")], [("/rc/clk?jk=a", 90)])
+    page, done, jobs, matches = store.resume(URL)
+    assert jobs == [job("c")] and matches == [("/rc/clk?jk=a", 90)]
+
+    store.extracted("/rc/clk?jk=a")
+    store.finish_url(URL)
+    assert store.resume(URL) == (2, True, [job("c")], [])
+
+# A run that did not finish is resumed; a finished one drops its pages but keeps pending jobs
+def test_unfinished_run_is_resumed(store, tmp_path):
+    store.save_page(URL, 3, [job("a")])
+
+    again = CheckpointStore(store.db_path)
+    assert again.begin_run() == store.run and again.resumed
+    assert again.resume(URL)[0] == 3
+
+    again.finish_run()
+    fresh = CheckpointStore(store.db_path)
+    fresh.begin_run()
+    assert not fresh.resumed
+    assert fresh.resume(URL) == (0, False, [job("a")], [])
+
+# Named (distributed) runs keep their own pages only
+def test_named_run(store):
+    store.save_page(URL, 3, [])
+    named = CheckpointStore(store.db_path)
+    assert named.begin_run("2026-10-18") == "2026-10-18" and not named.resumed
+    assert named.resume(URL)[0] == 0
+    assert CheckpointStore(store.db_path).begin_run("2026-10-18") == "2026-10-18"
+
+# The incremental crawl compares posting dates with the start of the last finished run
+def test_last_run_started(store):
+    assert store.last_run_started is None
+    store.finish_run()
+    after = CheckpointStore(store.db_path)
+    after.begin_run()
+    assert after.last_run_started is not None and after.run != store.run
+
+# On Redis the work one machine left behind is resumed by another, and a finished run dates the next one
+def test_redis_store_shares_pending_work(redis_url):
+    node_a, node_b = RedisCheckpointStore(redis_url), RedisCheckpointStore(redis_url)
+    assert node_a.begin_run("run-1") == "run-1" and not node_a.resumed
+    assert node_b.begin_run("run-1") == "run-1" and node_b.resumed
+    node_a.save_page(URL, 2, [job("a"), job("b")])
+    node_a.finish_url(URL, "stale pages")
+    assert node_b.resume(URL) == (2, True, [job("a"), job("b")], [])
+
+    node_b.scored([job("a"), job("b")], [("/rc/clk?jk=a", 90)])
+    assert node_a.resume(URL)[2:] == ([], [("/rc/clk?jk=a", 90.0)])
+    assert node_a.summary() == {"run": "run-1", "pending jobs": 0, "pending matches": 1}
+    node_a.extracted("/rc/clk?jk=a")
+    assert node_b.summary()["pending matches"] == 0
+
+    node_a.finish_run()
+    later = RedisCheckpointStore(redis_url)
+    assert later.begin_run("run-2") == "run-2" and later.last_run_started is not None
+    assert later.resume(URL)[0] == 0
@@ -0,0 +1,61 @@
+import threading
+from config import config_input
+
+
+SHEETS = {
+    "Settings": [["MATCHING_PERCENTAGE", "70"], ["SHEETS_NAMES", "Easy_applies, CS_applies"], ["AI_PROMPT", '"Rate these"']],
+    "JobUrls": [["https://www.indeed.com/jobs?q=python"]],
+    "ConfirmationCompanies": [["Acme"]],
+    "IgnoreCompanies": [],
+}
+
+# Raw sheet values are parsed the same way they are read from Google Sheets
+def test_build_config_parses_settings_and_columns():
+    config = config_input.build_config(SHEETS)
+    assert config["MATCHING_PERCENTAGE"] == 70
+    assert config["CSV_FILES"] == ["Easy_applies", "CS_applies"]
+    assert config["AI_PROMPT"] == "Rate these"
+    assert config["JOBS_LISTED_PAGES_URLS"] == ["https://www.indeed.com/jobs?q=python"]
+    assert config["CONFIRMATION_COMPANIES"] == ["Acme"]
+    assert config["PER_COMPANY_JOBS"] == 2  # default
+
+# The snapshot version only grows when the sheets content changes
+def test_save_snapshot_versions(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    assert config_input.save_snapshot(SHEETS, path)["version"] == 1
+    assert config_input.save_snapshot(SHEETS, path)["version"] == 1
+    changed = dict(SHEETS, IgnoreCompanies=[["Globex"]])
+    assert config_input.save_snapshot(changed, path)["version"] == 2
+    assert config_input.load_snapshot(path)["sheets"]["IgnoreCompanies"] == [["Globex"]]
+
+# Saves running at the same time each write their own temp file, so none of them fails
+def test_concurrent_saves(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    errors = []
+
+    def save():
+        try:
+            config_input.save_snapshot(SHEETS, path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert config_input.load_snapshot(path)["sheets"] == SHEETS
+    assert [p.name for p in tmp_path.iterdir()] == ["snapshot.json"]
+
+# When the Sheets API is unreachable the snapshot is used
+def test_load_falls_back_to_snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / "snapshot.json")
+    config_input.save_snapshot(SHEETS, path)
+
+    def unreachable(*args, **kwargs):
+        raise TimeoutError("Sheets API timed out")
+    monkeypatch.setattr(config_input, "fetch_config_sheets", unreachable)
+
+    config = config_input.load_scraper_config_from_sheet(refresh="sync", path=path)
+    assert config["MATCHING_PERCENTAGE"] == 70
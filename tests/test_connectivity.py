@@ -0,0 +1,44 @@
+import asyncio
+from utils.connectivity import ConnectivityMonitor
+
+
+def make_monitor(results):
+    monitor = ConnectivityMonitor(interval=0.01)
+    results = iter(results)
+
+    async def probe():
+        return next(results, True)
+    monitor.probe = probe
+    return monitor
+
+# Workers block while offline and all resume on the same probe, reloading their page
+def test_wait_online_blocks_until_probe_succeeds():
+    class Page:
+        reloads = 0
+        async def reload(self):
+            Page.reloads += 1
+
+    async def run():
+        monitor = make_monitor([False, False, False])
+        await monitor.start()
+        assert not monitor.online.is_set()
+        await asyncio.wait_for(asyncio.gather(monitor.wait_online(Page()), monitor.wait_online(Page())), 1)
+        await monitor.stop()
+
+    asyncio.run(run())
+    assert Page.reloads == 2
+
+# A manual pause holds workers even while the link is up
+def test_pause_and_resume():
+    async def run():
+        monitor = make_monitor([])
+        await monitor.start()
+        monitor.pause()
+        waiter = asyncio.create_task(monitor.wait_online())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        monitor.resume()
+        await asyncio.wait_for(waiter, 1)
+        await monitor.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,75 @@
+import asyncio, json, os
+from utils.context_pool import ContextPool
+
+
+class DummyContext:
+    def __init__(self, index, storage_state):
+        self.index = index
+        self.storage_state_in = storage_state
+        self.closed = False
+
+    async def storage_state(self, path):
+        with open(path, "w") as f:
+            json.dump({"cookies": [{"name": "cf_clearance", "value": str(self.index)}]}, f)
+
+    async def close(self):
+        self.closed = True
+
+def make_pool(tmp_path, identities=range(2), **kwargs):
+    built = []
+    async def build(index, storage_state):
+        built.append((index, storage_state))
+        return DummyContext(index, storage_state)
+    return ContextPool(build, identities, state_dir=str(tmp_path), **kwargs), built
+
+# Identities are built once and reused across search URLs, taking turns
+def test_contexts_are_reused(tmp_path):
+    pool, built = make_pool(tmp_path, max_pages=100, max_heap_mb=512)
+
+    async def run():
+        seen = []
+        for _ in range(4):
+            index, context = await pool.acquire()
+            seen.append(context)
+            await pool.release(index, pages=3)
+        await pool.close()
+        return seen
+
+    seen = asyncio.run(run())
+    assert [index for index, _ in built] == [0, 1]
+    assert seen[2] is seen[0] and seen[3] is seen[1]
+    assert pool.reused == 2
+    assert all(context.closed for context in seen)
+
+# Worn-out contexts are recycled, and their storage state is restored for the next build
+def test_recycle_saves_and_restores_state(tmp_path):
+    pool, built = make_pool(tmp_path, identities=[0], max_pages=5, max_heap_mb=100)
+
+    async def run():
+        index, first = await pool.acquire()
+        await pool.release(index, pages=5)
+        index, second = await pool.acquire()
+        await pool.release(index, pages=1, heap_bytes=200 * 1024 * 1024)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.closed and second.closed and pool.recycled == 2
+    path = pool.state_path(0)
+    assert built == [(0, None), (0, path)]
+    assert os.path.exists(path) and not os.path.exists(path + ".tmp")
+
+# Only as many contexts exist as identities; a third caller waits for a free one
+def test_acquire_waits_for_idle_identity(tmp_path):
+    pool, built = make_pool(tmp_path)
+
+    async def run():
+        a = await pool.acquire()
+        b = await pool.acquire()
+        waiting = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        await pool.release(a[0])
+        return a, await waiting
+
+    a, c = asyncio.run(run())
+    assert c[0] == a[0] and len(built) == 2
@@ -0,0 +1,85 @@
+import asyncio
+from utils import extraction, http_fetcher
+
+DETAIL_HTML = """<html><head><script>var t = "Apply on company site";</script></head><body>
+<div data-testid="jobsearch-JobInfoHeader-title"><h1><span>Senior Python <b>Developer</b></span></h1></div>
+<div data-testid="inlineHeader-companyName"><a href="/cmp/acme">Acme &amp; Co</a></div>
+<div id="salaryInfoAndJobType"><span>$120,000 a year</span><br><span>Full-time</span></div>
+<img src="logo.png">
+<div id="jobDescriptionText"><p>Build APIs.</p><ul><li>Python</li><li>AWS</li></ul></div>
+</body></html>"""
+
+# Raw HTML is parsed with the same spec the browser path evaluates
+def test_parse_html_detail_spec():
+    fields = extraction.parse_html(DETAIL_HTML, extraction.DETAIL_SPEC)
+    assert fields["job_title"] == "Senior Python Developer"
+    assert fields["company_name"] == "Acme & Co"
+    assert fields["salary"] == "$120,000 a year\nFull-time"
+    assert fields["full_description"] == "Build APIs.\nPython\nAWS"
+    assert fields["benefits"] is None
+    # script text is not page text
+    assert fields["company_site_apply"] is False
+    assert fields["expired"] is False
+
+
+class DummyResponse:
+    def __init__(self, status, html):
+        self.status = status
+        self.html = html
+    async def text(self):
+        return self.html
+    async def dispose(self):
+        pass
+
+class DummyRequest:
+    def __init__(self, response):
+        self.response = response
+    async def get(self, url, timeout):
+        return self.response
+
+class DummyContext:
+    def __init__(self, status, html):
+        self.request = DummyRequest(DummyResponse(status, html))
+
+# Challenges and incomplete pages fall back to the browser (None)
+def test_fetch_detail_fields_falls_back():
+    fetch = http_fetcher.fetch_detail_fields
+    url = "https://indeed.com/viewjob?jk=1"
+    assert asyncio.run(fetch(DummyContext(200, DETAIL_HTML), url))["company_name"] == "Acme & Co"
+    assert asyncio.run(fetch(DummyContext(403, DETAIL_HTML), url)) is None
+    assert asyncio.run(fetch(DummyContext(200, "<h1>Additional Verification Required</h1>"), url)) is None
+    assert asyncio.run(fetch(DummyContext(200, "<html><body>Hello</body></html>"), url)) is None
+
+
+class DummyListingPage:
+    def __init__(self, embedded, cards):
+        self.results = {extraction.EMBEDDED_JOBS_SCRIPT: embedded, extraction.LISTING_CARD_SCRIPT: cards}
+    async def evaluate(self, script):
+        return self.results[script]
+
+# Embedded job JSON is used when present, the DOM cards otherwise
+def test_extract_listing_jobs_prefers_embedded_json():
+    embedded = [
+        {"jk": "a1", "title": "Python Dev", "company": "Acme", "location": "Remote",
+         "snippet": "Build APIs", "pub_date": 1760000000000, "link": "/rc/clk?jk=a1"},
+        {"jk": None, "title": "Broken", "company": "", "location": None, "snippet": None, "pub_date": None, "link": None},
+    ]
+    cards = [{"title": "Ops", "company": "Globex", "link": "/rc/clk?jk=b2&vjs=3"}, {"title": "x", "company": "y", "link": None}]
+
+    jobs = asyncio.run(extraction.extract_listing_jobs(DummyListingPage(embedded, cards)))
+    assert [job["jk"] for job in jobs] == ["a1"]
+    assert jobs[0]["pub_date"] == 1760000000000
+
+    jobs = asyncio.run(extraction.extract_listing_jobs(DummyListingPage(None, cards)))
+    assert jobs == [{"title": "Ops", "company": "Globex", "link": "/rc/clk?jk=b2&vjs=3",
+                     "jk": "b2", "location": None, "snippet": None, "pub_date": None}]
+
+# Text inside scripts (embedded JSON) does not count as page text, as with Playwright's :has-text
+def test_has_text_ignores_script_text():
+    html = """<html><body><h2 class="jobsearch-JobInfoHeader-title"><span>Dev</span></h2>
+    <script>window._initialData = {"applyButton": "Apply on company site"}</script>
+    <noscript>This job has expired on Indeed</noscript></body></html>"""
+    fields = extraction.parse_html(html, extraction.DETAIL_SPEC)
+    assert fields["company_site_apply"] is False and fields["expired"] is False
+    # The compiled script skips the same elements
+    assert "closest('script, style, noscript, template')" in extraction.compile_spec(extraction.DETAIL_SPEC)
@@ -0,0 +1,76 @@
+import json, os, asyncio
+from utils import fingerprint_loader
+from utils.fingerprint_loader import FingerprintCatalog
+
+
+def write_fingerprint(folder, name, user_agent, weight=None):
+    data = {"navigator": {"userAgent": user_agent}, "screen": {"width": 1280, "height": 720}}
+    if weight is not None:
+        data["weight"] = weight
+    (folder / name).write_text(json.dumps(data))
+
+def make_catalog(tmp_path, selection="round-robin"):
+    folder = tmp_path / "fingerprints"
+    folder.mkdir(exist_ok=True)
+    return folder, lambda: FingerprintCatalog(folder, tmp_path / "cache", selection)
+
+# Duplicate user agents are dropped and selection wraps around instead of raising IndexError
+def test_round_robin_wraps_around(tmp_path):
+    folder, catalog = make_catalog(tmp_path)
+    write_fingerprint(folder, "a.json", "UA-1")
+    write_fingerprint(folder, "b.json", "UA-2")
+    write_fingerprint(folder, "c.json", "UA-1")
+    (folder / "empty.json").write_text("")
+    catalog = catalog()
+    assert [catalog.pick(i)["user_agent"] for i in range(5)] == ["UA-1", "UA-2", "UA-1", "UA-2", "UA-1"]
+
+# Weighted selection favours heavier fingerprints and always gives an identity the same one
+def test_weighted_selection_is_stable(tmp_path):
+    folder, catalog = make_catalog(tmp_path, "weighted")
+    write_fingerprint(folder, "a.json", "UA-1", weight=9)
+    write_fingerprint(folder, "b.json", "UA-2", weight=1)
+    catalog = catalog()
+    picks = [catalog.pick(i)["user_agent"] for i in range(200)]
+    assert picks.count("UA-1") > picks.count("UA-2")
+    assert picks == [catalog.pick(i)["user_agent"] for i in range(200)]
+
+# Scripts are rendered once per content hash; the next catalog reads index and script from disk
+def test_scripts_are_cached_on_disk(tmp_path, monkeypatch):
+    folder, new_catalog = make_catalog(tmp_path)
+    write_fingerprint(folder, "a.json", "UA-1")
+    first = new_catalog()
+    script = first.script(first.pick(0))
+    assert '"UA-1"' in script and "get: () => 1280" in script
+
+    def fail(_):
+        raise AssertionError("script rendered again")
+    monkeypatch.setattr(fingerprint_loader, "build_script", fail)
+    second = new_catalog()
+    assert second.script(second.pick(0)) == script
+
+    # A changed file gets a new hash and a new script
+    monkeypatch.undo()
+    write_fingerprint(folder, "a.json", "UA-1 changed")
+    os.utime(folder / "a.json", (1, 1))
+    third = new_catalog()
+    assert '"UA-1 changed"' in third.script(third.pick(0))
+
+def test_no_fingerprints(tmp_path, monkeypatch):
+    _, catalog = make_catalog(tmp_path)
+    monkeypatch.setattr(fingerprint_loader, "catalog", catalog())
+    assert asyncio.run(fingerprint_loader.load_fingerprint(3)) is None
+
+# A cache file another process is replacing at the same moment counts as written, and no temp file is left
+def test_concurrent_cache_write(tmp_path, monkeypatch):
+    folder, new_catalog = make_catalog(tmp_path)
+    write_fingerprint(folder, "a.json", "UA-1")
+    catalog = new_catalog()
+    entry = catalog.pick(0)
+    target = tmp_path / "cache" / f"{entry['hash']}-v{fingerprint_loader.SCRIPT_VERSION}.js"
+
+    def busy(source, destination):
+        target.write_text("written by another process")
+        raise PermissionError(destination)
+    monkeypatch.setattr(fingerprint_loader.os, "replace", busy)
+    assert '"UA-1"' in catalog.script(entry)
+    assert not list((tmp_path / "cache").glob("*.tmp"))
@@ -10,10 +10,9 @@ import mimetypes
 from config import config_input
 from groq import Groq
 import logging
-from utils import helper
+from utils import helper, seen_jobs
 import pytest
 import tempfile
-from unittest.mock import patch, AsyncMock
 
 
 # Make a temp_directory of pytest.fixture with decolater @pytest.fixture
@@ -105,21 +104,19 @@ def test_get_job_id_valid_url():
 
 # Check the update_processed_jobs function work mean is the new processed jobs linke updating to processed to processed or not
 def test_update_processed_jobs_links(tmp_path, monkeypatch):
-    # Create a temporary file path
-    test_file = tmp_path / "processed_jobs.txt"
-
-    # Patch the config so your function writes to this file instead of the real one
-    monkeypatch.setattr(helper.config_input, "PROCESSED_JOBS_FILE_PATH", str(test_file))
+    # Patch the store so your function writes to a temporary database instead of the real one
+    store = seen_jobs.SeenJobsStore(str(tmp_path / "seen_jobs.db"))
+    monkeypatch.setattr(seen_jobs, "_store", store)
 
     # Run the async function using asyncio.run
-    links = ["https://job1.com", "https://job2.com"]
-    asyncio.run(helper.update_processed_jobs_links(links))
-
-    # Read back the file to check
-    with open(test_file, "r") as f:
-        contents = f.read().splitlines()
+    links = ["/rc/clk?jk=job1", "/rc/clk?jk=job2"]
+    new_ids = asyncio.run(helper.update_processed_jobs_links(links))
+    assert new_ids == {"job1", "job2"}
 
-    assert contents == links
+    # Second time the same links are not new anymore
+    new_ids = asyncio.run(helper.update_processed_jobs_links(links + ["/rc/clk?jk=job3"]))
+    assert new_ids == {"job3"}
+    assert "job1" in store and len(store) == 3
 
 # Check the response of integrated ai model it's working or not
 # And we are goona make a fake system to check, why we not using the real one function due to below some of problems.
@@ -179,18 +176,9 @@ def test_simulate_human_behavior(monkeypatch):
     assert page.mouse.move_called == (0, 0, 2)      # since randint returns min=0 and steps=2
     assert page.evaluate_called == "window.scrollTo(0, document.body.scrollHeight)"
 
-@pytest.mark.asyncio
-async def test_wait_until_internet_is_back_with_mocks():
-    # Create mock page
-    mock_page = AsyncMock()
-    
-    # Mock check_internet to return False twice, then True
-    with patch('helper.check_internet') as mock_check:
-        mock_check.side_effect = [False, False, True]
-        
-        await helper.wait_until_internet_is_back(mock_page)
-        
-        # Verify check_internet was called 3 times
-        assert mock_check.call_count == 3
-        # Verify page.reload was called once
-        mock_page.reload.assert_called_once()
+# Result pages are addressed with start=, replacing any offset already in the search URL
+def test_page_url():
+    url = "https://www.indeed.com/jobs?q=python+developer&l=Remote&start=30"
+    assert helper.page_url(url, 1) == "https://www.indeed.com/jobs?q=python+developer&l=Remote"
+    assert helper.page_url(url, 4) == "https://www.indeed.com/jobs?q=python+developer&l=Remote&start=30"
+    assert helper.page_url("https://www.indeed.com/jobs?q=nurse", 2) == "https://www.indeed.com/jobs?q=nurse&start=10"
@@ -0,0 +1,74 @@
+import asyncio
+from scrapers import job_details_scraper
+
+
+class DummyTab:
+    closed = False
+    async def close(self):
+        self.closed = True
+
+class DummyContext:
+    def __init__(self):
+        self.tabs = []
+    async def new_page(self):
+        tab = DummyTab()
+        self.tabs.append(tab)
+        return tab
+
+# Each detail worker opens its own tab on first use, hands results (None when skipped) on, and closes the tab at the end marker
+def test_detail_workers_share_the_queue(monkeypatch):
+    monkeypatch.setattr(job_details_scraper.config_input, "DETAIL_FETCH_MODE", "browser")
+    running = {"now": 0, "max": 0}
+
+    async def fake_extract(tab, url, percentage):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        if url == "3":
+            return None
+        category = "company_site" if int(url) % 2 else "easy"
+        return category, [url, percentage]
+    monkeypatch.setattr(job_details_scraper, "_extract_job", fake_extract)
+
+    context = DummyContext()
+
+    async def run():
+        jobs, results = asyncio.Queue(), asyncio.Queue()
+        for i in range(8):
+            jobs.put_nowait((i, str(i), 80 + i))
+        for _ in range(3):
+            jobs.put_nowait(None)
+        await asyncio.gather(*(job_details_scraper.detail_worker(context, jobs, results) for _ in range(3)))
+        return [results.get_nowait() for _ in range(results.qsize())]
+
+    results = asyncio.run(run())
+    assert len(context.tabs) == 3 and all(tab.closed for tab in context.tabs)
+    assert running["max"] == 3
+    assert sorted(key for key, result in results) == list(range(8))
+    results = [result for key, result in results if result]
+    assert sorted(row for category, row in results if category == "easy") == [["0", 80], ["2", 82], ["4", 84], ["6", 86]]
+    assert sorted(row for category, row in results if category == "company_site") == [["1", 81], ["5", 85], ["7", 87]]
+
+# Fields read by the single evaluate call are classified like the old selectors
+def test_classify_job_from_extracted_fields(monkeypatch):
+    monkeypatch.setattr(job_details_scraper.config_input, "confirmation_companies", ["Acme"])
+    fields = {
+        "company_name": "Globex", "job_title": "Python Developer", "salary": "$100k",
+        "job_other_details": None, "benefits": None, "full_description": "Build APIs",
+        "avoid": False, "expired": False, "company_site_apply": True,
+    }
+
+    def job_data():
+        data = {key: "" for key in job_details_scraper.FIXED_KEYS}
+        data.update(url="https://indeed.com/viewjob?jk=1", matching_per=90)
+        return data
+
+    category, row = job_details_scraper.classify_job(job_data(), fields)
+    assert category == "company_site"
+    assert row == ["Globex", "https://indeed.com/viewjob?jk=1", 90, "Python Developer", "$100k", "", "", "Build APIs"]
+
+    assert job_details_scraper.classify_job(job_data(), dict(fields, company_name="Acme"))[0] == "confirmation"
+    assert job_details_scraper.classify_job(job_data(), dict(fields, expired=True)) is None
+    assert job_details_scraper.classify_job(job_data(), dict(fields, avoid=True)) is None
+    assert job_details_scraper.classify_job(job_data(), dict(fields, job_title=None)) is None
@@ -0,0 +1,96 @@
+import time, asyncio
+from utils import connectivity, helper, extraction, pacing
+from scrapers import job_listings_scraper
+from config import config_input
+
+
+def job(days_ago):
+    return {"jk": str(days_ago), "pub_date": (time.time() - days_ago * 86400) * 1000}
+
+# Pagination stops after enough pages without unseen jobs, or at a page older than the last run
+def test_cutoff_reason(monkeypatch):
+    monkeypatch.setattr(config_input, "INCREMENTAL_STALE_PAGES", 2)
+    last_run = time.time() - 86400
+
+    assert job_listings_scraper.cutoff_reason([job(0)], 1, last_run) is None
+    assert job_listings_scraper.cutoff_reason([job(0)], 2, last_run) == "no unseen jobs"
+    assert job_listings_scraper.cutoff_reason([job(3), job(2)], 0, last_run) == "jobs older than the last run"
+    # One recent job, undated jobs or no earlier run keep paginating
+    assert job_listings_scraper.cutoff_reason([job(3), job(0)], 0, last_run) is None
+    assert job_listings_scraper.cutoff_reason([{"jk": "a", "pub_date": None}], 0, last_run) is None
+    assert job_listings_scraper.cutoff_reason([job(3)], 0, None) is None
+
+
+class FakeProgress:
+    url = "https://www.indeed.com/jobs?q=python"
+
+    def __init__(self):
+        self.pages, self.finished = [], None
+
+    async def add_page(self, number, jobs):
+        self.pages.append(number)
+        return None
+
+    def finish(self, reason):
+        self.finished = reason
+
+# Pages are fetched a wave of tabs at a time, taken in order, and pagination ends at the first empty page
+def test_paginate_by_url(monkeypatch):
+    in_flight, peak = 0, 0
+
+    class Tab:
+        url = None
+
+    terms = []
+    async def fake_open(context, tab, url, accept_terms=True):
+        tab.url = url
+        terms.append(accept_terms)
+        return False
+
+    async def fake_read(tab, challenged=False):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        number = int(tab.url.split("start=")[1]) // 10 + 1 if "start=" in tab.url else 1
+        return [] if number > 5 else [{"jk": f"{number}-{i}"} for i in range(3)]
+
+    monkeypatch.setattr(job_listings_scraper, "_open_results", fake_open)
+    monkeypatch.setattr(job_listings_scraper, "_read_jobs", fake_read)
+
+    progress = FakeProgress()
+    asyncio.run(job_listings_scraper._paginate_by_url(None, [Tab() for _ in range(3)], progress, 1))
+    assert progress.pages == [1, 2, 3, 4, 5]
+    assert progress.finished == "last page"
+    assert peak == 3
+    # Only the first page of the search looks for the terms banner
+    assert terms.count(True) == 1
+
+
+class EmptyResultsPage:
+    url = "https://www.indeed.com/jobs?q=python&start=990"
+
+    async def wait_for_selector(self, selector, timeout):
+        # Only the no-results message is on the page
+        if job_listings_scraper.NO_RESULTS not in selector:
+            raise TimeoutError(selector)
+
+    async def wait_for_load_state(self, state, timeout):
+        pass
+
+# A page past the last one is ready at once through the no-results message and is not counted as blocked
+def test_empty_page_is_not_a_challenge(monkeypatch):
+    async def noop(*args, **kwargs):
+        return None
+    async def no_jobs(page):
+        return []
+    controller = pacing.PacingController(min_seconds=0.5, max_seconds=8, start_seconds=2, ready_timeout=1)
+    monkeypatch.setattr(pacing, "controller", controller)
+    monkeypatch.setattr(connectivity.monitor, "wait_online", noop)
+    monkeypatch.setattr(helper, "simulate_human_behavior", noop)
+    monkeypatch.setattr(extraction, "extract_listing_jobs", no_jobs)
+    monkeypatch.setattr(asyncio, "sleep", noop)
+
+    assert asyncio.run(job_listings_scraper._read_jobs(EmptyResultsPage())) == []
+    assert controller.not_ready == 0 and controller.budget < 2
@@ -0,0 +1,44 @@
+import asyncio
+from types import SimpleNamespace
+from utils.llm_clients import GroqClient
+import pytest
+
+
+class FakeCompletions:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=' {"j1": 80} '))])
+
+def groq_client(completions, concurrency=2, timeout=5):
+    client = GroqClient("test-model", 0.2, 256, concurrency, timeout)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client
+
+# One client serves every request, with settings from config and at most `concurrency` in flight
+def test_groq_client_reuse_and_concurrency():
+    completions = FakeCompletions(delay=0.02)
+    client = groq_client(completions)
+
+    async def run():
+        return await asyncio.gather(*(client.complete("prompt") for _ in range(5)))
+
+    assert asyncio.run(run()) == ['{"j1": 80}'] * 5
+    assert completions.peak == 2
+    assert completions.calls[0]["model"] == "test-model"
+    assert completions.calls[0]["temperature"] == 0.2
+    assert completions.calls[0]["max_tokens"] == 256
+
+def test_groq_client_timeout():
+    client = groq_client(FakeCompletions(delay=1), timeout=0.05)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(client.complete("prompt"))
@@ -0,0 +1,45 @@
+import asyncio
+from utils.pacing import PacingController
+
+
+class DummyPage:
+    url = "https://www.indeed.com/jobs?q=python"
+
+    def __init__(self, ready):
+        self.ready = ready
+        self.load_states = []
+
+    async def wait_for_selector(self, selector, timeout):
+        if not self.ready:
+            raise TimeoutError(selector)
+
+    async def wait_for_load_state(self, state, timeout):
+        self.load_states.append(state)
+
+def make_controller(monkeypatch):
+    sleeps = []
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr("random.uniform", lambda a, b: b)
+    return PacingController(min_seconds=0.5, max_seconds=8, start_seconds=2, ready_timeout=1), sleeps
+
+# Clean pages shrink the jitter budget down to the minimum
+def test_budget_shrinks_without_challenges(monkeypatch):
+    controller, sleeps = make_controller(monkeypatch)
+    page = DummyPage(ready=True)
+    for _ in range(30):
+        assert asyncio.run(controller.page_ready(page, ".job")) is True
+    assert sleeps[0] < 2 and sleeps[-1] == 0.5
+    assert page.load_states[0] == "networkidle"
+    assert controller.challenge_rate() == 0
+
+# Challenges and pages that never get ready grow it up to the maximum
+def test_budget_grows_with_challenges(monkeypatch):
+    controller, sleeps = make_controller(monkeypatch)
+    asyncio.run(controller.page_ready(DummyPage(ready=True), ".job", challenged=True))
+    assert controller.budget == 4
+    for _ in range(3):
+        assert asyncio.run(controller.page_ready(DummyPage(ready=False), ".job")) is False
+    assert controller.budget == 8 and controller.not_ready == 3
+    assert controller.challenge_rate() == 1
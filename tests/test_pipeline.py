@@ -0,0 +1,112 @@
+import asyncio
+from scrapers import pipeline
+from utils import sheet_uploader
+
+
+class DummyContext:
+    closed = False
+    async def close(self):
+        self.closed = True
+
+# Batches flow listing → scoring → details → writer while listing keeps producing
+def test_pipeline_runs_every_stage(monkeypatch):
+    events = []
+
+    async def fake_score(batch):
+        await asyncio.sleep(0.02)
+        events.append(("scored", len(batch)))
+        return [(job["link"], 90) for job in batch if job["title"] != "Nurse"]
+
+    async def fake_detail_worker(context, jobs, results, on_done=None):
+        while (item := await jobs.get()) is not None:
+            key, url, percentage = item
+            await results.put((key, ("company_site" if url.endswith("1") else "easy", [url, percentage])))
+
+    written = {"easy": [], "cs": [], "c": []}
+    async def fake_append(easy, cs, c):
+        written["easy"] += easy
+        written["cs"] += cs
+
+    monkeypatch.setattr(pipeline, "score_batch", fake_score)
+    monkeypatch.setattr(pipeline, "detail_worker", fake_detail_worker)
+    monkeypatch.setattr(sheet_uploader, "jobs_append_to_csv", fake_append)
+
+    contexts = []
+    async def new_context(index):
+        contexts.append(DummyContext())
+        return contexts[-1]
+
+    async def listing(stages, name):
+        for page in range(3):
+            await stages.submit_batch([
+                {"link": f"/{name}{page}1", "title": "Python Dev"},
+                {"link": f"/{name}{page}2", "title": "Nurse"},
+            ])
+            # The next page is read while the previous batch is still being scored
+            events.append(("listed", name, page))
+
+    async def run():
+        stages = pipeline.Pipeline(new_context, scoring_workers=2, detail_contexts=2, tabs_per_context=2)
+        await stages.run([listing(stages, "a"), listing(stages, "b")])
+        return stages
+
+    stages = asyncio.run(run())
+
+    assert len(written["cs"]) == 6 and written["easy"] == []
+    assert stages.rows_written == 6
+    assert len(contexts) == 2 and all(context.closed for context in contexts)
+    assert events.index(("listed", "a", 2)) < events.index(("scored", 2))
+    assert stages.summary()["scoring"].startswith("6 items")
+
+# Rows are written in the order batches were submitted, whichever batch is scored or extracted first
+def test_writer_keeps_batch_order(monkeypatch):
+    async def fake_score(batch):
+        # The first batch is the slowest to score
+        await asyncio.sleep(0.05 if batch[0]["link"] == "/a" else 0.01)
+        return [(job["link"], 90) for job in batch if job["link"] != "/skip"]
+
+    async def fake_detail_worker(context, jobs, results, on_done=None):
+        while (item := await jobs.get()) is not None:
+            key, url, percentage = item
+            await asyncio.sleep(0.03 if url == "/b" else 0)
+            await results.put((key, None if url == "/d" else ("easy", [url])))
+
+    written = []
+    async def fake_append(easy, cs, c):
+        written.extend(easy)
+
+    monkeypatch.setattr(pipeline, "score_batch", fake_score)
+    monkeypatch.setattr(pipeline, "detail_worker", fake_detail_worker)
+    monkeypatch.setattr(sheet_uploader, "jobs_append_to_csv", fake_append)
+
+    async def new_context(index):
+        return DummyContext()
+
+    async def listing(stages):
+        await stages.submit_matches([("/resumed", 80)])
+        for links in (["/a", "/b"], ["/skip"], ["/c", "/d", "/e"]):
+            await stages.submit_batch([{"link": link} for link in links])
+
+    async def run():
+        stages = pipeline.Pipeline(new_context, scoring_workers=3, detail_contexts=1, tabs_per_context=3)
+        await stages.run([listing(stages)])
+        return stages
+
+    stages = asyncio.run(run())
+    assert written == [["/resumed"], ["/a"], ["/b"], ["/c"], ["/e"]]
+    assert stages.rows_written == 5
+
+# A full queue holds the producer back instead of growing without bound
+def test_stage_queue_records_backpressure():
+    async def run():
+        queue = pipeline.StageQueue("test", 1)
+        await queue.put("a")
+        waiting = asyncio.create_task(queue.put("b"))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        queue.get_nowait()
+        await waiting
+        return queue
+
+    queue = asyncio.run(run())
+    assert (queue.items, queue.blocked, queue.max_depth) == (2, 1, 1)
@@ -0,0 +1,46 @@
+from utils.prefilter import LexicalPrefilter, tokenize
+
+
+PROFILE = "Looking for Python backend developer roles. Skills: Python, Django, PostgreSQL, AWS, C#."
+
+def job(title, snippet=""):
+    return {"jk": title, "title": title, "snippet": snippet}
+
+def test_tokenize():
+    assert tokenize("Senior C# / .NET Developer (Remote)") == ["senior", "c#", "net", "developer"]
+
+# Default cutoff 0 drops only titles that share nothing with the profile
+def test_drops_titles_without_shared_terms():
+    prefilter = LexicalPrefilter(PROFILE)
+    kept = prefilter.filter([job("Senior Python Developer"), job("Registered Nurse"), job("Django Engineer")])
+    assert [j["title"] for j in kept] == ["Senior Python Developer", "Django Engineer"]
+    assert (prefilter.seen, prefilter.dropped) == (3, 1)
+
+def test_snippet_can_keep_a_vague_title():
+    prefilter = LexicalPrefilter(PROFILE)
+    kept = prefilter.filter([job("Software Engineer II", "Build APIs in Python and Django on AWS"), job("Warehouse Associate")])
+    assert [j["title"] for j in kept] == ["Software Engineer II"]
+
+def test_allow_and_deny_terms():
+    prefilter = LexicalPrefilter(PROFILE, allow_terms=["sre"], deny_terms=["principal"])
+    kept = prefilter.filter([job("SRE"), job("Principal Python Developer"), job("Python Developer")])
+    assert [j["title"] for j in kept] == ["SRE", "Python Developer"]
+    assert (prefilter.allowed, prefilter.denied) == (1, 1)
+
+# Terms match whole words or phrases, never part of a longer word
+def test_terms_match_whole_words():
+    prefilter = LexicalPrefilter(PROFILE, allow_terms=["go", "machine learning"], deny_terms=["rn"])
+    kept = prefilter.filter([job("Software Intern"), job("RN Case Manager"), job("Google Ads Manager"), job("Machine Learning Engineer")])
+    assert [j["title"] for j in kept] == ["Machine Learning Engineer"]
+    assert (prefilter.allowed, prefilter.denied) == (1, 1)
+
+# Closer titles score higher, so a cutoff keeps only the strongest matches
+def test_cutoff_ranks_by_similarity():
+    prefilter = LexicalPrefilter(PROFILE)
+    scores = prefilter.scores([job("Python Django Backend Developer"), job("Python Tutor")])
+    assert scores[0] > scores[1] > 0
+
+# Without a resume or prompt there is nothing to compare with, so nothing is dropped
+def test_empty_profile_keeps_everything():
+    jobs = [job("Registered Nurse")]
+    assert LexicalPrefilter("").filter(jobs) == jobs
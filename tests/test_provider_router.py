@@ -0,0 +1,78 @@
+import asyncio
+from utils.provider_router import Provider, ProviderRouter
+
+
+class StubProvider:
+    """Local stand-in for an LLM: answers after `latency` seconds, or raises `error`."""
+
+    def __init__(self, latency=0.0, text="{}", error=None):
+        self.latency = latency
+        self.text = text
+        self.error = error
+        self.calls = 0
+
+    async def complete(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.error:
+            raise self.error
+        return self.text
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def router_with(stubs, **kwargs):
+    providers = [Provider(name, stub.complete) for name, stub in stubs.items()]
+    kwargs.setdefault("hedge_percentile", 0)
+    return ProviderRouter(providers, **kwargs), {provider.name: provider for provider in providers}
+
+def test_routes_to_fastest_provider():
+    slow, fast = StubProvider(0.03, "slow"), StubProvider(0.0, "fast")
+    router, providers = router_with({"slow": slow, "fast": fast})
+
+    async def run():
+        return [await router.complete("prompt") for _ in range(4)]
+
+    results = asyncio.run(run())
+    # Both are measured once, then the faster one takes the traffic
+    assert results[-2:] == ["fast", "fast"]
+    assert [p.name for p in router.ranked()] == ["fast", "slow"]
+
+def test_failures_open_the_circuit_and_fall_back():
+    broken, backup = StubProvider(error=RuntimeError("boom")), StubProvider(text="ok")
+    router, providers = router_with({"broken": broken, "backup": backup}, failure_threshold=2, open_seconds=60)
+
+    async def run():
+        return [await router.complete("prompt") for _ in range(4)]
+
+    assert asyncio.run(run()) == ["ok"] * 4
+    assert not providers["broken"].available
+    # Once open, the broken provider is not called any more
+    assert broken.calls == 2
+
+def test_quota_error_opens_circuit_immediately():
+    limited, backup = StubProvider(error=RateLimitError()), StubProvider(text="ok")
+    router, providers = router_with({"limited": limited, "backup": backup}, failure_threshold=5, quota_seconds=30)
+
+    assert asyncio.run(router.complete("prompt")) == "ok"
+    assert not providers["limited"].available
+
+def test_slow_request_is_hedged_to_second_provider():
+    primary, backup = StubProvider(0.01, "primary"), StubProvider(0.0, "backup")
+    router, providers = router_with({"primary": primary, "backup": backup}, hedge_percentile=90)
+    providers["primary"].latencies.extend([0.01] * 5)
+    providers["backup"].latencies.extend([0.05] * 5)
+
+    # The primary now stalls far beyond its usual latency
+    primary.latency = 1
+    assert asyncio.run(router.complete("prompt")) == "backup"
+    assert (router.hedges, router.hedges_won) == (1, 1)
+
+def test_summary_reports_provider_state():
+    router, providers = router_with({"a": StubProvider(text="ok")})
+    asyncio.run(router.complete("prompt"))
+    summary = router.summary()
+    assert summary["a requests"] == 1
+    assert summary["a circuit"] == "closed"
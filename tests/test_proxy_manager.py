@@ -0,0 +1,98 @@
+import time
+from utils.proxy_manager import ProxyManager
+
+PROXIES = [
+    {"server": "http://1.1.1.1:8000", "username": "a", "password": "x"},
+    {"server": "http://2.2.2.2:8000", "username": "b", "password": "y"},
+]
+
+def make_manager(tmp_path, **kwargs):
+    manager = ProxyManager(db_path=str(tmp_path / "proxy_stats.db"), quarantine_seconds=60,
+                           max_quarantine_seconds=300, **kwargs)
+    manager.load(PROXIES)
+    return manager
+
+# The second failure in a row quarantines, each further one doubles it up to the max, a success clears it
+def test_quarantine_backoff(tmp_path):
+    manager = make_manager(tmp_path)
+    context = object()
+    manager.attach(context, PROXIES[0])
+    key = ProxyManager.key(PROXIES[0])
+
+    manager.record(context, ok=False)
+    assert manager.healthy(key)
+    manager.record(context, ok=False)
+    assert not manager.healthy(key) and not manager.context_healthy(context)
+    assert 55 < manager.stats[key]["quarantine_until"] - time.time() <= 60
+
+    for _ in range(5):
+        manager.record(context, ok=False)
+    assert manager.stats[key]["quarantine_until"] - time.time() <= 300
+
+    manager.record(context, ok=True, latency=1.0)
+    assert manager.stats[key]["strikes"] == 0
+    assert manager.healthy(key) and manager.context_healthy(context)
+
+# A quarantined proxy is skipped even when preferred, the healthy one is used
+def test_acquire_prefers_healthy(tmp_path):
+    manager = make_manager(tmp_path)
+    bad = ProxyManager.key(PROXIES[0])
+    manager.stats[bad]["quarantine_until"] = time.time() + 60
+
+    assert manager.acquire(preferred=bad) is PROXIES[1]
+    assert manager.acquire(preferred=ProxyManager.key(PROXIES[1])) is PROXIES[1]
+
+    # With everything quarantined the first to come back is used
+    manager.stats[ProxyManager.key(PROXIES[1])]["quarantine_until"] = time.time() + 600
+    assert manager.acquire() is PROXIES[0]
+
+# A proxy handed back after a failed context creation no longer counts as in use
+def test_release_after_failed_context(tmp_path):
+    manager = make_manager(tmp_path)
+    proxy = manager.acquire(preferred=ProxyManager.key(PROXIES[0]))
+    assert manager.in_use[ProxyManager.key(proxy)] == 1
+    manager.release(proxy)
+    assert manager.in_use[ProxyManager.key(proxy)] == 0
+
+# Challenges and slow responses lower a proxy's score
+def test_score_ranks_by_health(tmp_path):
+    manager = make_manager(tmp_path)
+    good, bad = object(), object()
+    manager.attach(good, PROXIES[0])
+    manager.attach(bad, PROXIES[1])
+    for _ in range(5):
+        manager.record(good, ok=True, latency=1.0)
+        manager.record(bad, ok=True, latency=8.0)
+        manager.record_challenge(bad)
+    manager.detach(good)
+    manager.detach(bad)
+    assert manager.acquire() is PROXIES[0]
+
+# Stats survive into the next run, unknown proxies start fresh
+def test_stats_persist(tmp_path):
+    manager = make_manager(tmp_path)
+    context = object()
+    manager.attach(context, PROXIES[0])
+    manager.record(context, ok=True, latency=2.0)
+    manager.add_bytes(context, "2048")
+    manager.save()
+
+    again = make_manager(tmp_path)
+    assert again.stats[ProxyManager.key(PROXIES[0])]["requests"] == 1
+    assert again.stats[ProxyManager.key(PROXIES[0])]["bytes"] == 2048
+    assert again.stats[ProxyManager.key(PROXIES[1])]["requests"] == 0
+
+# Worker processes saving the same file add up their counts instead of overwriting each other
+def test_saves_merge(tmp_path):
+    first, second = make_manager(tmp_path), make_manager(tmp_path)
+    key = ProxyManager.key(PROXIES[0])
+    for manager, requests in ((first, 2), (second, 3)):
+        context = object()
+        manager.attach(context, PROXIES[0])
+        for _ in range(requests):
+            manager.record(context, ok=True, latency=1.0)
+    first.save()
+    second.save()
+    first.save()
+
+    assert make_manager(tmp_path).stats[key]["requests"] == 5
@@ -0,0 +1,33 @@
+from utils import resource_policy
+
+# Each profile blocks or stubs the expected requests and never touches Cloudflare
+def test_decide_per_profile():
+    decide = resource_policy.decide
+    image = "https://www.indeed.com/logo.png"
+    tracker = "https://www.google-analytics.com/collect?v=2"
+    challenge = "https://challenges.cloudflare.com/turnstile/v0/api.js"
+
+    assert decide("image", image, "full") is None
+    assert decide("image", image, "stealth-safe") == "stub"
+    assert decide("image", image, "minimal") == "abort"
+    assert decide("script", tracker, "stealth-safe") == "stub"
+    assert decide("script", tracker, "minimal") == "abort"
+    assert decide("document", "https://www.indeed.com/jobs?q=python", "minimal") is None
+    assert decide("script", challenge, "minimal") is None
+
+def test_bytes_saved_estimate():
+    stats = resource_policy.ResourceStats()
+    stats.record_blocked("image")
+    stats.record_blocked("image")
+    stats.record_blocked("xhr")
+    assert stats.estimated_bytes_saved == 2 * resource_policy.ESTIMATED_BYTES["image"] + resource_policy.DEFAULT_ESTIMATED_BYTES
+
+# Only tracker URLs and URLs of blocked resource types are routed, the rest keeps the browser cache
+def test_route_pattern_per_profile():
+    pattern = resource_policy.route_pattern("stealth-safe")
+    assert pattern.search("https://www.indeed.com/logo.PNG?v=2")
+    assert pattern.search("https://www.googletagmanager.com/gtm.js")
+    assert not pattern.search("https://www.indeed.com/jobs?q=python")
+    assert not pattern.search("https://www.indeed.com/fonts/noto.woff2")
+    assert resource_policy.route_pattern("minimal").search("https://www.indeed.com/fonts/noto.woff2")
+    assert resource_policy.route_pattern("full") is None
@@ -0,0 +1,39 @@
+import time
+from utils.score_cache import ScoreCache, normalize_title
+import pytest
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.db"), model="test-model")
+    yield cache
+    cache.close()
+
+def test_normalize_title():
+    assert normalize_title("  Senior  Python Developer!! ") == "senior python developer"
+    assert normalize_title("C# / .NET Engineer") == "c# / .net engineer"
+
+# Titles that differ only in case/spacing share an entry, and hits/misses are counted
+def test_get_many_and_counters(cache):
+    cache.put_many({"Senior Python Developer": 85})
+    assert cache.get_many(["senior  python developer", "DevOps Engineer"]) == {"senior  python developer": 85}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+# A different model (or prompt/resume) never reuses scores
+def test_key_depends_on_model(cache, tmp_path):
+    cache.put_many({"DevOps Engineer": 70})
+    other = ScoreCache(cache.db_path, model="other-model")
+    assert other.get_many(["DevOps Engineer"]) == {}
+    other.close()
+
+def test_evict_by_age_and_size(cache, monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now - 40 * 86400)
+    cache.put_many({"old": 10})
+    monkeypatch.setattr(time, "time", lambda: now)
+    cache.put_many({"a": 1})
+    monkeypatch.setattr(time, "time", lambda: now + 1)
+    cache.put_many({"b": 2})
+
+    assert cache.evict(max_age_days=30, max_entries=1) == 2
+    assert cache.get_many(["old", "a", "b"]) == {"b": 2}
@@ -0,0 +1,16 @@
+from utils import scoring_protocol
+
+# Scores are matched by id, prose numbers and unknown or invalid ids are ignored
+def test_parse_scores_by_id():
+    response = 'Here are 3 scores:\n```json\n{"a1": 85, "b2": "40%", "zz": 99, "c3": 250, "d4": true}\n```'
+    assert scoring_protocol.parse_scores(response, ["a1", "b2", "c3", "d4"]) == {"a1": 85, "b2": 40}
+
+def test_parse_scores_invalid_response():
+    assert scoring_protocol.parse_scores(None, ["a1"]) == {}
+    assert scoring_protocol.parse_scores("90 80 70", ["a1"]) == {}
+    assert scoring_protocol.parse_scores("{not json}", ["a1"]) == {}
+
+def test_build_prompt_lists_ids_and_titles():
+    prompt = scoring_protocol.build_prompt([("a1", "Python Dev"), ("b2", 'Senior "Go" Engineer')])
+    assert '{"id": "a1", "title": "Python Dev"}' in prompt
+    assert '\\"Go\\"' in prompt
@@ -0,0 +1,81 @@
+import asyncio
+from utils import score_cache, scoring_service, rate_limit
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def temp_cache(tmp_path, monkeypatch):
+    cache = score_cache.ScoreCache(str(tmp_path / "scores.db"), model="test")
+    monkeypatch.setattr(score_cache, "_cache", cache)
+    yield cache
+    cache.close()
+
+# Titles from several workers are merged into one request and each worker gets its own scores
+def test_titles_from_workers_are_batched(temp_cache):
+    requests = []
+
+    async def fake_score(items):
+        requests.append([title for _, title in items])
+        return {title: len(title) for _, title in items}
+
+    async def run():
+        service = scoring_service.ScoringService(max_batch=10, max_wait=0.05, score_items=fake_score)
+        results = await asyncio.gather(
+            service.score_many([("j1", "Python Dev"), ("j2", "Nurse")]),
+            service.score_many([("j3", "DevOps Engineer"), ("j4", "Python Dev")]),
+            service.score_many([("j5", "Data Engineer")]),
+        )
+        await service.stop()
+        return results
+
+    temp_cache.put_many({"Data Engineer": 77})
+    first, second, third = asyncio.run(run())
+
+    assert len(requests) == 1
+    assert sorted(requests[0]) == ["DevOps Engineer", "Nurse", "Python Dev"]
+    assert first == {"Python Dev": 10, "Nurse": 5}
+    assert second == {"DevOps Engineer": 15, "Python Dev": 10}
+    assert third == {"Data Engineer": 77}
+
+# A full batch goes out without waiting for the deadline
+def test_max_batch_splits_requests():
+    requests = []
+
+    async def fake_score(items):
+        requests.append(len(items))
+        return {}
+
+    async def run():
+        service = scoring_service.ScoringService(max_batch=2, max_wait=10, score_items=fake_score)
+        await asyncio.wait_for(service.score_many([("1", "a"), ("2", "b"), ("3", "c"), ("4", "d")]), 1)
+        await service.stop()
+
+    asyncio.run(run())
+    assert requests == [2, 2]
+
+def test_token_bucket_waits_for_refill():
+    bucket = rate_limit.TokenBucket(per_minute=60)
+    bucket.take(60)
+    assert bucket.wait_time(1) == pytest.approx(1, abs=0.05)
+    assert bucket.wait_time(1000) == pytest.approx(60, abs=0.1)
+
+# A limit of 0 in Settings means no limit instead of dividing by zero
+def test_token_bucket_zero_is_unlimited():
+    bucket = rate_limit.TokenBucket(per_minute=0)
+    bucket.take(100)
+    assert bucket.wait_time(100) == 0
+
+# Ids left out of the answer are asked again in a smaller request
+def test_score_with_ai_re_asks_missing_ids(monkeypatch, temp_cache):
+    prompts = []
+    answers = iter(['Sure! {"a": 90, "b": "oops"}', '```json\n{"b": 40, "c": 15}\n```'])
+
+    async def fake_llm(prompt):
+        prompts.append(prompt)
+        return next(answers)
+    monkeypatch.setattr(scoring_service.helper, "get_match_percentage", fake_llm)
+
+    scores = asyncio.run(scoring_service.score_with_ai([("a", "Python Dev"), ("b", "Nurse")], retries=2))
+    assert scores == {"Python Dev": 90, "Nurse": 40}
+    assert len(prompts) == 2 and '"Nurse"' in prompts[1] and '"Python Dev"' not in prompts[1]
+    assert temp_cache.get_many(["Nurse"]) == {"Nurse": 40}
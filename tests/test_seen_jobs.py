@@ -0,0 +1,94 @@
+import time, multiprocessing
+from utils.seen_jobs import SeenJobsStore, RedisSeenJobsStore, open_store
+from config import config_input
+import pytest
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SeenJobsStore(str(tmp_path / "seen_jobs.db"))
+    yield store
+    store.close()
+
+# Only the first claim of a job id is reported as new
+def test_claim_new_returns_first_seen_ids(store):
+    assert store.claim_new([("a", "/rc/clk?jk=a"), ("b", "/rc/clk?jk=b")]) == {"a", "b"}
+    assert store.claim_new([("b", "/rc/clk?jk=b"), ("c", "/rc/clk?jk=c"), (None, "x")]) == {"c"}
+    assert "a" in store and "z" not in store
+    assert len(store) == 3
+
+# Jobs seen again refresh last_seen and survive eviction, others are removed
+def test_evict_older_than_uses_last_seen(store, monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now - 10 * 86400)
+    store.claim_new([("old", None), ("relisted", None)])
+
+    monkeypatch.setattr(time, "time", lambda: now)
+    store.claim_new([("relisted", None)])
+
+    assert store.evict_older_than(5) == 1
+    assert "old" not in store and "relisted" in store
+
+# The legacy processed_jobs.txt is imported once into an empty store
+def test_import_legacy_file(store, tmp_path):
+    legacy = tmp_path / "processed_jobs.txt"
+    legacy.write_text("/rc/clk?jk=111&vjs=3\n/rc/clk?jk=222&vjs=3\n")
+
+    assert store.import_legacy_file(str(legacy)) == 2
+    assert store.import_legacy_file(str(legacy)) == 0
+    assert "111" in store and "222" in store
+
+# By default the tracked history in config/ is imported
+def test_import_legacy_file_default(store):
+    assert store.import_legacy_file() > 0
+    assert "bae7eb5f4f6fc810" in store
+
+# A company is counted until it has more than `limit` jobs, and counts start over with a reset
+def test_count_company_job(store):
+    assert [store.count_company_job("Acme", 1) for _ in range(3)] == [True, True, False]
+    assert store.count_company_job("Globex", 1)
+    store.reset_company_counts()
+    assert store.count_company_job("Acme", 1)
+
+def _claim_in_process(db_path, job_ids, results):
+    store = SeenJobsStore(db_path)
+    results.put(sorted(store.claim_new((job_id, None) for job_id in job_ids)))
+    store.close()
+
+# Two processes claiming the same ids never both get the same one
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_claim_new_is_process_safe(tmp_path):
+    db_path = str(tmp_path / "shared.db")
+    SeenJobsStore(db_path).claim_new([("warmup", None)])
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    job_ids = [f"jk{i}" for i in range(300)]
+    processes = [context.Process(target=_claim_in_process, args=(db_path, job_ids, results)) for _ in range(2)]
+    for process in processes:
+        process.start()
+    first, second = results.get(timeout=30), results.get(timeout=30)
+    for process in processes:
+        process.join()
+    assert not set(first) & set(second)
+    assert sorted(first + second) == sorted(job_ids)
+
+# Two Redis stores (two machines) never both claim a job, and company counts are shared
+def test_redis_claim_new_across_stores(redis_url):
+    first, second = RedisSeenJobsStore(redis_url), RedisSeenJobsStore(redis_url)
+    assert first.claim_new([("a", "/rc/clk?jk=a"), ("b", None)]) == {"a", "b"}
+    assert second.claim_new([("b", None), ("c", None), (None, "x")]) == {"c"}
+    assert "c" in first and len(first) == 3
+
+    assert [store.count_company_job("Acme", 1) for store in (first, second, first)] == [True, True, False]
+    second.reset_company_counts()
+    assert first.count_company_job("Acme", 1)
+
+# Without SEEN_JOBS_URL a Redis task queue keeps the seen jobs too, a sqlite one leaves them in the local file
+def test_open_store_follows_the_task_queue(redis_url, monkeypatch):
+    monkeypatch.setattr(config_input, "SEEN_JOBS_URL", "")
+    monkeypatch.setattr(config_input, "TASK_QUEUE_URL", redis_url)
+    assert isinstance(open_store(), RedisSeenJobsStore)
+    monkeypatch.setattr(config_input, "TASK_QUEUE_URL", "sqlite:///tasks.db")
+    assert isinstance(open_store(), SeenJobsStore)
+    with pytest.raises(ValueError):
+        open_store("sqlite:///seen.db")
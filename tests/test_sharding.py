@@ -0,0 +1,37 @@
+import os, json
+from scrapers import sharding
+from utils import run_report
+
+
+def test_shard_urls_keeps_order():
+    urls = [f"u{i}" for i in range(7)]
+    assert sharding.shard_urls(urls, 3) == [["u0", "u1", "u2"], ["u3", "u4"], ["u5", "u6"]]
+    # Never more shards than URLs
+    assert sharding.shard_urls(urls[:2], 4) == [["u0"], ["u1"]]
+
+# Rows written by each worker process end up in the main output files
+def test_merge_outputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding.config_input, "OUTPUT_DIR", str(tmp_path))
+    (tmp_path / "Easy_applies.csv").write_text("")
+    for shard, rows in enumerate(["a,1\r\n", "b,2\r\nc,3\r\n"]):
+        os.makedirs(sharding.shard_dir(shard))
+        with open(os.path.join(sharding.shard_dir(shard), "Easy_applies.csv"), "w", newline="") as f:
+            f.write(rows)
+    sharding.merge_outputs(range(2))
+
+    assert (tmp_path / "Easy_applies.csv").read_text() == "a,1\nb,2\nc,3\n"
+    assert not (tmp_path / "shards").exists()
+
+# The parent's report shows the workers' counters: counts add up, differing text is listed per shard
+def test_merge_reports(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding.config_input, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(run_report, "_sections", {"Resource blocking": lambda: {"blocked requests": {}}})
+    os.makedirs(tmp_path / "shards")
+    for shard, (blocked, profile) in enumerate([(3, "minimal"), (4, "stealth-safe")]):
+        with open(sharding.report_path(shard), "w") as f:
+            json.dump({"Resource blocking": {"blocked requests": {"image": blocked}, "profile": profile}}, f)
+    sharding.merge_reports(range(3))
+
+    assert run_report.collect() == {
+        "Resource blocking": {"blocked requests": {"image": 7}, "profile": "minimal | stealth-safe"},
+    }
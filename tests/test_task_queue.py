@@ -0,0 +1,120 @@
+import asyncio, time
+from utils.task_queue import SQLiteTaskQueue, RedisTaskQueue, open_queue
+from scrapers import distributed
+import pytest
+
+
+URLS = ["https://indeed.com/jobs?q=python", "https://indeed.com/jobs?q=django", "https://indeed.com/jobs?q=aws"]
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SQLiteTaskQueue(str(tmp_path / "tasks.db"), run="2026-01-01", lease_seconds=60, max_attempts=2)
+    yield queue
+    queue.close()
+
+# Only the first worker creates the run, every URL is leased once and in order
+def test_enqueue_and_lease(queue):
+    assert queue.enqueue(URLS)
+    assert not SQLiteTaskQueue(queue.db_path, run=queue.run).enqueue(URLS)
+
+    first, second = queue.lease("node-a"), queue.lease("node-b")
+    assert (first.url, first.index) == (URLS[0], 0)
+    assert (second.url, second.index) == (URLS[1], 1)
+    queue.complete(first, "node-a")
+    assert queue.summary() == {"run": "2026-01-01", "done": 1, "queued": 1, "leased": 1, "failed": 0}
+
+# Without a run id, launches join the run that has URLs left and start a new one once it is done
+def test_automatic_run_id(tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+    first = SQLiteTaskQueue(db_path, run=None)
+    assert first.enqueue(URLS[:1]) and first.run
+
+    joined = SQLiteTaskQueue(db_path, run=None)
+    assert not joined.enqueue(URLS[:1]) and joined.run == first.run
+
+    task = joined.lease("node-b")
+    joined.complete(task, "node-b")
+    later = SQLiteTaskQueue(db_path, run=None)
+    assert later.enqueue(URLS[:1]) and later.run != first.run
+    assert later.lease("node-c").url == URLS[0]
+
+# A task whose worker stopped heartbeating goes to another worker, and the old worker cannot extend it
+def test_expired_lease_is_requeued(queue, monkeypatch):
+    queue.enqueue(URLS[:1])
+    task = queue.lease("dead-node")
+    assert queue.heartbeat(task, "dead-node")
+    assert queue.lease("node-b") is None
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    retried = queue.lease("node-b")
+    assert retried.url == URLS[0]
+    assert not queue.heartbeat(task, "dead-node")
+    assert queue.heartbeat(retried, "node-b")
+
+# After max_attempts leases a task is failed instead of retried forever
+def test_task_fails_after_max_attempts(queue):
+    queue.enqueue(URLS[:1])
+    for _ in range(2):
+        queue.release(queue.lease("node"), "node")
+    assert queue.lease("node") is None
+    assert queue.summary()["failed"] == 1
+    assert queue.pending() == 0
+
+def test_open_queue_rejects_unknown_url():
+    with pytest.raises(ValueError):
+        open_queue("ftp://example.com", run="x")
+
+# Lease loops of several workers share the URLs and stop when the run is done
+def test_lease_loops_drain_the_queue(queue):
+    queue.enqueue(URLS)
+    seen = []
+
+    async def run_task(url, index):
+        await asyncio.sleep(0.01)
+        seen.append(index)
+
+    async def run():
+        await asyncio.gather(*(distributed.lease_loop(queue, f"worker-{n}", run_task, interval=0.01) for n in range(2)))
+
+    asyncio.run(run())
+    assert sorted(seen) == [0, 1, 2]
+    assert queue.summary()["done"] == 3
+
+# The Redis backend leases in order, hands an expired lease to another worker and fails a task after max_attempts
+def test_redis_lease_expiry_and_max_attempts(redis_url, monkeypatch):
+    queue = RedisTaskQueue(redis_url, run="2026-01-01", lease_seconds=60, max_attempts=2)
+    assert queue.enqueue(URLS[:2])
+    assert not RedisTaskQueue(redis_url, run="2026-01-01").enqueue(URLS[:2])
+
+    first = queue.lease("dead-node")
+    assert (first.url, first.index) == (URLS[0], 0)
+    second = queue.lease("node-b")
+    assert second.url == URLS[1]
+    assert queue.lease("node-b") is None and queue.pending() == 2
+    queue.complete(second, "node-b")
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    retried = queue.lease("node-b")
+    assert retried.url == URLS[0]
+    assert not queue.heartbeat(first, "dead-node")
+    assert queue.heartbeat(retried, "node-b")
+
+    queue.release(retried, "node-b")
+    assert queue.lease("node-b") is None
+    assert queue.summary() == {"run": "2026-01-01", "done": 1, "queued": 0, "leased": 0, "failed": 1}
+
+# Without a run id Redis launches join the run that has URLs left, and start a new one once it is done
+def test_redis_automatic_run_id(redis_url):
+    first = open_queue(redis_url)
+    assert first.enqueue(URLS[:1]) and first.run
+
+    joined = open_queue(redis_url)
+    assert not joined.enqueue(URLS[:1]) and joined.run == first.run
+
+    task = joined.lease("node-b")
+    joined.complete(task, "node-b")
+    assert joined.summary()["done"] == 1 and joined.pending() == 0
+    later = open_queue(redis_url)
+    assert later.enqueue(URLS[:1]) and later.run != first.run
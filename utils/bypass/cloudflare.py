@@ -1,5 +1,4 @@
 import asyncio, json, os
-from twocaptcha import TwoCaptcha
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,9 +9,11 @@ class CloudflareBypasser:
         self.api_key = os.getenv("2CAPTCHA_API_KEY")
         self.captured_params = None
         self.console_listener = None
+        self.challenged = False
      
     async def detect_and_bypass(self):
         if await self.page.locator("text='Additional Verification Required'").is_visible():
+            self.challenged = True
             print("[+] Attempting Cloudflare Bypass")
             params = await self.get_captcha_params()
             if params:
@@ -75,6 +76,7 @@ class CloudflareBypasser:
         return await loop.run_in_executor(None, self.solve_captcha_sync, params)
     
     def solve_captcha_sync(self, params):
+        from twocaptcha import TwoCaptcha
         solver = TwoCaptcha(self.api_key)
         try:
             result = solver.turnstile(
@@ -0,0 +1,246 @@
+import json, time
+import logging
+from config import config_input
+from utils.sqlite_store import SQLiteStore
+from utils.task_queue import REDIS_SCHEMES, new_run_id
+
+# Logger
+logger = logging.getLogger("spider")
+
+
+class CheckpointStore(SQLiteStore):
+    """SQLite (WAL) checkpoints of in-progress searches, so a crashed run resumes where it stopped.
+
+    Per search URL of a run it keeps the last listing page done. Jobs listed but
+    not yet scored, and matches scored but not yet extracted, stay pending until
+    their stage is done with them; they are already in the seen-jobs store, so
+    without a checkpoint they would never be listed again.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            run TEXT PRIMARY KEY,
+            started REAL NOT NULL,
+            finished REAL
+        );
+        CREATE TABLE IF NOT EXISTS pages (
+            run TEXT NOT NULL,
+            url TEXT NOT NULL,
+            page INTEGER NOT NULL,
+            done INTEGER NOT NULL DEFAULT 0,
+            cutoff TEXT,
+            PRIMARY KEY (run, url)
+        );
+        CREATE TABLE IF NOT EXISTS pending_jobs (
+            jk TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            link TEXT NOT NULL,
+            job TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS pending_matches (
+            link TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            percentage REAL NOT NULL
+        );
+    """
+
+    def __init__(self, db_path=config_input.CHECKPOINT_DB_PATH):
+        super().__init__(db_path)
+        self.run = None
+        # Whether begin_run picked up a run that had already started
+        self.resumed = False
+        # Start time of the last finished run before this one, or None
+        self.last_run_started = None
+
+    def begin_run(self, run=None):
+        """Use run `run`, else resume the last unfinished run, else start a new one; returns the run id."""
+        def work(conn):
+            if run:
+                # A named run whose last worker crashed is never finished, so pages of the earlier ones are dropped here
+                created = conn.execute("INSERT OR IGNORE INTO runs (run, started) VALUES (?, ?)", (run, time.time())).rowcount
+                conn.execute("DELETE FROM pages WHERE run != ?", (run,))
+                return run, not created
+            row = conn.execute("SELECT run FROM runs WHERE finished IS NULL ORDER BY started DESC LIMIT 1").fetchone()
+            if row:
+                logger.info(f"Resuming unfinished run {row[0]}")
+                return row[0], True
+            new_run = base = time.strftime("%Y-%m-%dT%H-%M-%S")
+            while conn.execute("SELECT 1 FROM runs WHERE run = ?", (new_run,)).fetchone():
+                new_run = f"{base}-{int(new_run[len(base) + 1:] or 1) + 1}"
+            conn.execute("INSERT INTO runs (run, started) VALUES (?, ?)", (new_run, time.time()))
+            return new_run, False
+        self.run, self.resumed = self.transaction(work)
+        self.last_run_started = self.conn.execute(
+            "SELECT MAX(started) FROM runs WHERE finished IS NOT NULL AND run != ?", (self.run,)
+        ).fetchone()[0]
+        return self.run
+
+    def finish_run(self):
+        """Mark the run finished; its page checkpoints are dropped, pending work is kept for the next run."""
+        def work(conn):
+            conn.execute("UPDATE runs SET finished = ? WHERE run = ?", (time.time(), self.run))
+            conn.execute("DELETE FROM pages WHERE run = ?", (self.run,))
+        self.transaction(work)
+
+    def resume(self, url):
+        """(last page done or 0, pagination finished, pending jobs, pending matches) of search `url`."""
+        row = self.conn.execute("SELECT page, done FROM pages WHERE run = ? AND url = ?", (self.run, url)).fetchone()
+        jobs = [json.loads(job) for job, in self.conn.execute("SELECT job FROM pending_jobs WHERE url = ?", (url,))]
+        matches = [
+            (link, percentage)
+            for link, percentage in self.conn.execute("SELECT link, percentage FROM pending_matches WHERE url = ?", (url,))
+        ]
+        page, done = row or (0, 0)
+        return page, bool(done), jobs, matches
+
+    def save_page(self, url, page, jobs):
+        """Record page `page` of `url` as done, together with the jobs it queued for scoring."""
+        def work(conn):
+            conn.executemany(
+                "INSERT OR REPLACE INTO pending_jobs (jk, url, link, job) VALUES (?, ?, ?, ?)",
+                [(job["jk"], url, job["link"], json.dumps(job)) for job in jobs]
+            )
+            conn.execute(
+                """
+                INSERT INTO pages (run, url, page) VALUES (?, ?, ?)
+                ON CONFLICT(run, url) DO UPDATE SET page = excluded.page
+                """,
+                (self.run, url, page)
+            )
+        self.transaction(work)
+
+    def finish_url(self, url, cutoff=None):
+        """Pagination of `url` is over; `cutoff` says why it stopped before the last page."""
+        self.conn.execute("UPDATE pages SET done = 1, cutoff = ? WHERE run = ? AND url = ?", (cutoff, self.run, url))
+
+    def scored(self, jobs, matches):
+        """Jobs of a scored batch leave the pending list; their `matches` wait for extraction."""
+        def work(conn):
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO pending_matches (link, url, percentage)
+                SELECT link, url, ? FROM pending_jobs WHERE link = ?
+                """,
+                [(percentage, link) for link, percentage in matches]
+            )
+            conn.executemany("DELETE FROM pending_jobs WHERE jk = ?", [(job["jk"],) for job in jobs])
+        self.transaction(work)
+
+    def extracted(self, link):
+        self.conn.execute("DELETE FROM pending_matches WHERE link = ?", (link,))
+
+    def summary(self):
+        jobs = self.conn.execute("SELECT COUNT(*) FROM pending_jobs").fetchone()[0]
+        matches = self.conn.execute("SELECT COUNT(*) FROM pending_matches").fetchone()[0]
+        return {"run": self.run, "pending jobs": jobs, "pending matches": matches}
+
+
+class RedisCheckpointStore:
+    """The same checkpoints on a Redis-compatible server, so a machine that takes over a search URL finds the work left behind.
+
+    Pending jobs and matches are kept per search URL, with an index by job id and
+    link so the scoring and extraction stages can drop them without knowing the URL.
+    """
+
+    def __init__(self, url, prefix="careerflow:checkpoints"):
+        import redis
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.run = None
+        self.resumed = False
+        self.last_run_started = None
+
+    def _key(self, *parts):
+        return ":".join((self.prefix, *parts))
+
+    def begin_run(self, run=None):
+        """Same as CheckpointStore.begin_run."""
+        started = self.redis.hgetall(self._key("runs"))
+        finished = self.redis.hgetall(self._key("finished"))
+        if run:
+            self.resumed = not self.redis.hsetnx(self._key("runs"), run, time.time())
+            for other in started.keys() - {run}:
+                self.redis.delete(self._key("pages", other), self._key("done", other))
+        else:
+            unfinished = sorted((float(at), name) for name, at in started.items() if name not in finished)
+            if unfinished:
+                run = unfinished[-1][1]
+                logger.info(f"Resuming unfinished run {run}")
+                self.resumed = True
+            else:
+                run = new_run_id()
+                self.redis.hset(self._key("runs"), run, time.time())
+                self.resumed = False
+        self.run = run
+        self.last_run_started = max((float(started[name]) for name in finished if name != run and name in started), default=None)
+        return self.run
+
+    def finish_run(self):
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key("finished"), self.run, time.time())
+        pipe.delete(self._key("pages", self.run), self._key("done", self.run))
+        pipe.execute()
+
+    def resume(self, url):
+        page = self.redis.hget(self._key("pages", self.run), url)
+        done = self.redis.hexists(self._key("done", self.run), url)
+        jobs = [json.loads(job) for job in self.redis.hvals(self._key("jobs", url))]
+        matches = [(link, float(percentage)) for link, percentage in self.redis.hgetall(self._key("matches", url)).items()]
+        return int(page or 0), done, jobs, matches
+
+    def save_page(self, url, page, jobs):
+        pipe = self.redis.pipeline()
+        for job in jobs:
+            pipe.hset(self._key("jobs", url), job["jk"], json.dumps(job))
+            pipe.hset(self._key("job_urls"), job["jk"], url)
+        pipe.hset(self._key("pages", self.run), url, page)
+        pipe.execute()
+
+    def finish_url(self, url, cutoff=None):
+        self.redis.hset(self._key("done", self.run), url, cutoff or "")
+
+    def scored(self, jobs, matches):
+        jks = [job["jk"] for job in jobs]
+        urls = dict(zip(jks, self.redis.hmget(self._key("job_urls"), jks))) if jks else {}
+        link_urls = {job["link"]: urls[job["jk"]] for job in jobs if urls[job["jk"]]}
+        pipe = self.redis.pipeline()
+        for link, percentage in matches:
+            if link in link_urls:
+                pipe.hset(self._key("matches", link_urls[link]), link, percentage)
+                pipe.hset(self._key("match_urls"), link, link_urls[link])
+        for jk, url in urls.items():
+            if url:
+                pipe.hdel(self._key("jobs", url), jk)
+                pipe.hdel(self._key("job_urls"), jk)
+        pipe.execute()
+
+    def extracted(self, link):
+        url = self.redis.hget(self._key("match_urls"), link)
+        if url:
+            pipe = self.redis.pipeline()
+            pipe.hdel(self._key("matches", url), link)
+            pipe.hdel(self._key("match_urls"), link)
+            pipe.execute()
+
+    def summary(self):
+        return {"run": self.run, "pending jobs": self.redis.hlen(self._key("job_urls")), "pending matches": self.redis.hlen(self._key("match_urls"))}
+
+    def close(self):
+        self.redis.close()
+
+
+_store = None
+
+def get_store(run=None):
+    """Return the process-wide checkpoint store; the first call begins its run (`run` is the task queue's run in distributed mode).
+
+    With a Redis task queue the checkpoints are kept on the same server, so a dead machine's pending jobs are not stranded.
+    """
+    global _store
+    if _store is None:
+        if config_input.TASK_QUEUE_URL.startswith(REDIS_SCHEMES):
+            _store = RedisCheckpointStore(config_input.TASK_QUEUE_URL)
+        else:
+            _store = CheckpointStore()
+        _store.begin_run(run)
+    return _store
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import aiohttp
+from config import config_input
+
+# Logger
+logger = logging.getLogger("spider")
+
+
+class ConnectivityMonitor:
+    """One background task that probes the internet for the whole process.
+
+    Workers call `wait_online()` at their checkpoints. While the link is up that
+    returns at once; when it drops every worker pauses on the same event and all
+    of them resume together once a probe succeeds again.
+    """
+
+    test_sites = [
+        "https://1.1.1.1",
+        "https://www.cloudflare.com",
+        "https://example.com",
+        "https://www.bing.com"
+    ]
+
+    def __init__(self, interval=config_input.CONNECTIVITY_PROBE_INTERVAL, timeout=10):
+        self.interval = interval
+        self.timeout = timeout
+        self.online = asyncio.Event()
+        self.paused = False
+        self.session = None
+        self._task = None
+        self._wakeup = asyncio.Event()
+
+    async def start(self):
+        """Open the pooled session, run a first probe and start the background task."""
+        if self._task:
+            return
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=len(self.test_sites))
+        )
+        await self._update(await self.probe())
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def probe(self):
+        """Return True as soon as one test site answers with 200."""
+        for site in self.test_sites:
+            try:
+                async with self.session.get(site) as response:
+                    if response.status == 200:
+                        return True
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass  # Ignore failed site and try next
+        return False
+
+    async def _update(self, is_online):
+        if is_online and not self.paused:
+            if not self.online.is_set():
+                logger.info("✅ Internet connection available, resuming all contexts.")
+            self.online.set()
+        elif not is_online and self.online.is_set():
+            logger.warning("❌ Internet connection lost. Pausing all contexts...")
+            self.online.clear()
+
+    async def _run(self):
+        while True:
+            # Probe more often while offline so workers resume quickly.
+            interval = self.interval if self.online.is_set() else min(self.interval, 10)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self._update(await self.probe())
+            except Exception:
+                logger.exception("Connectivity probe failed")
+
+    def pause(self):
+        """Hold every worker at its next checkpoint until `resume()`."""
+        self.paused = True
+        self.online.clear()
+        logger.info("⏸ All contexts paused")
+
+    def resume(self):
+        """Allow workers to continue once the next probe succeeds."""
+        self.paused = False
+        self._wakeup.set()
+
+    async def wait_online(self, page=None):
+        """Return immediately while online, otherwise wait for the link and reload `page`."""
+        if self.online.is_set():
+            return
+        await self.online.wait()
+        if page:
+            try:
+                await page.reload()
+            except Exception as e:
+                logger.warning(f"Reload after reconnect failed: {e}")
+
+
+# Shared by every context of this process
+monitor = ConnectivityMonitor()
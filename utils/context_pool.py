@@ -0,0 +1,113 @@
+import os, asyncio
+import logging
+from collections import Counter
+from config import config_input
+
+# Logger
+logger = logging.getLogger("spider")
+
+
+class ContextPool:
+    """Warm browser contexts, each bound to one identity (proxy, fingerprint, account) index.
+
+    A context is built on first use and reused for the next search URLs. Its
+    storage state (cookies, localStorage, Cloudflare clearance) is saved to
+    `state_dir` when it is retired and restored when that identity is built
+    again, in this run or the next one. Contexts are retired after `max_pages`
+    listing pages or once a page's JS heap passes `max_heap_mb`.
+    """
+
+    def __init__(self, build_context, identities, max_pages=config_input.CONTEXT_MAX_PAGES,
+                 max_heap_mb=config_input.CONTEXT_MAX_HEAP_MB, state_dir=config_input.STORAGE_STATE_DIR):
+        # build_context(index, storage_state_path_or_None) -> configured context
+        self.build_context = build_context
+        self.max_pages = max_pages
+        self.max_heap_mb = max_heap_mb
+        self.state_dir = state_dir
+        self.idle = asyncio.Queue()
+        for index in identities:
+            self.idle.put_nowait(index)
+        self.contexts = {}
+        self.pages = Counter()
+        self.built = 0
+        self.restored = 0
+        self.reused = 0
+        self.recycled = 0
+
+    def state_path(self, index):
+        return os.path.join(self.state_dir, f"identity-{index}.json")
+
+    async def open(self, index):
+        """Build the context of identity `index`, restoring its saved storage state if there is one."""
+        path = self.state_path(index)
+        storage_state = path if os.path.exists(path) else None
+        try:
+            context = await self.build_context(index, storage_state)
+        except Exception:
+            if storage_state is None:
+                raise
+            # A corrupt or outdated state file must not take the identity down
+            logger.warning(f"Could not restore {path}, starting identity {index} fresh")
+            os.remove(path)
+            storage_state = None
+            context = await self.build_context(index, None)
+        self.contexts[index] = context
+        self.built += 1
+        self.restored += storage_state is not None
+        return context
+
+    async def acquire(self):
+        """Wait for an idle identity and return (index, context)."""
+        index = await self.idle.get()
+        try:
+            if index in self.contexts:
+                self.reused += 1
+                return index, self.contexts[index]
+            return index, await self.open(index)
+        except BaseException:
+            self.idle.put_nowait(index)
+            raise
+
+    async def release(self, index, pages=1, heap_bytes=0):
+        """Give the identity back after `pages` listing pages; recycle its context when it is worn out."""
+        self.pages[index] += pages
+        if self.pages[index] >= self.max_pages or heap_bytes > self.max_heap_mb * 1024 * 1024:
+            logger.info(f"Recycling context {index} after {self.pages[index]} pages ({heap_bytes / 1024 / 1024:.0f} MB heap)")
+            self.recycled += 1
+            await self.retire(index)
+        self.idle.put_nowait(index)
+
+    async def save_state(self, index):
+        context = self.contexts.get(index)
+        if context is None:
+            return
+        os.makedirs(self.state_dir, exist_ok=True)
+        path = self.state_path(index)
+        # Write next to the target and swap, so a crash never leaves half a file
+        await context.storage_state(path=path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    async def retire(self, index):
+        """Save the storage state of identity `index` and close its context."""
+        try:
+            await self.save_state(index)
+        except Exception as e:
+            logger.warning(f"Could not save storage state of context {index}: {e}")
+        context = self.contexts.pop(index, None)
+        self.pages[index] = 0
+        if context:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.error(f"Context close issue: {e}")
+
+    async def close(self):
+        for index in list(self.contexts):
+            await self.retire(index)
+
+    def summary(self):
+        return {
+            "contexts built": f"{self.built} ({self.restored} from saved state)",
+            "reused for another URL": self.reused,
+            "recycled": self.recycled,
+        }
@@ -0,0 +1,266 @@
+"""
+Declarative DOM extraction, compiled into a single page.evaluate call.
+
+A spec maps field names to how they are read:
+    {"selectors": [...]}                 innerText of the first selector that matches
+    {"selectors": [...], "attr": "href"} attribute of the first selector that matches
+    {"kind": "has_text", "text": ...}    True when the visible page text contains `text` (like :has-text)
+    {"kind": "html_contains_any", "values": [...]}  True when the page HTML contains any value
+
+With a "root" list, the fields are read inside every element of the first root
+selector that matches and a list of dicts is returned (one per listing card),
+otherwise one dict for the whole document.
+"""
+
+import json, re
+from urllib.parse import urlparse, parse_qs
+from html.parser import HTMLParser
+from config import config_input
+
+_INTERPRETER = """
+(spec) => {
+    const pick = (root, selectors) => {
+        for (const selector of selectors) {
+            const el = root.querySelector(selector);
+            if (el) return el;
+        }
+        return null;
+    };
+    // Visible page text, read once: like :has-text, text inside script/style/noscript/template does not count
+    let pageText = null;
+    const visibleText = () => {
+        if (pageText === null) {
+            const parts = [];
+            const walker = document.createTreeWalker(document.body || document.documentElement, NodeFilter.SHOW_TEXT, {
+                acceptNode: node => node.parentElement && node.parentElement.closest('script, style, noscript, template')
+                    ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT
+            });
+            while (walker.nextNode()) parts.push(walker.currentNode.nodeValue);
+            pageText = parts.join(' ').replace(/\\s+/g, ' ').toLowerCase();
+        }
+        return pageText;
+    };
+    const read = (root, field) => {
+        if (field.kind === 'has_text') {
+            return visibleText().includes(field.text.toLowerCase());
+        }
+        if (field.kind === 'html_contains_any') {
+            const html = document.documentElement.outerHTML;
+            return field.values.some(value => html.includes(value));
+        }
+        const el = pick(root, field.selectors);
+        if (!el) return null;
+        if (field.attr) return el.getAttribute(field.attr);
+        return (el.innerText || '').trim();
+    };
+    const record = root => {
+        const result = {};
+        for (const [name, field] of Object.entries(spec.fields)) result[name] = read(root, field);
+        return result;
+    };
+    if (!spec.root) return record(document);
+    for (const selector of spec.root) {
+        const cards = document.querySelectorAll(selector);
+        if (cards.length) return Array.from(cards, record);
+    }
+    return [];
+}
+"""
+
+
+def compile_spec(spec):
+    """Return the JS expression that extracts `spec` in one round trip."""
+    return f"() => ({_INTERPRETER})({json.dumps(spec)})"
+
+
+# One dict per job card on a search results page, title, company and link stay paired per card.
+LISTING_CARD_SPEC = {
+    "root": ["div.job_seen_beacon", "li div.cardOutline", "td.resultContent"],
+    "fields": {
+        "title": {"selectors": [".jobTitle"]},
+        "company": {"selectors": ["[data-testid='company-name']"]},
+        "link": {"selectors": [".jobTitle a", "a.jcs-JobTitle", "tr td a"], "attr": "href"},
+    },
+}
+
+# Everything a detail worker needs from a job detail page.
+DETAIL_SPEC = {
+    "fields": {
+        "company_name": {"selectors": ['[data-testid="company-name"]', '[data-testid="inlineHeader-companyName"]']},
+        "job_title": {"selectors": ['[data-testid="jobsearch-JobInfoHeader-title"] span']},
+        "salary": {"selectors": ["#salaryInfoAndJobType"]},
+        "job_other_details": {"selectors": ['[data-testid="jobsearch-CompanyInfoContainer"]']},
+        "benefits": {"selectors": ['[data-testid="benefits-test"]']},
+        "full_description": {"selectors": ["#jobDescriptionText"]},
+        "avoid": {"kind": "html_contains_any", "values": config_input.AVIOD_JOBS},
+        "expired": {"kind": "has_text", "text": "This job has expired on Indeed"},
+        "company_site_apply": {"kind": "has_text", "text": "Apply on company site"},
+    },
+}
+
+LISTING_CARD_SCRIPT = compile_spec(LISTING_CARD_SPEC)
+DETAIL_SCRIPT = compile_spec(DETAIL_SPEC)
+
+# Indeed ships the whole result set of a search page as JSON for its job cards component.
+# Snippets are HTML, DOMParser turns them into text without running anything.
+EMBEDDED_JOBS_SCRIPT = """
+() => {
+    const provider = window.mosaic && window.mosaic.providerData && window.mosaic.providerData["mosaic-provider-jobcards"];
+    const model = provider && provider.metaData && provider.metaData.mosaicProviderJobCardsModel;
+    if (!model || !Array.isArray(model.results)) return null;
+    const toText = html => html ? (new DOMParser().parseFromString(html, 'text/html').body.textContent || '').trim() : null;
+    return model.results.map(r => ({
+        jk: r.jobkey || null,
+        title: r.displayTitle || r.title || '',
+        company: r.company || '',
+        location: r.formattedLocation || null,
+        snippet: toText(r.snippet),
+        pub_date: r.pubDate || r.createDate || null,
+        link: r.link || r.viewJobLink || (r.jobkey ? '/viewjob?jk=' + r.jobkey : null),
+    }));
+}
+"""
+
+
+def _job_key(link):
+    return parse_qs(urlparse(link or "").query).get("jk", [None])[0]
+
+
+async def extract_listing_jobs(page):
+    """Return the jobs of a search results page as dicts (jk, title, company, link, location, snippet, pub_date).
+
+    Reads Indeed's embedded job JSON and falls back to the DOM card selectors when it is missing.
+    pub_date is epoch milliseconds when Indeed provides it.
+    """
+    jobs = await page.evaluate(EMBEDDED_JOBS_SCRIPT)
+    if not jobs:
+        cards = await page.evaluate(LISTING_CARD_SCRIPT)
+        jobs = [
+            dict(card, jk=_job_key(card["link"]), location=None, snippet=None, pub_date=None)
+            for card in cards
+        ]
+    return [job for job in jobs if job["jk"] and job["link"]]
+
+
+# --- Browser-free parsing of the same specs, used by the HTTP detail fetch mode ---
+
+_SIMPLE_SELECTOR = re.compile(r"""^(?P<tag>[a-z0-9]+)?(?:#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)|\[(?P<attr>[\w-]+)=["']?(?P<value>[^"'\]]+)["']?\])?$""")
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_BLOCK_TAGS = {"p", "div", "li", "ul", "ol", "br", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "table"}
+_SKIP_TAGS = {"script", "style", "noscript", "template"}
+
+
+def _parse_selector(selector):
+    """Split 'a b' into simple selector steps, each a (tag, attr, value) match rule."""
+    steps = []
+    for part in selector.split():
+        match = _SIMPLE_SELECTOR.match(part)
+        if not match:
+            raise ValueError(f"Unsupported selector for HTML parsing: {selector}")
+        if match["id"]:
+            steps.append((match["tag"], "id", match["id"]))
+        elif match["cls"]:
+            steps.append((match["tag"], "class", match["cls"]))
+        else:
+            steps.append((match["tag"], match["attr"], match["value"]))
+    return steps
+
+
+def _matches(step, tag, attrs):
+    step_tag, attr, value = step
+    if step_tag and step_tag != tag:
+        return False
+    if attr is None:
+        return True
+    if attr == "class":
+        return value in (attrs.get("class") or "").split()
+    return attrs.get(attr) == value
+
+
+def _clean_text(parts):
+    lines = (" ".join(line.split()) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+class _SpecParser(HTMLParser):
+    """Collect the text of the first element matching each selector, plus the page text."""
+
+    def __init__(self, selectors):
+        super().__init__(convert_charrefs=True)
+        self.rules = {selector: _parse_selector(selector) for selector in selectors}
+        self.found = {}
+        self.stack = []        # open elements: (tag, selectors whose first step matched here)
+        self.capturing = {}    # selector -> (stack depth, text parts)
+        self.text_parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in _BLOCK_TAGS:
+            self._add_text("\n")
+        first_step_matches = set()
+        for selector, steps in self.rules.items():
+            if selector in self.found or selector in self.capturing:
+                continue
+            if len(steps) > 1 and _matches(steps[0], tag, attrs):
+                first_step_matches.add(selector)
+            ancestor_ok = len(steps) == 1 or any(selector in matched for _, matched in self.stack)
+            if ancestor_ok and _matches(steps[-1], tag, attrs):
+                self.capturing[selector] = (len(self.stack), [])
+
+        if tag in _VOID_TAGS:
+            self._close_captures(len(self.stack))
+            return
+        if tag in _SKIP_TAGS:
+            self.skip_depth += 1
+        self.stack.append((tag, first_step_matches))
+
+    def handle_endtag(self, tag):
+        if tag in _BLOCK_TAGS:
+            self._add_text("\n")
+        # Pop up to the matching open tag, tolerating unclosed children
+        for depth in range(len(self.stack) - 1, -1, -1):
+            if self.stack[depth][0] == tag:
+                for open_tag, _ in self.stack[depth:]:
+                    if open_tag in _SKIP_TAGS:
+                        self.skip_depth -= 1
+                del self.stack[depth:]
+                self._close_captures(depth)
+                return
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self._add_text(data)
+
+    def _add_text(self, text):
+        self.text_parts.append(text)
+        for _, parts in self.capturing.values():
+            parts.append(text)
+
+    def _close_captures(self, depth):
+        for selector, (start, parts) in list(self.capturing.items()):
+            if start >= depth:
+                self.found[selector] = _clean_text(parts)
+                del self.capturing[selector]
+
+
+def parse_html(html, spec):
+    """Evaluate a spec without a root against raw HTML, returning the same dict as its compiled script."""
+    selectors = [selector for field in spec["fields"].values() for selector in field.get("selectors", [])]
+    parser = _SpecParser(selectors)
+    parser.feed(html)
+    parser.close()
+    parser._close_captures(0)
+    page_text = _clean_text(parser.text_parts).lower()
+
+    result = {}
+    for name, field in spec["fields"].items():
+        kind = field.get("kind")
+        if kind == "has_text":
+            result[name] = field["text"].lower() in page_text
+        elif kind == "html_contains_any":
+            result[name] = any(value in html for value in field["values"])
+        else:
+            result[name] = next((parser.found[s] for s in field["selectors"] if parser.found.get(s)), None)
+    return result
+
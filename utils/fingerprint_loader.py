@@ -1,6 +1,7 @@
 from pathlib import Path
-import json, random
+import os, json, random, hashlib, tempfile
 import logging
+from config import config_input
 
 # Logger
 logger = logging.getLogger("spider")
@@ -8,48 +9,144 @@ logger = logging.getLogger("spider")
 
 BAISE_DIR = Path(__file__).resolve().parent
 FINGERPRINTS_DIR = BAISE_DIR / "fingerprints"
+# Index of the fingerprint files and their rendered init scripts, named by content hash
+CACHE_DIR = BAISE_DIR.parent / "config" / "fingerprint_cache"
+# Bump when build_script changes, so cached scripts are rendered again
+SCRIPT_VERSION = 1
 
-# list of fingerprint 
-fingerprints = []
-seen_user_agent = set() # base on uniqe useragent saved fingerprint
 
-# load and append all fingerprint to list
-for path in FINGERPRINTS_DIR.glob("*.json"):
-    try:
-        with open(path, 'r', encoding = 'utf-8') as f:
-            content = f.read().strip()
-            
-            if not content:
+class FingerprintCatalog:
+    """Fingerprints of `folder`, one per unique user agent, with init scripts cached on disk.
+
+    The index (file, content hash, user agent, weight) is rebuilt only for files
+    whose size or mtime changed; a script is rendered the first time its
+    fingerprint is used and then read from `cache_dir/<hash>-v<SCRIPT_VERSION>.js`.
+    """
+
+    def __init__(self, folder=FINGERPRINTS_DIR, cache_dir=CACHE_DIR, selection=config_input.FINGERPRINT_SELECTION):
+        self.folder = Path(folder)
+        self.cache_dir = Path(cache_dir)
+        self.selection = selection
+        self._entries = None
+        self._scripts = {}
+
+    @property
+    def entries(self):
+        if self._entries is None:
+            self._entries = self._load_index()
+        return self._entries
+
+    def _load_index(self):
+        index_path = self.cache_dir / "index.json"
+        try:
+            cached = json.loads(index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cached = {}
+
+        files, changed = {}, False
+        for path in sorted(self.folder.glob("*.json")):
+            stat = path.stat()
+            entry = cached.get(path.name)
+            if not entry or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                entry = self._index_file(path, stat)
+                changed = True
+            if entry:
+                files[path.name] = entry
+        changed = changed or files.keys() != cached.keys()
+
+        if changed:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            _write_cache(index_path, json.dumps(files))
+
+        # One fingerprint per user agent, the first file wins
+        by_user_agent = {}
+        for entry in files.values():
+            by_user_agent.setdefault(entry["user_agent"], entry)
+        logger.info(f"✔  {len(by_user_agent)} unique fingerprints indexed")
+        return list(by_user_agent.values())
+
+    def _index_file(self, path, stat):
+        try:
+            content = path.read_bytes()
+            if not content.strip():
                 logger.info(f"⚠ Skipped empty file: {path.name}")
-                continue
-        
+                return None
             fingerprint = json.loads(content)
-            user_agent = fingerprint.get("navigator", {}).get("userAgent", "").strip() 
-            
-            if not user_agent:
-               logger.info(f"UserAgent not found {path.name}")  
-
-            if user_agent not in seen_user_agent: 
-                seen_user_agent.add(user_agent)
-                fingerprints.append(fingerprint)
-                # print(f"✔ loaded: {path.name} | UA {user_agent}")
-            else:
-                pass
-                # print(f"🔁 Duplicate skipped: {path.name}")
-    
-    except json.JSONDecodeError as e:
-        logger.error(f"❌ JSON error in {path.name}: {e}")
-    except UnicodeDecodeError as e:
-      logger.error(f"❌ Encoding error in {path.name}: {e}")
-    except Exception as e:
-      logger.error(f"❌ Unexpected error in {path.name}: {e}")
-    
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ JSON error in {path.name}: {e}")
+            return None
+        except UnicodeDecodeError as e:
+            logger.error(f"❌ Encoding error in {path.name}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Unexpected error in {path.name}: {e}")
+            return None
+
+        user_agent = (fingerprint.get("navigator") or {}).get("userAgent", "").strip()
+        if not user_agent:
+            logger.info(f"UserAgent not found {path.name}")
+        return {
+            "file": path.name,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "hash": hashlib.sha256(content).hexdigest()[:16],
+            "user_agent": user_agent,
+            "weight": float(fingerprint.get("weight", 1)),
+        }
+
+    def pick(self, index):
+        """Fingerprint entry for identity `index`, wrapping around; None without fingerprints."""
+        entries = self.entries
+        if not entries:
+            return None
+        if self.selection == "weighted":
+            # Seeded by the index, so an identity keeps its fingerprint across runs
+            return random.Random(index).choices(entries, weights=[entry["weight"] for entry in entries])[0]
+        return entries[index % len(entries)]
+
+    def script(self, entry):
+        """Init script of a fingerprint entry, from memory, the disk cache, or rendered now."""
+        if entry["hash"] in self._scripts:
+            return self._scripts[entry["hash"]]
+
+        path = self.cache_dir / f"{entry['hash']}-v{SCRIPT_VERSION}.js"
+        try:
+            script = path.read_text(encoding="utf-8")
+        except OSError:
+            with open(self.folder / entry["file"], "r", encoding="utf-8") as f:
+                script = build_script(json.load(f))
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            _write_cache(path, script)
+        self._scripts[entry["hash"]] = script
+        return script
+
+
+def _write_cache(path, text):
+    """Write `path` through a temp file of its own, so worker processes filling a cold cache at once never share one."""
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent, suffix=".tmp", delete=False) as f:
+        f.write(text)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        # Another process replaced the same file at that moment (Windows refuses then), its copy is just as good
+        os.remove(f.name)
+        if not path.exists():
+            raise
+
+
+catalog = FingerprintCatalog()
+
+
 async def load_fingerprint(index=0):
-    if index==0:
-        logger.info(f"✔  Unique fingerprints loaded")
+    """Init script of the fingerprint for identity `index`, or None when there are no fingerprints."""
+    entry = catalog.pick(index)
+    if entry is None:
+        logger.warning("No fingerprints found, contexts use the browser's own")
+        return None
+    return catalog.script(entry)
 
-    fingerprint = fingerprints[index]
 
+def build_script(fingerprint):
     # Safe dictionary extractions with fallbacks
     nav = fingerprint.get("navigator") or {}
     screen = fingerprint.get("screen") or {}
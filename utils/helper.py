@@ -1,19 +1,13 @@
 import urllib.parse
-import traceback, os, shutil, csv
+import os, shutil, csv
 from dotenv import load_dotenv
 from playwright.async_api import Page
-import google.generativeai as genai
 import asyncio, random
 import platform, subprocess, ctypes
 from urllib.parse import urlparse, parse_qs
-import smtplib
-from email.message import EmailMessage
-import mimetypes
 from config import config_input
-from groq import Groq
-import logging, requests
-import aiohttp
-from google.api_core.exceptions import ResourceExhausted
+from utils import seen_jobs, score_cache, provider_router
+import logging
 
 # Logger
 logger = logging.getLogger("spider")
@@ -23,10 +17,10 @@ load_dotenv()
 
 # Create CSV file for simultinouly saveing scraping data
 def create_csv_files(file_names):
-    """Create empty CSV files inside output/ directory."""
-    os.makedirs("output", exist_ok=True)
+    """Create empty CSV files inside the output directory."""
+    os.makedirs(config_input.OUTPUT_DIR, exist_ok=True)
     for name in file_names:
-        path = os.path.join("output", f"{name}")
+        path = os.path.join(config_input.OUTPUT_DIR, f"{name}")
         with open(path, mode="w", newline='', encoding="utf-8"):
             pass
         logger.info(f"Created fresh file: {path}")
@@ -71,56 +65,39 @@ async def get_job_id(url):
         return None
 
 
-async def update_processed_jobs(links):
-    """Append new processed jobs to the file."""
-    try:
-        with open(config_input.PROCESSED_JOBS_FILE_PATH, "a") as f:
-            for link in links:
-                f.write(f"{link}\n")
-            f.flush()
-        logger.info(f"Updated processed jobs with {len(links)} new links")
-    except Exception:
-        logger.exception("Failed to update processed jobs")
+def page_url(url, page):
+    """Search URL of result page `page`; Indeed lists 10 jobs per page and skips them with start=."""
+    parts = urllib.parse.urlsplit(url)
+    query = [(key, value) for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True) if key != "start"]
+    if page > 1:
+        query.append(("start", str(10 * (page - 1))))
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
 
 
-# AI matching function
-genai.configure(api_key=os.getenv("GEMIMI_API_KEY"))
-async def get_match_percentage_from_gemini(prompt: str):
-    """Get match percentage using Gemini."""
+async def update_processed_jobs_links(links):
+    """Record processed jobs links in the seen-jobs store in one batch and return the new job IDs."""
     try:
-        model = genai.GenerativeModel(config_input.gemini_model_version)
-        response = await asyncio.to_thread(model.generate_content, prompt)
-        return response.text.strip()
+        jobs = [(await get_job_id(link), link) for link in links]
+        new_ids = seen_jobs.get_store().claim_new(jobs)
+        logger.info(f"Updated processed jobs with {len(new_ids)} new links")
+        return new_ids
     except Exception:
-        logger.exception("Error in get_match_percentage")
-        return None
+        logger.exception("Failed to update processed jobs")
+        return set()
 
 
-async def get_match_percentage_from_groq(prompt):
-    client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-    messages = [{"role": "user", "content": prompt}]
-    
-    try:
-        loop = asyncio.get_event_loop()
-        completion = await loop.run_in_executor(
-            None,
-            lambda: client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=messages,
-                temperature=0,
-                max_tokens=1024,
-                top_p=1,
-                stream=False
-            )
-        )
-
-        response_text = completion.choices[0].message.content.strip()
-        return response_text
+# AI SDKs are heavy to import, so they are loaded on the first scoring call.
+genai = None
+
+def load_genai():
+    """Import and configure the Gemini SDK once."""
+    global genai
+    if genai is None:
+        import google.generativeai
+        google.generativeai.configure(api_key=os.getenv("GEMIMI_API_KEY"))
+        genai = google.generativeai
+    return genai
 
-    except Exception as e:
-        print("\nError:", e)
-        print(traceback.format_exc())
-        return None
 
 async def simulate_human_behavior(page: Page):
     """Simulate faster human-like behavior on a page."""
@@ -195,17 +172,21 @@ class SleepBlocker:
             logger.exception("Failed to allow sleep")
 
 
-def clean_processed_jobs_file():
-    """Keep only the last N lines in processed_jobs.txt."""
+def clean_processed_jobs_store(ttl_days=config_input.SEEN_JOBS_TTL_DAYS, reset_company_counts=True):
+    """Import the legacy processed_jobs.txt once, evict jobs not seen for `ttl_days` and expired AI scores, reset company counts."""
     try:
-        with open(config_input.PROCESSED_JOBS_FILE_PATH, 'r') as f:
-            urls = f.readlines()
-        last_urls = urls[-8000:]
-        with open(config_input.PROCESSED_JOBS_FILE_PATH, 'w') as f:
-            f.writelines(last_urls)
-        logger.info(f"Trimmed processed jobs file to last {len(last_urls)} entries")
+        store = seen_jobs.get_store()
+        store.import_legacy_file()
+        removed = store.evict_older_than(ttl_days)
+        logger.info(f"Evicted {removed} jobs not seen for {ttl_days} days, {len(store)} remain")
+        # Per-company job counts start over every run (in distributed mode when the run is created)
+        if reset_company_counts:
+            store.reset_company_counts()
+
+        removed = score_cache.get_cache().evict()
+        logger.info(f"Evicted {removed} cached AI scores")
     except Exception:
-        logger.exception("Failed to clean processed jobs file")
+        logger.exception("Failed to clean processed jobs store")
 
 
 def sort_csv_files_by_column(filenames=config_input.CSV_FILES, sort_column_index=4):
@@ -213,7 +194,7 @@ def sort_csv_files_by_column(filenames=config_input.CSV_FILES, sort_column_index
     encodings_to_try = ['utf-8', 'latin1', 'cp1252', 'utf-8-sig']
 
     for filename in filenames:
-        filename = f"output/{filename}"
+        filename = os.path.join(config_input.OUTPUT_DIR, filename)
         rows, chosen_encoding = None, None
 
         for encoding in encodings_to_try:
@@ -259,6 +240,9 @@ def sort_csv_files_by_column(filenames=config_input.CSV_FILES, sort_column_index
 
 def send_debugging_screenshots_and_spider_log_email(folder_path="debugging_screenshots", log_file="logs/spider.log"):
     """Send debugging screenshots and spider.log via email."""
+    import smtplib, mimetypes
+    from email.message import EmailMessage
+
     sender = os.getenv("EMAIL_SENDER")
     password = os.getenv("EMAIL_PASSWORD")
     recipient = os.getenv("EMAIL_RECIPIENT")
@@ -314,90 +298,48 @@ def send_debugging_screenshots_and_spider_log_email(folder_path="debugging_scree
         logger.exception("Failed to send debugging email")
 
 
+# Indeed's Accept Terms banner
+TERMS_BUTTON = 'button[data-gnav-element-name="AcceptButton"]'
+
 async def handle_terms_cond_btn(page):
+    """Click Accept Terms when the banner is showing; returns whether it was clicked."""
     try:
-        # Wait for the Accept Terms button using an exact selector
-        await page.wait_for_selector('button[data-gnav-element-name="AcceptButton"]', timeout=5000)
-        accept_button = await page.query_selector('button[data-gnav-element-name="AcceptButton"]')
-
-        if accept_button:
-            # Scroll into view just in case
-            await accept_button.scroll_into_view_if_needed()
-
-            # Get the button's bounding box to calculate where to click
-            box = await accept_button.bounding_box()
-            if box:
-                # Move the mouse to the center of the button and click
-                x = box["x"] + box["width"] / 2
-                y = box["y"] + box["height"] / 2
-
-                await page.mouse.move(x, y)
-                await page.mouse.down()
-                await asyncio.sleep(0.1)  # simulate slight press delay
-                await page.mouse.up()
-
-                logger.info("Successfully clicked Accept Terms using real mouse events.")
-                await asyncio.sleep(3)  # Wait for modal to close
-            else:
-                logger.warning("Could not get bounding box for Accept Terms button.")
-        else:
-            logger.warning("Accept Terms button not found.")
+        # Once the terms are accepted the banner never comes back, so there is nothing to wait for
+        accept_button = page.locator(TERMS_BUTTON).first
+        if not await accept_button.is_visible():
+            return False
+
+        # Scroll into view just in case
+        await accept_button.scroll_into_view_if_needed()
+
+        # Get the button's bounding box to calculate where to click
+        box = await accept_button.bounding_box()
+        if not box:
+            logger.warning("Could not get bounding box for Accept Terms button.")
+            return False
+
+        # Move the mouse to the center of the button and click
+        x = box["x"] + box["width"] / 2
+        y = box["y"] + box["height"] / 2
+
+        await page.mouse.move(x, y)
+        await page.mouse.down()
+        await asyncio.sleep(0.1)  # simulate slight press delay
+        await page.mouse.up()
+
+        logger.info("Successfully clicked Accept Terms using real mouse events.")
+        # Wait for modal to close
+        try:
+            await page.wait_for_selector(TERMS_BUTTON, state="hidden", timeout=5000)
+        except Exception:
+            logger.warning("Accept Terms modal still visible after 5s.")
+        return True
     except Exception as e:
-        logger.error(f"NotError/found clicking Accept Terms button.")
+        logger.error(f"Error clicking Accept Terms button: {e}")
+        return False
 
 
+# AI matching function
 async def get_match_percentage(prompt):
-    model_response = None
-
-    try:
-        model_response = await get_match_percentage_from_gemini(prompt)
-        logger.info(f"Gemini response: {model_response}")
-    except ResourceExhausted as e:
-        logger.error("Gemini quota exceeded, falling back to Groq...")
-    except Exception as e:
-        logger.error(f"Error from Gemini:")
-
-    # Fallback if Gemini fails or returns None
-    if not model_response:
-        try:
-            model_response = await get_match_percentage_from_groq(prompt)
-            logger.info(f"Groq response: {model_response}")
-        except Exception as e:
-            logger.error(f"Error from Groq:")
-            model_response = None  # Optional: keep as None for later handling
-
-    return model_response
-
-
-
-# Async function to check internet connectivity
-async def check_internet():
-    test_sites = [
-        "https://1.1.1.1",
-        "https://www.cloudflare.com",
-        "https://example.com",
-        "https://www.bing.com"
-    ]
-    
-    timeout = aiohttp.ClientTimeout(total=10)
-
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        for site in test_sites:
-            try:
-                async with session.get(site) as response:
-                    if response.status == 200:
-                        return True
-            except aiohttp.ClientError:
-                pass  # Ignore failed site and try next
-
-    return False
-
-
-# Function to wait until internet is back and optionally refresh the page
-async def wait_until_internet_is_back(page):
-    print("❌ Internet connection lost. Waiting to reconnect...")
-    while not await check_internet():
-        await asyncio.sleep(10)
-    print("✅ Internet reconnected.")
-    await page.reload()
-
+    """Send a scoring prompt to the fastest healthy AI provider (utils/provider_router.py)."""
+    return await provider_router.get_router().complete(prompt)
@@ -0,0 +1,71 @@
+import logging
+from config import config_input
+from utils import extraction, run_report
+
+# Logger
+logger = logging.getLogger("spider")
+
+# A page containing any of these is a bot challenge, only the browser path can solve it.
+CHALLENGE_MARKERS = (
+    "Additional Verification Required",
+    "challenges.cloudflare.com",
+    "cf-chl",
+    "<title>Just a moment...</title>",
+)
+CHALLENGE_STATUSES = (403, 429, 503)
+
+
+class HttpFetchStats:
+    """Count how many detail pages were read over HTTP and why others fell back to the browser."""
+
+    def __init__(self):
+        self.fetched = 0
+        self.challenges = 0
+        self.missing_fields = 0
+        self.errors = 0
+
+    def summary(self):
+        return {
+            "mode": config_input.DETAIL_FETCH_MODE,
+            "parsed over HTTP": self.fetched,
+            "fallback (challenge)": self.challenges,
+            "fallback (missing fields)": self.missing_fields,
+            "fallback (request error)": self.errors,
+        }
+
+
+stats = HttpFetchStats()
+run_report.register("Detail fetch", stats.summary)
+
+
+async def fetch_detail_fields(context, full_url):
+    """Download a job detail page without rendering it and return its DETAIL_SPEC fields.
+
+    context.request shares the browser context's cookies, proxy and user agent and
+    keeps its connections alive between calls. None means the caller should use a tab.
+    """
+    try:
+        response = await context.request.get(full_url, timeout=config_input.HTTP_FETCH_TIMEOUT * 1000)
+        try:
+            html = await response.text()
+            status = response.status
+        finally:
+            await response.dispose()
+    except Exception as e:
+        stats.errors += 1
+        logger.info(f"HTTP fetch failed, using browser for {full_url}: {e}")
+        return None
+
+    if status in CHALLENGE_STATUSES or any(marker in html for marker in CHALLENGE_MARKERS):
+        stats.challenges += 1
+        logger.info(f"Challenge on HTTP fetch, using browser for {full_url}")
+        return None
+
+    fields = extraction.parse_html(html, extraction.DETAIL_SPEC)
+    if not fields["company_name"] or not fields["job_title"]:
+        stats.missing_fields += 1
+        logger.info(f"Fields missing from HTTP fetch, using browser for {full_url}")
+        return None
+
+    stats.fetched += 1
+    return fields
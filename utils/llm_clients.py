@@ -0,0 +1,119 @@
+import os, asyncio
+import logging
+from config import config_input
+
+# Logger
+logger = logging.getLogger("spider")
+
+
+class GeminiClient:
+    """Long-lived Gemini model on the SDK's async (gRPC) transport."""
+
+    name = "gemini"
+
+    def __init__(self, model, temperature, max_tokens, concurrency, timeout):
+        self.model_name = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.slots = asyncio.Semaphore(concurrency)
+        self._model = None
+
+    # The SDK is heavy to import, so the model is built on the first request.
+    @property
+    def model(self):
+        if self._model is None:
+            from utils import helper
+            genai = helper.load_genai()
+            self._model = genai.GenerativeModel(
+                self.model_name,
+                generation_config=genai.GenerationConfig(
+                    temperature=self.temperature,
+                    max_output_tokens=self.max_tokens,
+                    # The scoring protocol answers with a JSON object
+                    response_mime_type="application/json",
+                ),
+            )
+        return self._model
+
+    async def complete(self, prompt):
+        """Return the response text. Raises on errors, including quota errors and timeouts."""
+        async with self.slots:
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt, request_options={"timeout": self.timeout}),
+                self.timeout,
+            )
+        return response.text.strip()
+
+    async def close(self):
+        self._model = None
+
+
+class GroqClient:
+    """Long-lived AsyncGroq client; its httpx pool keeps connections alive between requests."""
+
+    name = "groq"
+
+    def __init__(self, model, temperature, max_tokens, concurrency, timeout):
+        self.model_name = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.slots = asyncio.Semaphore(concurrency)
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from groq import AsyncGroq
+            self._client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), timeout=self.timeout)
+        return self._client
+
+    async def complete(self, prompt):
+        """Return the response text. Raises on errors and timeouts."""
+        async with self.slots:
+            completion = await asyncio.wait_for(
+                self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=self.temperature,
+                    max_tokens=self.max_tokens,
+                    top_p=1,
+                    stream=False,
+                    response_format={"type": "json_object"},
+                ),
+                self.timeout,
+            )
+        return completion.choices[0].message.content.strip()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+clients = {
+    "gemini": GeminiClient(
+        config_input.gemini_model_version,
+        config_input.GEMINI_TEMPERATURE,
+        config_input.GEMINI_MAX_TOKENS,
+        config_input.GEMINI_CONCURRENCY,
+        config_input.LLM_TIMEOUT,
+    ),
+    "groq": GroqClient(
+        config_input.groq_model_version,
+        config_input.GROQ_TEMPERATURE,
+        config_input.GROQ_MAX_TOKENS,
+        config_input.GROQ_CONCURRENCY,
+        config_input.LLM_TIMEOUT,
+    ),
+}
+
+
+async def close():
+    """Close pooled connections; call once scoring is finished."""
+    for client in clients.values():
+        try:
+            await client.close()
+        except Exception:
+            logger.exception(f"Failed to close {client.name} client")
@@ -0,0 +1,91 @@
+import time, random, asyncio
+import logging
+from collections import deque
+from config import config_input
+
+# Logger
+logger = logging.getLogger("spider")
+
+# A challenge doubles the jitter budget, every clean page shrinks it a little
+GROW = 2.0
+SHRINK = 0.85
+
+
+class PacingController:
+    """Waits for a page to be ready, then adds a jitter sized by the recent challenge rate.
+
+    The budget starts at `start_seconds` and stays between `min_seconds` and
+    `max_seconds`: it doubles on every challenge or page that never got ready,
+    and shrinks while pages come back clean, so idle time follows the actual risk.
+    """
+
+    def __init__(self, min_seconds=config_input.PACING_MIN_SECONDS, max_seconds=config_input.PACING_MAX_SECONDS,
+                 start_seconds=config_input.PACING_START_SECONDS, ready_timeout=config_input.PACING_READY_TIMEOUT,
+                 window=50):
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.budget = min(max(start_seconds, min_seconds), max_seconds)
+        self.ready_timeout = ready_timeout
+        self.outcomes = deque(maxlen=window)
+        self.pages = 0
+        self.not_ready = 0
+        self.ready_seconds = 0.0
+        self.jitter_seconds = 0.0
+
+    def record(self, challenged):
+        """Outcome of one page: was it challenged or blocked."""
+        self.outcomes.append(challenged)
+        if challenged:
+            self.budget = min(self.budget * GROW, self.max_seconds)
+        else:
+            self.budget = max(self.budget * SHRINK, self.min_seconds)
+
+    def challenge_rate(self):
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    async def jitter(self):
+        """Sleep a random part of the current budget."""
+        delay = random.uniform(0.5, 1.0) * self.budget
+        self.jitter_seconds += delay
+        await asyncio.sleep(delay)
+
+    async def wait_ready(self, page, selector):
+        """Wait until `selector` is on the page and the network went idle; returns whether the selector showed up."""
+        started = time.monotonic()
+        try:
+            await page.wait_for_selector(selector, timeout=self.ready_timeout * 1000)
+            ready = True
+        except Exception:
+            ready = False
+        if ready:
+            # Blocked analytics requests may keep the network busy, so idle is only waited for briefly
+            try:
+                await page.wait_for_load_state("networkidle", timeout=self.ready_timeout * 500)
+            except Exception:
+                pass
+        self.ready_seconds += time.monotonic() - started
+        return ready
+
+    async def page_ready(self, page, selector, challenged=False):
+        """Readiness first, then the jitter; a page that was challenged or never got ready counts as blocked."""
+        ready = await self.wait_ready(page, selector)
+        self.pages += 1
+        if not ready:
+            self.not_ready += 1
+            logger.info(f"Page not ready after {self.ready_timeout}s: {page.url}")
+        self.record(challenged or not ready)
+        await self.jitter()
+        return ready
+
+    def summary(self):
+        return {
+            "pages": self.pages,
+            "not ready": self.not_ready,
+            "challenge rate (recent)": f"{self.challenge_rate():.0%}",
+            "jitter budget now": f"{self.budget:.1f}s",
+            "waiting for readiness": f"{self.ready_seconds:.0f}s",
+            "jitter": f"{self.jitter_seconds:.0f}s",
+        }
+
+
+controller = PacingController()
@@ -0,0 +1,134 @@
+import re
+import logging
+from collections import Counter
+import numpy as np
+from config import config_input
+from utils import run_report
+
+# Logger
+logger = logging.getLogger("spider")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "of", "on", "or", "our", "that", "the", "their", "this", "to", "was", "we", "will", "with", "you",
+    "your", "i", "my", "me", "all", "any", "can", "not", "per", "who", "work", "job", "jobs", "role",
+    "team", "experience", "years", "year", "time", "full", "part", "new", "remote", "hybrid", "based",
+    "us", "usa", "level", "position", "opportunity", "company", "looking", "strong", "skills",
+}
+_TOKEN = re.compile(r"[a-z0-9+#]+(?:[.][a-z0-9+#]+)*")
+
+# Snippets are long and generic, so they count for less than the title
+SNIPPET_WEIGHT = 0.5
+
+
+def words(text):
+    return _TOKEN.findall((text or "").lower())
+
+
+def tokenize(text):
+    return [token for token in words(text) if token not in STOPWORDS and (len(token) > 1 or token in "cr")]
+
+
+def _has_phrase(title_words, phrase):
+    """Whether the words of `phrase` appear one after another in `title_words`."""
+    size = len(phrase)
+    return size > 0 and any(title_words[start:start + size] == phrase for start in range(len(title_words) - size + 1))
+
+
+def _terms(text):
+    return [term.strip().lower() for term in text.split(",") if term.strip()]
+
+
+class LexicalPrefilter:
+    """Drop obvious misses before LLM scoring with TF-IDF cosine similarity against the resume and prompt.
+
+    deny terms always drop a title, allow terms always keep it, the rest must score above `cutoff`.
+    Terms match whole words of the title ("rn" does not match "intern"), a term of several words as a phrase.
+    """
+
+    def __init__(self, profile_text, cutoff=0.0, allow_terms=(), deny_terms=()):
+        self.profile = Counter(tokenize(profile_text))
+        self.cutoff = cutoff
+        self.allow_terms = [words(term) for term in allow_terms]
+        self.deny_terms = [words(term) for term in deny_terms]
+        self.seen = 0
+        self.dropped = 0
+        self.denied = 0
+        self.allowed = 0
+
+    def similarity(self, texts):
+        """Cosine similarity of each text to the profile, as a NumPy array."""
+        docs = [Counter(tokenize(text)) for text in texts]
+        vocab = {term: i for i, term in enumerate(set(self.profile).union(*docs))}
+        if not vocab:
+            return np.zeros(len(texts))
+
+        counts = np.zeros((len(docs), len(vocab)))
+        for row, doc in enumerate(docs):
+            for term, count in doc.items():
+                counts[row, vocab[term]] = count
+        query = np.zeros(len(vocab))
+        for term, count in self.profile.items():
+            query[vocab[term]] = count
+
+        # Smoothed idf over the texts plus the profile, sublinear tf
+        document_frequency = (counts > 0).sum(axis=0) + (query > 0)
+        idf = np.log((len(docs) + 2) / (document_frequency + 1)) + 1
+        weights = np.where(counts > 0, 1 + np.log(np.maximum(counts, 1)), 0) * idf
+        query = np.where(query > 0, 1 + np.log(np.maximum(query, 1)), 0) * idf
+
+        norms = np.linalg.norm(weights, axis=1) * np.linalg.norm(query)
+        return np.divide(weights @ query, norms, out=np.zeros(len(docs)), where=norms > 0)
+
+    def scores(self, jobs):
+        scores = self.similarity([job["title"] for job in jobs])
+        snippets = [job.get("snippet") or "" for job in jobs]
+        if any(snippets):
+            scores = scores + SNIPPET_WEIGHT * self.similarity(snippets)
+        return scores
+
+    def filter(self, jobs):
+        """Return the jobs worth sending to the AI."""
+        if not jobs or not self.profile:
+            return jobs
+
+        kept = []
+        for job, score in zip(jobs, self.scores(jobs)):
+            title = words(job["title"])
+            if any(_has_phrase(title, term) for term in self.deny_terms):
+                self.denied += 1
+            elif any(_has_phrase(title, term) for term in self.allow_terms):
+                self.allowed += 1
+                kept.append(job)
+            elif score > self.cutoff:
+                kept.append(job)
+
+        self.seen += len(jobs)
+        self.dropped += len(jobs) - len(kept)
+        if len(kept) < len(jobs):
+            logger.info(f"Pre-filter dropped {len(jobs) - len(kept)} of {len(jobs)} titles")
+        return kept
+
+    def summary(self):
+        return {
+            "titles checked": self.seen,
+            "dropped": f"{self.dropped} ({self.dropped / self.seen:.0%})" if self.seen else 0,
+            "dropped by deny terms": self.denied,
+            "kept by allow terms": self.allowed,
+        }
+
+
+_prefilter = None
+
+def get_prefilter():
+    """Return the process-wide pre-filter built from the Settings sheet."""
+    global _prefilter
+    if _prefilter is None:
+        _prefilter = LexicalPrefilter(
+            f"{config_input.AI_PROMPT}\n{config_input.RESUME}",
+            cutoff=config_input.PREFILTER_CUTOFF,
+            allow_terms=_terms(config_input.PREFILTER_ALLOW_TERMS),
+            deny_terms=_terms(config_input.PREFILTER_DENY_TERMS),
+        )
+        run_report.register("Pre-filter", _prefilter.summary)
+    return _prefilter
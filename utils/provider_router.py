@@ -0,0 +1,211 @@
+import time, asyncio
+import logging
+from collections import deque
+from config import config_input
+from utils import llm_clients, rate_limit, run_report
+
+# Logger
+logger = logging.getLogger("spider")
+
+# Calls kept per provider for latency percentiles and error rate
+WINDOW = 50
+# Samples needed before a provider's latency is trusted for hedging
+MIN_SAMPLES = 5
+
+
+def is_quota_error(error):
+    """Gemini raises ResourceExhausted and Groq RateLimitError; both are HTTP 429."""
+    return type(error).__name__ in ("ResourceExhausted", "RateLimitError") or getattr(error, "status_code", None) == 429
+
+
+class Provider:
+    """One LLM backend: an async `complete(prompt)` plus its rolling stats and circuit breaker."""
+
+    def __init__(self, name, complete, limiter=None, max_tokens=1024):
+        self.name = name
+        self.complete = complete
+        self.limiter = limiter
+        self.max_tokens = max_tokens
+        self.latencies = deque(maxlen=WINDOW)
+        self.outcomes = deque(maxlen=WINDOW)
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.opened = 0
+
+    @property
+    def available(self):
+        if self.limiter and self.limiter.cooling_down:
+            return False
+        return time.monotonic() >= self.open_until
+
+    @property
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def latency(self, percentile):
+        """Rolling latency at `percentile` (0-100) in seconds, or None without samples."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[round(percentile / 100 * (len(ordered) - 1))]
+
+    def record_success(self, latency):
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+
+    def record_failure(self, failure_threshold, open_seconds):
+        self.outcomes.append(False)
+        self.failures += 1
+        self.consecutive_failures += 1
+        # After the circuit reopens a single failure (half-open probe) trips it again
+        if self.consecutive_failures >= failure_threshold:
+            self.trip(open_seconds)
+
+    def trip(self, seconds):
+        self.open_until = max(self.open_until, time.monotonic() + seconds)
+        self.opened += 1
+        logger.warning(f"{self.name} circuit open for {seconds:.0f}s")
+
+    def summary(self):
+        p50, p90 = self.latency(50), self.latency(90)
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "error rate": f"{self.error_rate:.0%}",
+            "latency p50/p90": f"{p50:.1f}s / {p90:.1f}s" if p50 is not None else "n/a",
+            "circuit": "closed" if self.available else "open",
+            "times opened": self.opened,
+        }
+
+
+class ProviderRouter:
+    """Send each prompt to the currently fastest healthy provider.
+
+    Providers with `failure_threshold` consecutive failures are skipped for
+    `open_seconds` (`quota_seconds` after a quota error). When the first choice
+    is slower than its own `hedge_percentile` latency, the same prompt is also
+    sent to the runner-up and the first answer wins (0 disables hedging).
+    """
+
+    def __init__(self, providers, failure_threshold=config_input.CIRCUIT_FAILURE_THRESHOLD,
+                 open_seconds=config_input.CIRCUIT_OPEN_SECONDS, quota_seconds=config_input.QUOTA_COOLDOWN,
+                 hedge_percentile=config_input.LLM_HEDGE_PERCENTILE):
+        self.providers = list(providers)
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.quota_seconds = quota_seconds
+        self.hedge_percentile = hedge_percentile
+        self.hedges = 0
+        self.hedges_won = 0
+
+    def ranked(self):
+        """Healthy providers, fastest median first; unmeasured ones keep their configured order up front."""
+        order = {provider.name: index for index, provider in enumerate(self.providers)}
+        healthy = [provider for provider in self.providers if provider.available]
+        if not healthy:
+            # Everything is tripped: try the ones that were not rate limited, earliest to reopen first
+            healthy = sorted(
+                (provider for provider in self.providers if not (provider.limiter and provider.limiter.cooling_down)),
+                key=lambda provider: provider.open_until,
+            )
+        return sorted(healthy, key=lambda provider: (provider.latency(50) or 0.0, order[provider.name]))
+
+    async def _call(self, provider, prompt):
+        """Run one request and record its outcome; returns the text or None."""
+        provider.requests += 1
+        try:
+            if provider.limiter:
+                await provider.limiter.acquire(rate_limit.estimate_tokens(prompt, provider.max_tokens))
+            started = time.monotonic()
+            text = await provider.complete(prompt)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if is_quota_error(e):
+                logger.error(f"{provider.name} quota exceeded")
+                if provider.limiter:
+                    provider.limiter.cooldown(self.quota_seconds)
+                provider.trip(self.quota_seconds)
+                provider.outcomes.append(False)
+                provider.failures += 1
+            else:
+                logger.error(f"Error from {provider.name}: {e!r}")
+                provider.record_failure(self.failure_threshold, self.open_seconds)
+            return None
+
+        if not text:
+            provider.record_failure(self.failure_threshold, self.open_seconds)
+            return None
+        provider.record_success(time.monotonic() - started)
+        logger.info(f"{provider.name} response in {time.monotonic() - started:.1f}s")
+        return text
+
+    async def _hedged(self, primary, backup, prompt):
+        first = asyncio.create_task(self._call(primary, prompt))
+        delay = primary.latency(self.hedge_percentile) if len(primary.latencies) >= MIN_SAMPLES else None
+        if backup is None or not self.hedge_percentile or delay is None:
+            return await first, {primary}
+
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result(), {primary}
+
+        logger.info(f"{primary.name} slower than p{self.hedge_percentile:.0f} ({delay:.1f}s), hedging to {backup.name}")
+        self.hedges += 1
+        second = asyncio.create_task(self._call(backup, prompt))
+        tasks = {first: primary, second: backup}
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider = tasks.pop(task)
+                    text = task.result()
+                    if text:
+                        if provider is backup:
+                            self.hedges_won += 1
+                        return text, {primary, backup}
+            return None, {primary, backup}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def complete(self, prompt):
+        """Return the first usable response text, or None when every provider failed."""
+        ranked = self.ranked()
+        if not ranked:
+            logger.error("No AI provider available")
+            return None
+
+        text, tried = await self._hedged(ranked[0], ranked[1] if len(ranked) > 1 else None, prompt)
+        # Plain fallback through the providers not tried yet
+        for provider in ranked:
+            if text:
+                break
+            if provider not in tried:
+                text = await self._call(provider, prompt)
+        return text
+
+    def summary(self):
+        values = {"hedged requests": f"{self.hedges} ({self.hedges_won} won by the backup)"}
+        for provider in self.providers:
+            values.update({f"{provider.name} {key}": value for key, value in provider.summary().items()})
+        return values
+
+
+_router = None
+
+def get_router():
+    """Return the process-wide router over Gemini and Groq."""
+    global _router
+    if _router is None:
+        _router = ProviderRouter([
+            Provider("gemini", llm_clients.clients["gemini"].complete, rate_limit.limiters["gemini"],
+                     config_input.GEMINI_MAX_TOKENS),
+            Provider("groq", llm_clients.clients["groq"].complete, rate_limit.limiters["groq"],
+                     config_input.GROQ_MAX_TOKENS),
+        ])
+        run_report.register("AI providers", _router.summary)
+    return _router
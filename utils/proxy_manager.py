@@ -0,0 +1,204 @@
+import time
+import logging
+from config import config_input
+from utils.sqlite_store import SQLiteStore
+
+# Logger
+logger = logging.getLogger("spider")
+
+# Weight of the newest sample in the latency moving average
+LATENCY_ALPHA = 0.3
+
+# Counters that every process adds to; the other stats are the latest state of the proxy
+COUNTERS = ("requests", "failures", "challenges", "bytes")
+STATE = ("latency", "strikes", "quarantine_until")
+
+
+def new_stats():
+    return {"requests": 0, "failures": 0, "challenges": 0, "bytes": 0, "latency": None, "strikes": 0, "quarantine_until": 0.0}
+
+
+class ProxyStatsStore(SQLiteStore):
+    """Proxy health stats kept between runs; worker processes merge what they recorded instead of overwriting each other."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS proxy_stats (
+            key TEXT PRIMARY KEY,
+            requests INTEGER NOT NULL,
+            failures INTEGER NOT NULL,
+            challenges INTEGER NOT NULL,
+            bytes INTEGER NOT NULL,
+            latency REAL,
+            strikes INTEGER NOT NULL,
+            quarantine_until REAL NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    COLUMNS = COUNTERS + STATE
+
+    def _read(self, conn, key):
+        row = conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM proxy_stats WHERE key = ?", (key,)).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else new_stats()
+
+    def read(self, keys):
+        return {key: self._read(self.conn, key) for key in keys}
+
+    def merge(self, stats, baseline):
+        """Add what this process recorded since `baseline` to the saved stats and return the merged stats."""
+        def work(conn):
+            merged = {}
+            for key, ours in stats.items():
+                start = baseline.get(key, new_stats())
+                saved = self._read(conn, key)
+                row = {name: saved[name] + ours[name] - start[name] for name in COUNTERS}
+                # The proxy's state comes from this process only if it used the proxy
+                used = ours["requests"] != start["requests"] or ours["challenges"] != start["challenges"]
+                row.update({name: (ours if used else saved)[name] for name in STATE})
+                conn.execute(
+                    f"INSERT OR REPLACE INTO proxy_stats (key, {', '.join(self.COLUMNS)}) VALUES (?{', ?' * len(self.COLUMNS)})",
+                    (key, *(row[name] for name in self.COLUMNS))
+                )
+                merged[key] = row
+            return merged
+        return self.transaction(work)
+
+
+class ProxyManager:
+    """Health-scored proxy selection with quarantine, stats kept in the `db_path` SQLite file between runs.
+
+    Every navigation reports its outcome for the context's proxy. The second
+    failure in a row quarantines a proxy for `quarantine_seconds`, doubling with
+    each further failure up to `max_quarantine_seconds`; one success clears it.
+    """
+
+    def __init__(self, db_path=config_input.PROXY_STATS_DB_PATH,
+                 quarantine_seconds=config_input.PROXY_QUARANTINE_SECONDS,
+                 max_quarantine_seconds=config_input.PROXY_MAX_QUARANTINE_SECONDS):
+        self.store = ProxyStatsStore(db_path)
+        self.quarantine_seconds = quarantine_seconds
+        self.max_quarantine_seconds = max_quarantine_seconds
+        self.proxies = {}
+        self.stats = {}
+        # Stats as last loaded or saved, so save() only adds what this process recorded since
+        self._baseline = {}
+        self.in_use = {}
+        self._contexts = {}
+        self.quarantined = 0
+
+    @staticmethod
+    def key(proxy):
+        return f"{proxy.get('username', '')}@{proxy['server']}"
+
+    def load(self, proxies):
+        """Use these proxies, with the stats saved by earlier runs."""
+        for proxy in proxies or []:
+            key = self.key(proxy)
+            self.proxies[key] = proxy
+            self.in_use.setdefault(key, 0)
+        try:
+            self.stats = self.store.read(self.proxies)
+        except Exception:
+            logger.exception("Could not read proxy stats, starting fresh")
+            self.stats = {key: new_stats() for key in self.proxies}
+        self._baseline = {key: dict(stats) for key, stats in self.stats.items()}
+
+    def save(self):
+        merged = self.store.merge(self.stats, self._baseline)
+        self.stats = merged
+        self._baseline = {key: dict(stats) for key, stats in merged.items()}
+
+    def healthy(self, key):
+        return time.time() >= self.stats[key]["quarantine_until"]
+
+    def score(self, key):
+        """Higher is better: smoothed success rate, minus challenges, slower proxies and current load."""
+        stats = self.stats[key]
+        success = (stats["requests"] - stats["failures"] + 1) / (stats["requests"] + 2)
+        challenge = stats["challenges"] / (stats["requests"] + 1)
+        latency = stats["latency"] or 0.0
+        return success * (1 - challenge) / (1 + latency / 10) - 0.1 * self.in_use[key]
+
+    def acquire(self, preferred=None):
+        """Proxy for a new context: `preferred` while it is healthy, else the best-scoring healthy one."""
+        if not self.proxies:
+            return None
+        if preferred in self.proxies and self.healthy(preferred):
+            key = preferred
+        else:
+            healthy = [key for key in self.proxies if self.healthy(key)]
+            if healthy:
+                key = max(healthy, key=self.score)
+            else:
+                # Everything is quarantined: take the one that comes back first
+                key = min(self.proxies, key=lambda key: self.stats[key]["quarantine_until"])
+        self.in_use[key] += 1
+        return self.proxies[key]
+
+    def attach(self, context, proxy):
+        """Remember which proxy a context uses, so outcomes can be reported by context."""
+        if proxy:
+            self._contexts[id(context)] = self.key(proxy)
+
+    def release(self, proxy):
+        """Hand back a proxy from `acquire` that never got a context."""
+        if proxy:
+            key = self.key(proxy)
+            self.in_use[key] = max(0, self.in_use[key] - 1)
+
+    def detach(self, context):
+        key = self._contexts.pop(id(context), None)
+        if key:
+            self.in_use[key] = max(0, self.in_use[key] - 1)
+
+    def context_healthy(self, context):
+        key = self._contexts.get(id(context))
+        return key is None or self.healthy(key)
+
+    def record(self, context, ok, latency=None):
+        """Outcome of one navigation through the context's proxy."""
+        key = self._contexts.get(id(context))
+        if key is None:
+            return
+        stats = self.stats[key]
+        stats["requests"] += 1
+        if ok:
+            stats["strikes"] = 0
+            stats["quarantine_until"] = 0.0
+            if latency is not None:
+                previous = stats["latency"]
+                stats["latency"] = latency if previous is None else LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * previous
+            return
+
+        stats["failures"] += 1
+        stats["strikes"] += 1
+        if stats["strikes"] >= 2:
+            seconds = min(self.quarantine_seconds * 2 ** (stats["strikes"] - 2), self.max_quarantine_seconds)
+            stats["quarantine_until"] = time.time() + seconds
+            self.quarantined += 1
+            logger.warning(f"Proxy {self.proxies[key]['server']} quarantined for {seconds:.0f}s after {stats['strikes']} failures")
+
+    def record_challenge(self, context):
+        key = self._contexts.get(id(context))
+        if key is not None:
+            self.stats[key]["challenges"] += 1
+
+    def add_bytes(self, context, size):
+        key = self._contexts.get(id(context))
+        if key is not None and size:
+            self.stats[key]["bytes"] += int(size)
+
+    def summary(self):
+        healthy = sum(self.healthy(key) for key in self.proxies)
+        values = {"healthy": f"{healthy} of {len(self.proxies)}", "quarantines this run": self.quarantined}
+        best = sorted(self.proxies, key=self.score, reverse=True)[:5]
+        for key in best:
+            stats = self.stats[key]
+            latency = f"{stats['latency']:.1f}s" if stats["latency"] is not None else "n/a"
+            values[self.proxies[key]["server"]] = (
+                f"{stats['requests']} requests, {stats['failures']} failed, {stats['challenges']} challenged, "
+                f"{latency} latency, {stats['bytes'] / 1024 / 1024:.1f} MB"
+            )
+        return values
+
+
+manager = ProxyManager()
@@ -0,0 +1,86 @@
+import asyncio, time
+import logging
+from config import config_input
+
+# Logger
+logger = logging.getLogger("spider")
+
+
+class TokenBucket:
+    """Continuously refilled bucket of `per_minute` units; 0 (or less) means no limit."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self):
+        return self.rate <= 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` units are available (0 when they are now)."""
+        if self.unlimited:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def take(self, amount):
+        if self.unlimited:
+            return
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class ProviderLimiter:
+    """Requests/min and tokens/min limits of one LLM provider, plus a cooldown after quota errors."""
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.cooldown_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def share(self, parts):
+        """Keep 1/`parts` of the limits, when `parts` processes send to the same account."""
+        self.requests = TokenBucket(self.requests.capacity / parts)
+        self.tokens = TokenBucket(self.tokens.capacity / parts)
+
+    @property
+    def cooling_down(self):
+        return time.monotonic() < self.cooldown_until
+
+    def cooldown(self, seconds):
+        """Stop sending to this provider for `seconds`, e.g. after ResourceExhausted."""
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+        logger.warning(f"{self.name} rate limited, cooling down for {seconds:.0f}s")
+
+    async def acquire(self, estimated_tokens):
+        """Wait until one request of `estimated_tokens` fits in both buckets."""
+        async with self._lock:
+            while True:
+                delay = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                if delay <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(estimated_tokens)
+                    return
+                await asyncio.sleep(delay)
+
+
+def estimate_tokens(prompt, max_output_tokens=1024):
+    """Rough token count of a request: ~4 characters per token plus the output budget."""
+    return len(prompt) // 4 + max_output_tokens
+
+
+limiters = {
+    "gemini": ProviderLimiter("Gemini", config_input.GEMINI_RPM, config_input.GEMINI_TPM),
+    "groq": ProviderLimiter("Groq", config_input.GROQ_RPM, config_input.GROQ_TPM),
+}
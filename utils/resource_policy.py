@@ -0,0 +1,127 @@
+import base64, re
+import logging
+from collections import Counter
+from config import config_input
+from utils import run_report
+
+# Logger
+logger = logging.getLogger("spider")
+
+# What each profile does per Playwright resource type, plus what happens to ad/analytics URLs.
+# "stub" answers locally with an empty resource (pages still see a successful load),
+# "abort" fails the request.
+PROFILES = {
+    "full": {"stub": set(), "abort": set(), "trackers": None},
+    "stealth-safe": {"stub": {"image"}, "abort": {"media"}, "trackers": "stub"},
+    "minimal": {"stub": set(), "abort": {"image", "media", "font"}, "trackers": "abort"},
+}
+
+TRACKER_URLS = re.compile(
+    r"google-analytics\.com|googletagmanager\.com|doubleclick\.net|googlesyndication\.com|"
+    r"googleadservices\.com|adservice\.google|facebook\.net|connect\.facebook|hotjar\.com|"
+    r"bat\.bing\.com|scorecardresearch\.com|quantserve\.com|adnxs\.com|criteo\.(com|net)|"
+    r"taboola\.com|outbrain\.com|amazon-adsystem\.com|/beacon/|/pixel",
+    re.IGNORECASE
+)
+
+# Only requests whose URL looks like a resource type a profile blocks are routed: a route makes
+# Chromium skip its HTTP cache for the request, so routing everything would cost more than it saves.
+RESOURCE_URLS = {
+    "image": r"\.(png|jpe?g|gif|webp|avif|svg|ico|bmp)(\?|$)",
+    "media": r"\.(mp4|webm|m4v|mov|mp3|m4a|ogg|wav)(\?|$)",
+    "font": r"\.(woff2?|ttf|otf|eot)(\?|$)",
+}
+
+# Never touch challenge/captcha resources, Cloudflare bypass depends on them.
+ALWAYS_ALLOW = re.compile(r"challenges\.cloudflare\.com|/cdn-cgi/|hcaptcha\.com|turnstile", re.IGNORECASE)
+
+# Blocked requests are never downloaded, so savings are not measured but estimated from typical Indeed sizes.
+ESTIMATED_BYTES = {"image": 30_000, "media": 400_000, "font": 40_000, "script": 35_000, "stylesheet": 20_000}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+TRANSPARENT_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+STUB_BODIES = {
+    "image": ("image/gif", TRANSPARENT_GIF),
+    "script": ("application/javascript", b""),
+    "stylesheet": ("text/css", b""),
+}
+
+
+class ResourceStats:
+    """Count blocked requests per resource type for the run report."""
+
+    def __init__(self):
+        self.blocked = Counter()
+        self.allowed = 0
+
+    def record_blocked(self, resource_type):
+        self.blocked[resource_type] += 1
+
+    @property
+    def estimated_bytes_saved(self):
+        return sum(ESTIMATED_BYTES.get(rtype, DEFAULT_ESTIMATED_BYTES) * count for rtype, count in self.blocked.items())
+
+    def summary(self):
+        return {
+            "profile": config_input.RESOURCE_PROFILE,
+            "routed requests let through": self.allowed,
+            "blocked requests": dict(self.blocked),
+            "bytes saved (estimate, not measured)": f"~{self.estimated_bytes_saved / 1_048_576:.1f} MB",
+        }
+
+
+stats = ResourceStats()
+run_report.register("Resource blocking", stats.summary)
+
+
+def decide(resource_type, url, profile):
+    """Return "stub", "abort" or None (let the request through) for one request."""
+    rules = PROFILES[profile]
+    if ALWAYS_ALLOW.search(url):
+        return None
+    if rules["trackers"] and TRACKER_URLS.search(url):
+        return rules["trackers"]
+    if resource_type in rules["stub"]:
+        return "stub"
+    if resource_type in rules["abort"]:
+        return "abort"
+    return None
+
+
+def route_pattern(profile):
+    """URLs a context routes under `profile`: its trackers and the URLs of the resource types it blocks."""
+    rules = PROFILES[profile]
+    patterns = [RESOURCE_URLS[rtype] for rtype in sorted(rules["stub"] | rules["abort"]) if rtype in RESOURCE_URLS]
+    if rules["trackers"]:
+        patterns.append(TRACKER_URLS.pattern)
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE) if patterns else None
+
+
+async def apply_resource_policy(context, profile=config_input.RESOURCE_PROFILE):
+    """Attach the request routing of `profile` to a browser context."""
+    if profile not in PROFILES:
+        logger.warning(f"Unknown RESOURCE_PROFILE '{profile}', loading everything")
+        profile = "full"
+    if profile == "full":
+        return
+
+    async def handle(route):
+        request = route.request
+        action = decide(request.resource_type, request.url, profile)
+        try:
+            if action is None:
+                stats.allowed += 1
+                await route.continue_()
+                return
+
+            stats.record_blocked(request.resource_type)
+            content_type, body = STUB_BODIES.get(request.resource_type, ("text/plain", b""))
+            if action == "stub":
+                await route.fulfill(status=200, content_type=content_type, body=body)
+            else:
+                await route.abort()
+        except Exception as e:
+            # Route is already handled when the page navigates away
+            logger.debug(f"Routing {request.url} failed: {e}")
+
+    await context.route(route_pattern(profile), handle)
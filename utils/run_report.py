@@ -0,0 +1,59 @@
+import logging
+
+# Logger
+logger = logging.getLogger("spider")
+
+# Section name -> function returning a dict of values, evaluated when the report is logged
+_sections = {}
+
+
+def register(name, summary):
+    """Add a section to the end-of-run report."""
+    _sections[name] = summary
+
+
+def collect():
+    """Evaluate every registered section, {name: values}; a failing section is logged and left out."""
+    report = {}
+    for name, summary in _sections.items():
+        try:
+            report[name] = summary()
+        except Exception:
+            logger.exception(f"Run report section '{name}' failed")
+    return report
+
+
+def _merge_values(parts):
+    # Counts add up, nested dicts merge key by key, differing text is listed per process
+    merged = {}
+    for key in dict.fromkeys(key for part in parts for key in part):
+        values = [part[key] for part in parts if key in part]
+        if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+            merged[key] = sum(values)
+        elif all(isinstance(value, dict) for value in values):
+            merged[key] = _merge_values(values)
+        elif len({str(value) for value in values}) == 1:
+            merged[key] = values[0]
+        else:
+            merged[key] = " | ".join(str(value) for value in values)
+    return merged
+
+
+def merge(reports):
+    """Take over the `collect()` reports of worker processes; their sections replace this process's ones of the same name."""
+    parts = {}
+    for report in reports:
+        for name, values in report.items():
+            parts.setdefault(name, []).append(values)
+    for name, values in parts.items():
+        merged = _merge_values(values)
+        register(name, lambda merged=merged: merged)
+
+
+def log_report():
+    """Log every registered section."""
+    logger.info("📋 Run report")
+    for name, values in collect().items():
+        logger.info(f"📋 {name}:")
+        for key, value in values.items():
+            logger.info(f"📋   {key}: {value}")
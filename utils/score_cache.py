@@ -0,0 +1,94 @@
+import hashlib, re, time
+import logging
+from config import config_input
+from utils import run_report
+from utils.sqlite_store import SQLiteStore
+
+# Logger
+logger = logging.getLogger("spider")
+
+
+def normalize_title(title):
+    """Lowercase and collapse whitespace/punctuation so near-identical titles share a cache entry."""
+    return " ".join(re.sub(r"[^\w+#./ ]", " ", (title or "").lower()).split())
+
+
+class ScoreCache(SQLiteStore):
+    """Persistent AI match scores keyed by model, AI_PROMPT, RESUME and normalized job title."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scores (
+            key TEXT PRIMARY KEY,
+            title TEXT,
+            score INTEGER NOT NULL,
+            created REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_scores_created ON scores(created);
+    """
+
+    def __init__(self, db_path=config_input.SCORE_CACHE_DB_PATH, model=None):
+        super().__init__(db_path)
+        self.model = model or config_input.SCORING_MODEL_KEY
+        self.hits = 0
+        self.misses = 0
+        # Any change of prompt, resume or model starts a fresh key space
+        self._prefix = hashlib.sha256(
+            "\0".join([self.model, config_input.AI_PROMPT, config_input.RESUME]).encode("utf-8")
+        ).hexdigest()
+
+    def key(self, title):
+        return hashlib.sha256(f"{self._prefix}\0{normalize_title(title)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, titles):
+        """Return {title: score} for the cached titles and count hits/misses."""
+        keys = {self.key(title): title for title in titles}
+        found = {}
+        ids = list(keys)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for key, score in self.conn.execute(
+                f"SELECT key, score FROM scores WHERE key IN ({placeholders})", chunk
+            ):
+                found[keys[key]] = score
+        result = {title: found[title] for title in titles if title in found}
+        self.hits += len(result)
+        self.misses += len(titles) - len(result)
+        return result
+
+    def put_many(self, scores):
+        """Store {title: score} pairs in one transaction."""
+        now = time.time()
+        self.transaction(lambda conn: conn.executemany(
+            "INSERT OR REPLACE INTO scores (key, title, score, created) VALUES (?, ?, ?, ?)",
+            [(self.key(title), title, int(score), now) for title, score in scores.items()]
+        ))
+
+    def evict(self, max_age_days=config_input.SCORE_CACHE_TTL_DAYS, max_entries=config_input.SCORE_CACHE_MAX_ENTRIES):
+        """Drop entries older than `max_age_days`, then the oldest ones above `max_entries`."""
+        conn = self.conn
+        removed = conn.execute("DELETE FROM scores WHERE created < ?", (time.time() - max_age_days * 86400,)).rowcount
+        removed += conn.execute(
+            "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (max_entries,)
+        ).rowcount
+        return removed
+
+    def summary(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit rate": f"{self.hits / total:.0%}" if total else "n/a",
+        }
+
+
+_cache = None
+
+def get_cache():
+    """Return the process-wide score cache."""
+    global _cache
+    if _cache is None:
+        _cache = ScoreCache()
+        run_report.register("Score cache", _cache.summary)
+    return _cache
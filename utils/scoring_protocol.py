@@ -0,0 +1,59 @@
+"""
+Id-keyed scoring protocol: every title goes out with its job id and the model
+answers with a JSON object {id: score}. Scores are matched by id, never by
+position, so prose numbers or skipped titles cannot shift other jobs' scores.
+"""
+
+import json, re
+from config import config_input
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+
+def build_prompt(items):
+    """Build the prompt for a list of (job_id, title) pairs."""
+    jobs = json.dumps([{"id": job_id, "title": title} for job_id, title in items], ensure_ascii=False)
+    return f"""{config_input.AI_PROMPT}\n
+{config_input.RESUME}\n
+Jobs (JSON list of id and title):
+{jobs}
+
+Answer with only a JSON object that maps every job id to its matching percentage as an integer from 0 to 100,
+for example {{"{items[0][0]}": 85}}. Include each id exactly once and no other text.
+"""
+
+
+def _to_score(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.strip().rstrip("%")
+    try:
+        score = round(float(value))
+    except (TypeError, ValueError):
+        return None
+    return score if 0 <= score <= 100 else None
+
+
+def parse_scores(response, job_ids):
+    """Return {job_id: score} for the requested ids found with a valid score in the model response."""
+    if not response:
+        return {}
+    text = _FENCE.sub("", response.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    job_ids = set(job_ids)
+    scores = {}
+    for job_id, value in data.items():
+        score = _to_score(value)
+        if job_id in job_ids and score is not None:
+            scores[job_id] = score
+    return scores
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+from config import config_input
+from utils import helper, run_report, score_cache, scoring_protocol
+
+# Logger
+logger = logging.getLogger("spider")
+
+
+async def score_with_ai(items, retries=config_input.SCORING_RETRIES):
+    """Score (job_id, title) pairs and return {title: score}.
+
+    Ids missing from the answer (or with an invalid score) are asked again in a
+    smaller follow-up request, up to `retries` times.
+    """
+    titles = dict(items)
+    scores = {}
+    missing = list(items)
+    for attempt in range(retries + 1):
+        if attempt:
+            logger.info(f"Re-asking {len(missing)} unscored jobs")
+        model_response = await helper.get_match_percentage(scoring_protocol.build_prompt(missing))
+        scores.update(scoring_protocol.parse_scores(model_response, [job_id for job_id, _ in missing]))
+        missing = [(job_id, title) for job_id, title in missing if job_id not in scores]
+        if not missing:
+            break
+    if missing:
+        logger.warning(f"No valid score for {len(missing)} jobs after {retries} retries")
+
+    title_scores = {titles[job_id]: score for job_id, score in scores.items()}
+    score_cache.get_cache().put_many(title_scores)
+    return title_scores
+
+
+class ScoringService:
+    """Collect jobs from every listing worker into larger AI requests.
+
+    A request goes out when `max_batch` titles are waiting or `max_wait` seconds
+    after the first one arrived. Callers get their scores back through futures,
+    and a title already in flight is only sent once.
+    """
+
+    def __init__(self, max_batch=config_input.SCORING_MAX_BATCH, max_wait=config_input.SCORING_MAX_WAIT,
+                 score_items=score_with_ai):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.score_items = score_items
+        self.queue = None
+        self.pending = {}
+        self.requests = 0
+        self.titles_sent = 0
+        self._task = None
+        self._dispatches = set()
+
+    def _start(self):
+        if self._task is None:
+            self.queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, *self._dispatches, return_exceptions=True)
+            self._task = None
+
+    async def score_many(self, items):
+        """Return {title: score} for (job_id, title) pairs, from the cache or the next AI batch."""
+        # One id per distinct title
+        job_ids = {}
+        for job_id, title in items:
+            job_ids.setdefault(title, job_id)
+        scores = score_cache.get_cache().get_many(list(job_ids))
+        misses = [(job_id, title) for title, job_id in job_ids.items() if title not in scores]
+        if misses:
+            results = await asyncio.gather(*(self._submit(job_id, title) for job_id, title in misses))
+            scores.update({title: score for (_, title), score in zip(misses, results) if score is not None})
+        return scores
+
+    def _submit(self, job_id, title):
+        self._start()
+        if title not in self.pending:
+            self.pending[title] = asyncio.get_running_loop().create_future()
+            self.queue.put_nowait((job_id, title))
+        return self.pending[title]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Keep collecting the next batch while this one waits on the AI
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch):
+        self.requests += 1
+        self.titles_sent += len(batch)
+        logger.info(f"Scoring {len(batch)} titles in one AI request")
+        try:
+            scores = await self.score_items(batch)
+        except Exception:
+            logger.exception("Batch processing failed")
+            scores = {}
+        for _, title in batch:
+            future = self.pending.pop(title, None)
+            if future and not future.done():
+                future.set_result(scores.get(title))
+
+    def summary(self):
+        return {
+            "AI requests": self.requests,
+            "titles sent": self.titles_sent,
+            "titles per request": f"{self.titles_sent / self.requests:.1f}" if self.requests else "n/a",
+        }
+
+
+_service = None
+
+def get_service():
+    """Return the process-wide scoring service."""
+    global _service
+    if _service is None:
+        _service = ScoringService()
+        run_report.register("AI scoring", _service.summary)
+    return _service
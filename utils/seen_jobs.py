@@ -0,0 +1,185 @@
+import os, time
+import logging
+from config import config_input
+from utils.sqlite_store import SQLiteStore
+from utils.task_queue import REDIS_SCHEMES
+
+# Logger
+logger = logging.getLogger("spider")
+
+
+class SeenJobsStore(SQLiteStore):
+    """SQLite (WAL) store of already seen Indeed jobs, keyed by `jk`, plus this run's jobs per company.
+
+    Every operation is one transaction, so several worker processes can share the file.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS seen_jobs (
+            jk TEXT PRIMARY KEY,
+            url TEXT,
+            first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_seen_jobs_last_seen ON seen_jobs(last_seen);
+        CREATE TABLE IF NOT EXISTS company_jobs (
+            company TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path=config_input.SEEN_JOBS_DB_PATH):
+        super().__init__(db_path)
+
+    def __contains__(self, job_id):
+        row = self.conn.execute("SELECT 1 FROM seen_jobs WHERE jk = ?", (job_id,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM seen_jobs").fetchone()[0]
+
+    def claim_new(self, jobs):
+        """Record a batch of (job_id, url) pairs in one transaction and return the ids seen for the first time."""
+        jobs = {job_id: url for job_id, url in jobs if job_id}
+        if not jobs:
+            return set()
+
+        now = time.time()
+        # One IMMEDIATE transaction, so two workers can never claim the same jk.
+        def work(conn):
+            existing = set()
+            ids = list(jobs)
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                existing.update(
+                    row[0] for row in conn.execute(
+                        f"SELECT jk FROM seen_jobs WHERE jk IN ({placeholders})", chunk
+                    )
+                )
+            conn.executemany(
+                """
+                INSERT INTO seen_jobs (jk, url, first_seen, last_seen) VALUES (?, ?, ?, ?)
+                ON CONFLICT(jk) DO UPDATE SET last_seen = excluded.last_seen
+                """,
+                [(job_id, url, now, now) for job_id, url in jobs.items()]
+            )
+            return existing
+        return set(jobs) - self.transaction(work)
+
+    def count_company_job(self, company, limit):
+        """Count one more job for `company` unless it already has more than `limit`; returns whether it was counted."""
+        def work(conn):
+            row = conn.execute("SELECT count FROM company_jobs WHERE company = ?", (company,)).fetchone()
+            counted = row is None or row[0] <= limit
+            if counted:
+                conn.execute(
+                    """
+                    INSERT INTO company_jobs (company, count) VALUES (?, 1)
+                    ON CONFLICT(company) DO UPDATE SET count = count + 1
+                    """,
+                    (company,)
+                )
+            return counted
+        return self.transaction(work)
+
+    def reset_company_counts(self):
+        self.conn.execute("DELETE FROM company_jobs")
+
+    def evict_older_than(self, days):
+        """Delete jobs not seen for `days` days and return how many were removed."""
+        cutoff = time.time() - days * 86400
+        cursor = self.conn.execute("DELETE FROM seen_jobs WHERE last_seen < ?", (cutoff,))
+        return cursor.rowcount
+
+    def import_legacy_file(self, filename=config_input.PROCESSED_JOBS_FILE_PATH):
+        """One-time import of the old processed_jobs.txt into an empty store."""
+        if not os.path.exists(filename) or len(self):
+            return 0
+        from utils import helper
+        job_ids = helper.load_processed_jobs_id(filename)
+        self.claim_new((job_id, None) for job_id in job_ids)
+        logger.info(f"Imported {len(job_ids)} job IDs from legacy file {filename}")
+        return len(job_ids)
+
+
+
+class RedisSeenJobsStore:
+    """Seen jobs and company counts on a Redis-compatible server, shared by workers on several machines.
+
+    Every job is a key that expires `ttl_days` after it was last seen, so no eviction pass is needed.
+    """
+
+    def __init__(self, url, ttl_days=config_input.SEEN_JOBS_TTL_DAYS, prefix="careerflow"):
+        import redis
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.ttl = int(ttl_days * 86400)
+        self.prefix = prefix
+
+    def _key(self, job_id):
+        return f"{self.prefix}:seen:{job_id}"
+
+    def __contains__(self, job_id):
+        return bool(self.redis.exists(self._key(job_id)))
+
+    def __len__(self):
+        return sum(1 for _ in self.redis.scan_iter(match=self._key("*"), count=1000))
+
+    def claim_new(self, jobs):
+        jobs = {job_id: url for job_id, url in jobs if job_id}
+        if not jobs:
+            return set()
+        # SET NX is atomic per job; jobs already present only get their expiry pushed back
+        pipe = self.redis.pipeline()
+        for job_id, url in jobs.items():
+            pipe.set(self._key(job_id), url or "", nx=True, ex=self.ttl)
+        new_ids = {job_id for job_id, created in zip(jobs, pipe.execute()) if created}
+        pipe = self.redis.pipeline()
+        for job_id in set(jobs) - new_ids:
+            pipe.expire(self._key(job_id), self.ttl)
+        pipe.execute()
+        return new_ids
+
+    def count_company_job(self, company, limit):
+        key = f"{self.prefix}:company_jobs"
+        if self.redis.hincrby(key, company, 1) - 1 > limit:
+            self.redis.hincrby(key, company, -1)
+            return False
+        return True
+
+    def reset_company_counts(self):
+        self.redis.delete(f"{self.prefix}:company_jobs")
+
+    def evict_older_than(self, days):
+        # Keys expire on their own
+        return 0
+
+    def import_legacy_file(self, filename=config_input.PROCESSED_JOBS_FILE_PATH):
+        return SeenJobsStore.import_legacy_file(self, filename)
+
+    def close(self):
+        self.redis.close()
+
+
+_store = None
+
+def open_store(url=None):
+    """Seen-jobs store for `url` (redis://...), by default SEEN_JOBS_URL, else a Redis task queue's server, else the local SQLite file.
+
+    A sqlite:/// task queue serves one machine only, so its workers share the local file.
+    """
+    url = url or config_input.SEEN_JOBS_URL
+    if not url and config_input.TASK_QUEUE_URL.startswith(REDIS_SCHEMES):
+        url = config_input.TASK_QUEUE_URL
+    if not url:
+        return SeenJobsStore()
+    if url.startswith(REDIS_SCHEMES):
+        return RedisSeenJobsStore(url)
+    raise ValueError(f"Unsupported SEEN_JOBS_URL: {url}")
+
+def get_store():
+    """Return the process-wide seen-jobs store (see `open_store`)."""
+    global _store
+    if _store is None:
+        _store = open_store()
+    return _store
@@ -1,7 +1,5 @@
 import os, csv
 import asyncio
-import gspread
-from google.oauth2.service_account import Credentials
 from datetime import datetime
 from config import config_input
 import logging
@@ -14,7 +12,7 @@ def _append_jobs(easy_applies, cs_applies, c_applies):
     def append_to_csv(file_name, rows):
         if not rows:
             return
-        path = os.path.join("output", file_name)
+        path = os.path.join(config_input.OUTPUT_DIR, file_name)
         with open(path, mode="a", newline='', encoding="utf-8") as f:
             writer = csv.writer(f)
             writer.writerows(rows)
@@ -34,9 +32,16 @@ async def jobs_append_to_csv(easy_applies, cs_applies, c_applies):
         logger.error(f"❌ Error saving to CSV: {e}")
 
 
+# Company site applies stay in the local CSV only, they are not sorted or uploaded
+if "CS_applies.csv" in config_input.CSV_FILES:
+    config_input.CSV_FILES.remove("CS_applies.csv")
+
 # After complete scraping sort row descending base matching % column and overwrite save files
-def update_google_sheets_from_csv(files=config_input.CSV_FILES.remove("CS_applies.csv")):
-    
+def update_google_sheets_from_csv(files=None):
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    files = config_input.CSV_FILES if files is None else files
     # 🔐 Google Sheets credentials
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # go one level up from utils
     creds_path = os.path.join(base_dir, "config", "gs_credentials.json")   # ✅ inside config/
@@ -51,7 +56,7 @@ def update_google_sheets_from_csv(files=config_input.CSV_FILES.remove("CS_applie
 
     # 📄 Loop through each CSV file in output/
     for file_name in files:
-        file_path = os.path.join("output", file_name)
+        file_path = os.path.join(config_input.OUTPUT_DIR, file_name)
         sheet_name = os.path.splitext(file_name)[0]  # "Easy_applies.csv" → "Easy_applies"
 
         try:
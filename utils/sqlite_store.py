@@ -0,0 +1,48 @@
+import os, sqlite3
+
+
+class SQLiteStore:
+    """Base of the stores kept in one SQLite (WAL) file that several worker processes share.
+
+    Subclasses put their CREATE statements in SCHEMA. The file is opened on first
+    use, so importing a store stays free.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.db_path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def transaction(self, work):
+        """Run work(conn) in one transaction and return its result.
+
+        IMMEDIATE takes the write lock up front, so two processes never read the same state and then both write.
+        """
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,24 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Measure how long each import and init step of startup takes."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps = []
+
+    @contextmanager
+    def step(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def report(self, logger):
+        total = time.perf_counter() - self.started
+        logger.info(f"⏱ Startup took {total * 1000:.0f} ms")
+        for name, seconds in self.steps:
+            logger.info(f"⏱   {name:<28} {seconds * 1000:8.1f} ms")
@@ -0,0 +1,252 @@
+import os, time
+import logging
+from collections import namedtuple
+from config import config_input
+from utils.sqlite_store import SQLiteStore
+
+# Logger
+logger = logging.getLogger("spider")
+
+# One search URL of a run; `index` is its position in JobUrls and picks the proxy/fingerprint/account
+Task = namedtuple("Task", "id url index")
+
+# URL schemes of a Redis-compatible server (task queue, seen jobs, checkpoints)
+REDIS_SCHEMES = ("redis://", "rediss://", "unix://")
+
+
+def new_run_id():
+    """Id for a run started now; the suffix keeps two runs started in the same second apart."""
+    return f"{time.strftime('%Y-%m-%dT%H-%M-%S')}-{os.urandom(2).hex()}"
+
+
+class SQLiteTaskQueue(SQLiteStore):
+    """Leased search-URL tasks in a SQLite file (WAL), for workers on one machine only.
+
+    WAL does not work over network filesystems, so machines that share a disk
+    must use the Redis queue instead.
+
+    A leased task stays with its worker while heartbeats extend the lease; once
+    the lease expires (the worker died) the next `lease` call hands it out again,
+    until it was leased `max_attempts` times. Without a `run`, `enqueue` joins the
+    run that still has queued or leased tasks, or starts a new one.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            run TEXT NOT NULL,
+            url TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            state TEXT NOT NULL DEFAULT 'queued',
+            worker TEXT,
+            lease_until REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (run, url)
+        );
+    """
+
+    def __init__(self, db_path, run, lease_seconds=config_input.TASK_LEASE_SECONDS,
+                 max_attempts=config_input.TASK_MAX_ATTEMPTS):
+        super().__init__(db_path)
+        self.run = run
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def enqueue(self, urls):
+        """Add the run's URLs unless another worker already did; returns True when this call created the run."""
+        def work(conn):
+            if self.run is None:
+                active = conn.execute(
+                    "SELECT run FROM tasks WHERE state IN ('queued', 'leased') ORDER BY rowid DESC LIMIT 1"
+                ).fetchone()
+                if active:
+                    self.run = active[0]
+                    return False
+                self.run = new_run_id()
+            elif conn.execute("SELECT 1 FROM tasks WHERE run = ? LIMIT 1", (self.run,)).fetchone():
+                return False
+            conn.executemany(
+                "INSERT OR IGNORE INTO tasks (run, url, position) VALUES (?, ?, ?)",
+                [(self.run, url, index) for index, url in enumerate(urls)]
+            )
+            return True
+        return self.transaction(work)
+
+    def lease(self, worker):
+        """Take the next queued (or expired) task for `worker`, or None."""
+        def work(conn):
+            now = time.time()
+            conn.execute(
+                "UPDATE tasks SET state = 'queued', worker = NULL WHERE run = ? AND state = 'leased' AND lease_until < ?",
+                (self.run, now)
+            )
+            conn.execute(
+                "UPDATE tasks SET state = 'failed' WHERE run = ? AND state = 'queued' AND attempts >= ?",
+                (self.run, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT rowid, url, position FROM tasks WHERE run = ? AND state = 'queued' ORDER BY position LIMIT 1",
+                (self.run,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET state = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE rowid = ?",
+                (worker, now + self.lease_seconds, row[0])
+            )
+            return Task(*row)
+        return self.transaction(work)
+
+    def heartbeat(self, task, worker):
+        """Extend the lease; False means the task was lost to another worker."""
+        cursor = self.conn.execute(
+            "UPDATE tasks SET lease_until = ? WHERE rowid = ? AND worker = ? AND state = 'leased'",
+            (time.time() + self.lease_seconds, task.id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, task, worker):
+        self.conn.execute(
+            "UPDATE tasks SET state = 'done', lease_until = NULL WHERE rowid = ? AND worker = ?",
+            (task.id, worker)
+        )
+
+    def release(self, task, worker):
+        """Give a task back to the queue, e.g. after an error."""
+        self.conn.execute(
+            "UPDATE tasks SET state = 'queued', worker = NULL WHERE rowid = ? AND worker = ? AND state = 'leased'",
+            (task.id, worker)
+        )
+
+    def pending(self):
+        """Tasks still queued or leased by some worker."""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE run = ? AND state IN ('queued', 'leased')", (self.run,)
+        ).fetchone()[0]
+
+    def summary(self):
+        counts = dict(self.conn.execute("SELECT state, COUNT(*) FROM tasks WHERE run = ? GROUP BY state", (self.run,)))
+        return {"run": self.run, **{state: counts.get(state, 0) for state in ("done", "queued", "leased", "failed")}}
+
+
+# Expired leases go back to the queue, tasks leased max_attempts times are failed, then one task is leased.
+_LEASE_SCRIPT = """
+local prefix, now, lease_until, worker, max_attempts = KEYS[1], tonumber(ARGV[1]), ARGV[2], ARGV[3], tonumber(ARGV[4])
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', prefix .. ':leases', '-inf', now)) do
+    redis.call('ZREM', prefix .. ':leases', id)
+    redis.call('RPUSH', prefix .. ':queued', id)
+end
+while true do
+    local id = redis.call('LPOP', prefix .. ':queued')
+    if not id then return nil end
+    local task = prefix .. ':task:' .. id
+    if tonumber(redis.call('HGET', task, 'attempts') or '0') >= max_attempts then
+        redis.call('SADD', prefix .. ':failed', id)
+    else
+        redis.call('HINCRBY', task, 'attempts', 1)
+        redis.call('HSET', task, 'worker', worker)
+        redis.call('ZADD', prefix .. ':leases', lease_until, id)
+        return {id, redis.call('HGET', task, 'url'), redis.call('HGET', task, 'index')}
+    end
+end
+"""
+
+# The first worker to run this creates every task of the run at once, so nobody sees a half-filled queue.
+# Without a run id (ARGV[1] empty) it joins the current run while that has tasks left, else starts run ARGV[2].
+_ENQUEUE_SCRIPT = """
+local base, run = KEYS[1], ARGV[1]
+if run == '' then
+    local current = redis.call('GET', base .. ':current')
+    if current and redis.call('LLEN', base .. ':' .. current .. ':queued') + redis.call('ZCARD', base .. ':' .. current .. ':leases') > 0 then
+        return {current, 0}
+    end
+    run = ARGV[2]
+    redis.call('SET', base .. ':current', run)
+end
+local prefix = base .. ':' .. run
+if not redis.call('SET', prefix .. ':created', ARGV[3], 'NX') then return {run, 0} end
+for index = 4, #ARGV do
+    local id = tostring(index - 4)
+    redis.call('HSET', prefix .. ':task:' .. id, 'url', ARGV[index], 'index', id, 'attempts', 0)
+    redis.call('RPUSH', prefix .. ':queued', id)
+end
+return {run, 1}
+"""
+
+
+class RedisTaskQueue:
+    """The same leased tasks on a Redis-compatible server, for workers on different machines."""
+
+    def __init__(self, url, run, lease_seconds=config_input.TASK_LEASE_SECONDS,
+                 max_attempts=config_input.TASK_MAX_ATTEMPTS):
+        # Only needed in this mode, so it is imported here
+        import redis
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.run = run
+        self.base = "careerflow:tasks"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lease = self.redis.register_script(_LEASE_SCRIPT)
+        self._enqueue = self.redis.register_script(_ENQUEUE_SCRIPT)
+
+    @property
+    def prefix(self):
+        return f"{self.base}:{self.run}"
+
+    def enqueue(self, urls):
+        self.run, created = self._enqueue(keys=[self.base], args=[self.run or "", new_run_id(), time.time(), *urls])
+        return bool(created)
+
+    def lease(self, worker):
+        now = time.time()
+        row = self._lease(keys=[self.prefix], args=[now, now + self.lease_seconds, worker, self.max_attempts])
+        if not row:
+            return None
+        task_id, url, index = row
+        return Task(task_id, url, int(index))
+
+    def _owns(self, task, worker):
+        return self.redis.hget(f"{self.prefix}:task:{task.id}", "worker") == worker
+
+    def heartbeat(self, task, worker):
+        if not self._owns(task, worker):
+            return False
+        # Only while the lease exists, a lease handed back to the queue is not revived
+        if self.redis.zscore(f"{self.prefix}:leases", task.id) is None:
+            return False
+        self.redis.zadd(f"{self.prefix}:leases", {task.id: time.time() + self.lease_seconds}, xx=True)
+        return True
+
+    def complete(self, task, worker):
+        if self._owns(task, worker):
+            self.redis.zrem(f"{self.prefix}:leases", task.id)
+            self.redis.sadd(f"{self.prefix}:done", task.id)
+
+    def release(self, task, worker):
+        if self._owns(task, worker) and self.redis.zrem(f"{self.prefix}:leases", task.id):
+            self.redis.rpush(f"{self.prefix}:queued", task.id)
+
+    def pending(self):
+        return self.redis.llen(f"{self.prefix}:queued") + self.redis.zcard(f"{self.prefix}:leases")
+
+    def summary(self):
+        return {
+            "run": self.run,
+            "done": self.redis.scard(f"{self.prefix}:done"),
+            "queued": self.redis.llen(f"{self.prefix}:queued"),
+            "leased": self.redis.zcard(f"{self.prefix}:leases"),
+            "failed": self.redis.scard(f"{self.prefix}:failed"),
+        }
+
+    def close(self):
+        self.redis.close()
+
+
+def open_queue(url=None, run=None):
+    """Task queue for `url`: redis://... or sqlite:///path/to/tasks.db (one machine); without a run id it is picked by `enqueue`."""
+    url = url or config_input.TASK_QUEUE_URL
+    run = run or config_input.TASK_RUN_ID or None
+    if url.startswith(REDIS_SCHEMES):
+        return RedisTaskQueue(url, run)
+    if url.startswith("sqlite:///"):
+        return SQLiteTaskQueue(url[len("sqlite:///"):], run)
+    raise ValueError(f"Unsupported TASK_QUEUE_URL: {url}")